@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -5,9 +8,74 @@ from fastapi.templating import Jinja2Templates
 from app.api.routers.analyze import router as analyze_router
 from app.api.routers.analyze_quick import router as analyze_quick_router
 from app.api.routers.dnsleak import router as dnsleak_router
+from app.api.routers.metrics import router as metrics_router
 from app.api.routers.root import router as root_router
+from app.services.dns_service import (
+    run_ct_updater,
+    start_leak_dns_server,
+    stop_leak_dns_server,
+)
+from app.services.tcp_fingerprint_service import start_syn_capture, stop_syn_capture
+from app.utils.ct_index import get_ct_store
+from app.utils.executors import shutdown_executors
+from app.utils.geo_db import get_geo_db
+from app.utils.hosting_ranges import get_range_index
+from app.utils.http_client import http_pool
+from app.utils.tcp_signatures import get_signature_table
+from app.utils.tor_consensus import get_consensus_loader, run_consensus_watcher
+from app.utils.tor_exit_history import get_exit_history
+from app.utils.tor_exit_nodes import get_exit_index, run_exit_list_refresher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Жизненный цикл приложения.
+
+    При старте:
+      - создаёт общий пул HTTP-соединений;
+      - загружает индекс exit-нод Tor (снапшот или встроенный список),
+        историю exit-нод и индекс релеев из consensus;
+      - строит индекс хостинг/VPN/прокси-сетей, открывает базу геолокации
+        и CT-индекс поддоменов;
+      - компилирует таблицу TCP-сигнатур и запускает захват SYN клиентов;
+      - запускает DNS-сервер DNS-leak теста;
+      - запускает фоновое обновление списка exit-нод, отслеживание consensus
+        и пополнение CT-индекса из crt.sh.
+    При остановке отменяет фоновые задачи, останавливает захват SYN
+    и DNS-сервер, закрывает пул соединений
+    и останавливает пулы потоков для блокирующих операций.
+    """
+    await http_pool.start()
+    await asyncio.to_thread(get_exit_index)
+    await asyncio.to_thread(get_exit_history)
+    await asyncio.to_thread(get_consensus_loader)
+    await asyncio.to_thread(get_range_index)
+    await asyncio.to_thread(get_geo_db)
+    await asyncio.to_thread(get_ct_store)
+    await asyncio.to_thread(get_signature_table)
+    start_syn_capture()
+    await start_leak_dns_server()
+    background = [
+        asyncio.create_task(run_exit_list_refresher()),
+        asyncio.create_task(run_consensus_watcher()),
+        asyncio.create_task(run_ct_updater()),
+    ]
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        for task in background:
+            with suppress(asyncio.CancelledError):
+                await task
+        stop_syn_capture()
+        await stop_leak_dns_server()
+        await http_pool.close()
+        shutdown_executors()
+
 
-app = FastAPI(title="Deanon Service")
+app = FastAPI(title="Deanon Service", lifespan=lifespan)
 
 templates = Jinja2Templates(directory="app/templates")
 
@@ -17,3 +85,4 @@ app.include_router(root_router, prefix="")
 app.include_router(analyze_router, prefix="")
 app.include_router(analyze_quick_router, prefix="")
 app.include_router(dnsleak_router, prefix="")
+app.include_router(metrics_router, prefix="")
@@ -1,23 +1,44 @@
 import socket
+from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
+from app.core.config import settings
 from app.dependencies import get_client_ip
-from app.exceptions import DataUnavailableError
-from app.schemas.anonymization import AnonymizationInfo
+from app.exceptions import DataUnavailableError, ExecutorBusyError
+from app.schemas.anonymization import (
+    AnonymizationInfo,
+    TorHistoryQuery,
+    TorHistoryResult,
+)
+from app.schemas.dns_info import FullResolve, FullResolvePage, PtrNeighbourhood
 from app.schemas.ip_info import LocationInfo, WhoisInfo
-from app.schemas.os_info import OSInfo
+from app.schemas.os_info import OSInfo, TcpFingerprintInfo
 from app.schemas.port_scan_info import PortScanResponse
 from app.schemas.security import SecurityInfoResponse
 from app.schemas.tunnel_ping import PingResponse, TunnelInfo
-from app.services.anonymization_service import get_anonymization_info
-from app.services.ip_service import get_location_by_ip, get_whois_info
+from app.services.anonymization_service import (
+    check_tor_history,
+    get_anonymization_info,
+)
+from app.services.dns_service import (
+    full_dns_resolve,
+    get_full_resolve_page,
+    iter_full_resolve,
+)
+from app.services.ip_service import (
+    get_bulk_asn_info,
+    get_location_by_ip,
+    get_whois_info,
+)
 from app.services.os_service import get_os_results
 from app.services.port_scan_service import port_scan_info
+from app.services.ptr_sweep_service import get_ptr_neighbourhood
 from app.services.security_service import get_security_info
+from app.services.tcp_fingerprint_service import get_tcp_fingerprint
 from app.services.tunnel_service import check_ip_for_tunnel, get_double_ping
 
 router = APIRouter()
@@ -44,7 +65,12 @@ async def analyze_page(request: Request):
 @router.get(
     "/anonymization", response_model=AnonymizationInfo, tags=["Deanonymization"]
 )
-async def anonymization_endpoint(client_ip: str = Depends(get_client_ip)):
+async def anonymization_endpoint(
+    client_ip: str = Depends(get_client_ip),
+    at: Optional[datetime] = Query(
+        None, description="Момент времени для исторической проверки Tor"
+    ),
+):
     """
     Выполняет анализ анонимизации пользователя по IP-адресу.
 
@@ -55,14 +81,36 @@ async def anonymization_endpoint(client_ip: str = Depends(get_client_ip)):
 
     Args:
         client_ip (str): IP-адрес пользователя (подставляется Depends).
+        at (datetime | None): Если задан — Tor проверяется по истории
+         exit-нод на этот момент.
 
     Returns:
         AnonymizationInfo: Pydantic-модель с результатами анализа.
     """
-    anon_info: AnonymizationInfo = await get_anonymization_info(client_ip)
+    anon_info: AnonymizationInfo = await get_anonymization_info(client_ip, at=at)
     return anon_info
 
 
+@router.post(
+    "/tor_history", response_model=list[TorHistoryResult], tags=["Deanonymization"]
+)
+async def tor_history_endpoint(queries: list[TorHistoryQuery]):
+    """
+    Пакетно проверяет, были ли IP-адреса exit-нодами Tor в заданные моменты времени.
+
+    - Работает по локальной истории снапшотов списка exit-нод (офлайн).
+    - Для каждого запроса возвращает флаг was_exit и интервалы присутствия,
+     пересекающиеся с диапазоном [timestamp, until].
+
+    Args:
+        queries (list[TorHistoryQuery]): Список пар (ip, момент времени).
+
+    Returns:
+        list[TorHistoryResult]: Результаты в порядке запросов.
+    """
+    return check_tor_history(queries)
+
+
 @router.get("/whois_info", response_model=WhoisInfo, tags=["Deanonymization"])
 async def ip_info_endpoint(client_ip: str = Depends(get_client_ip)):
     """
@@ -214,6 +262,10 @@ async def double_ping_endpoint(client_ip: str = Depends(get_client_ip)):
     try:
         ping_result = await get_double_ping(client_ip)
         return ping_result
+    except ExecutorBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=e.message
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -221,6 +273,27 @@ async def double_ping_endpoint(client_ip: str = Depends(get_client_ip)):
         )
 
 
+@router.post("/whois_bulk", response_model=list[WhoisInfo], tags=["Deanonymization"])
+async def whois_bulk_endpoint(ips: list[str]):
+    """
+    Пакетно определяет ASN, анонсируемый префикс, страну и реестр для списка IP.
+
+    - Все адреса отправляются одной bulk whois-сессией (протокол Team Cymru),
+     ответ разбирается по мере поступления.
+    - Заполняются только поля ASN; сведения о сетях — через /whois_info.
+
+    Args:
+        ips (list[str]): Список IP-адресов.
+
+    Returns:
+        list[WhoisInfo]: Результаты в порядке запроса.
+    """
+    try:
+        return await get_bulk_asn_info(ips)
+    except DataUnavailableError:
+        raise HTTPException(status_code=421, detail="Ошибка получения WHOIS информации")
+
+
 @router.get(
     "/ip_location", response_model=Optional[LocationInfo], tags=["Deanonymization"]
 )
@@ -261,9 +334,131 @@ async def os_detection_endpoint(request: Request):
     """
     try:
         headers = dict(request.headers)
-        detected_os = await get_os_results(headers)
+        detected_os = get_os_results(headers)
         return detected_os
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Ошибка при анализе заголовков: {str(e)}"
         )
+
+
+@router.get(
+    "/tcp_fingerprint",
+    response_model=Optional[TcpFingerprintInfo],
+    tags=["Deanonymization"],
+)
+async def tcp_fingerprint_endpoint(client_ip: str = Depends(get_client_ip)):
+    """
+    Возвращает пассивный отпечаток TCP/IP-стека клиента (в стиле p0f).
+
+    - Использует признаки SYN (TTL, окно, MSS, порядок опций), захваченного
+     при подключении клиента; повторный захват не выполняется.
+    - ОС определяется по таблице сигнатур, её нельзя подделать HTTP-заголовками.
+
+    Args:
+        client_ip (str): IP-адрес клиента.
+
+    Returns:
+        Optional[TcpFingerprintInfo]: Признаки SYN и ОС, либо None,
+        если SYN не захватывался.
+    """
+    return get_tcp_fingerprint(client_ip)
+
+
+@router.get(
+    "/ptr_neighbourhood", response_model=PtrNeighbourhood, tags=["Deanonymization"]
+)
+async def ptr_neighbourhood_endpoint(
+    client_ip: str = Depends(get_client_ip),
+    prefix: Optional[int] = Query(
+        None, description="Длина префикса сети (по умолчанию /24 или /120 для IPv6)"
+    ),
+):
+    """
+    Возвращает сводку по PTR-именам соседних адресов клиента.
+
+    - Разрешает PTR всех адресов сети параллельно через общий резолвер.
+    - Группирует имена по шаблонам и считает ключевые слова хостинга
+     и абонентских пулов: по ним отличаются домашние сети, хостинг и VPN.
+
+    Args:
+        client_ip (str): IP-адрес клиента.
+        prefix (Optional[int]): Длина префикса сети.
+
+    Returns:
+        PtrNeighbourhood: Сводка по сети.
+    """
+    try:
+        return await get_ptr_neighbourhood(client_ip, prefix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/full_resolve", response_model=FullResolve, tags=["Deanonymization"])
+async def full_resolve_endpoint(client_ip: str = Depends(get_client_ip)):
+    """
+    Выполняет полный DNS-resolve по PTR-имени клиента.
+
+    - Возвращает сводку и первую страницу имён с записями.
+    - Полный список сохраняется на сервере: следующие страницы читаются
+     по resolve_id и next_cursor, весь набор — потоком NDJSON.
+
+    Args:
+        client_ip (str): IP-адрес клиента.
+
+    Returns:
+        FullResolve: Сводка, первая страница и курсор.
+    """
+    return await full_dns_resolve(client_ip)
+
+
+@router.get(
+    "/full_resolve/{resolve_id}",
+    response_model=FullResolvePage,
+    tags=["Deanonymization"],
+)
+async def full_resolve_page_endpoint(
+    resolve_id: str,
+    cursor: int = Query(0, ge=0, description="Курсор страницы (next_cursor)"),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=settings.FULL_RESOLVE_MAX_PAGE_SIZE,
+        description="Число имён на странице",
+    ),
+):
+    """
+    Возвращает страницу сохранённого полного DNS-resolve; записи имён
+    страницы запрашиваются при обращении.
+
+    Args:
+        resolve_id (str): Идентификатор из FullResolve.
+        cursor (int): Позиция первого имени страницы.
+        limit (Optional[int]): Число имён на странице.
+
+    Returns:
+        FullResolvePage: Имена страницы, их записи и курсор следующей страницы.
+    """
+    try:
+        return await get_full_resolve_page(resolve_id, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Ошибка. Такого значения нет")
+
+
+@router.get("/full_resolve/{resolve_id}/stream", tags=["Deanonymization"])
+async def full_resolve_stream_endpoint(resolve_id: str):
+    """
+    Возвращает все имена сохранённого полного DNS-resolve потоком NDJSON
+    (строка {"host": ..., "records": [...]} на имя).
+
+    Args:
+        resolve_id (str): Идентификатор из FullResolve.
+
+    Returns:
+        StreamingResponse: Поток application/x-ndjson.
+    """
+    try:
+        lines = iter_full_resolve(resolve_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Ошибка. Такого значения нет")
+    return StreamingResponse(lines, media_type="application/x-ndjson")
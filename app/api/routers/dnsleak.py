@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Query
 
+from app.core.config import settings
 from app.schemas.dns_info import DnsLeakResult, DnsLeakTest
 from app.services.dns_service import analyze_dns_leak, generate_dns_leak_test
 
@@ -14,25 +15,35 @@ async def dnsleak_start():
     Returns:
         DnsLeakTest: Сгенерированные поддомены и test_id.
     """
-    leak_test = generate_dns_leak_test(count=3, base_domain="example.com")
+    leak_test = generate_dns_leak_test(count=3)
     return leak_test
 
 
 @router.get("/check", response_model=DnsLeakResult)
 async def dnsleak_check(
     test_id: str = Query(..., description="ID ранее сгенерированного DNS-leak теста"),
+    wait: float = Query(
+        0,
+        ge=0,
+        le=settings.DNS_LEAK_MAX_WAIT,
+        description="Сколько секунд ждать запросов ко всем тестовым доменам",
+    ),
 ):
     """
     Анализирует, были ли резолвлены клиентом все тестовые поддомены (DNS-leak check).
 
+    При wait > 0 работает как long-poll: ответ возвращается, как только
+    запрошены все тестовые домены, либо через wait секунд.
+
     Args:
         test_id (str): ID DNS-leak теста.
+        wait (float): Максимальное ожидание запросов (сек).
 
     Returns:
         DnsLeakResult: Результаты теста.
     """
     try:
-        result = await analyze_dns_leak(test_id=test_id, wait_time=0)
+        result = await analyze_dns_leak(test_id=test_id, wait_time=wait)
         return result
     except ValueError:
         raise HTTPException(status_code=404, detail="Ошибка. Такого значения нет")
@@ -0,0 +1,92 @@
+from fastapi import APIRouter
+
+from app.schemas.metrics import (
+    DnsCacheStats,
+    ExecutorStats,
+    HttpPoolStats,
+    IpCachesStats,
+    IphubStats,
+    UpstreamsResponse,
+    UpstreamStats,
+)
+from app.services.anonymization_service import iphub_stats
+from app.services.ip_service import ip_cache_stats
+from app.utils.dns_client import dns_client
+from app.utils.executors import executors_stats
+from app.utils.http_client import http_pool
+from app.utils.upstream import retry_budget, upstreams_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/http_pool", response_model=HttpPoolStats)
+async def http_pool_metrics():
+    """
+    Возвращает статистику общего пула HTTP-соединений.
+
+    Returns:
+        HttpPoolStats: Лимиты, занятые/свободные соединения и счётчики пула.
+    """
+    return HttpPoolStats(**http_pool.stats())
+
+
+@router.get("/upstreams", response_model=UpstreamsResponse)
+async def upstreams_metrics():
+    """
+    Возвращает состояние circuit breaker и счётчики по каждому внешнему сервису,
+    а также остаток глобального бюджета повторов.
+
+    Returns:
+        UpstreamsResponse: Состояние upstream для настройки дедлайнов и порогов.
+    """
+    return UpstreamsResponse(
+        retry_budget_tokens=retry_budget.tokens,
+        retry_budget_exhausted=retry_budget.exhausted,
+        upstreams=[UpstreamStats(**stats) for stats in upstreams_stats()],
+    )
+
+
+@router.get("/iphub", response_model=IphubStats)
+async def iphub_metrics():
+    """
+    Возвращает статистику кэша вердиктов и ограничителя запросов к iphub.
+
+    Returns:
+        IphubStats: Доля попаданий в кэш, очередь и отброшенные запросы, ответы 429.
+    """
+    return IphubStats(**iphub_stats())
+
+
+@router.get("/ip_caches", response_model=IpCachesStats)
+async def ip_caches_metrics():
+    """
+    Возвращает статистику сетевых кэшей WHOIS и геолокации.
+
+    Returns:
+        IpCachesStats: Размер и доля попаданий каждого кэша.
+    """
+    return IpCachesStats(**ip_cache_stats())
+
+
+@router.get("/executors", response_model=list[ExecutorStats])
+async def executors_metrics():
+    """
+    Возвращает статистику пулов потоков для блокирующих операций
+    (ping, sniff и др.).
+
+    Returns:
+        list[ExecutorStats]: Загрузка, глубина очереди и время ожидания каждого пула.
+    """
+    return [ExecutorStats(**stats) for stats in executors_stats()]
+
+
+@router.get("/dns_cache", response_model=DnsCacheStats)
+async def dns_cache_metrics():
+    """
+    Возвращает статистику кэша общего DNS-резолвера.
+
+    Returns:
+        DnsCacheStats: Размер, попадания (в т.ч. отрицательные), объединённые
+        и выполняющиеся запросы.
+    """
+    return DnsCacheStats(**dns_client.stats())
@@ -11,6 +11,101 @@ class Settings(BaseSettings):
         TOR_EXIT_LIST_URL: URL для загрузки списка exit-нод Tor.
         CRTSH_API_URL: API-адрес для получения сертификатов по домену.
         CACHE_TTL_SECONDS: Время жизни кеша в секундах.
+        TOR_EXIT_REFRESH_SECONDS: Период фонового обновления списка exit-нод Tor.
+        TOR_EXIT_SNAPSHOT_PATH: Путь к снапшоту последнего списка exit-нод на диске.
+        TOR_EXIT_HISTORY_DIR: Директория архивных снапшотов для истории exit-нод
+            (пустая строка отключает архивацию).
+        TOR_CONSENSUS_DIR: Директория с документами consensus/дескрипторов Tor.
+        TOR_CONSENSUS_CHECK_SECONDS: Период проверки директории consensus на изменения.
+        HTTP_POOL_LIMIT: Максимум одновременных HTTP-соединений в общем пуле.
+        HTTP_POOL_LIMIT_PER_HOST: Максимум соединений к одному хосту.
+        HTTP_DNS_CACHE_TTL: Время жизни DNS-кэша пула соединений (сек).
+        HTTP_KEEPALIVE_SECONDS: Время удержания простаивающего keep-alive соединения.
+        HTTP_DEFAULT_TIMEOUT: Общий таймаут HTTP-запроса по умолчанию (сек).
+        UPSTREAM_DEADLINES: Дедлайны вызовов внешних сервисов по имени upstream (сек).
+        UPSTREAM_DEFAULT_DEADLINE: Дедлайн для upstream, не указанных явно (сек).
+        UPSTREAM_MAX_RETRIES: Максимум повторов одного вызова upstream.
+        UPSTREAM_RETRY_BACKOFF: Базовая задержка перед повтором (сек), растёт x2.
+        RETRY_BUDGET_RATIO: Доля повторов от числа исходных запросов (глобально).
+        RETRY_BUDGET_MIN_PER_SECOND: Минимальное пополнение бюджета повторов в секунду.
+        RETRY_BUDGET_MAX_TOKENS: Максимальный запас бюджета повторов.
+        CIRCUIT_FAILURE_THRESHOLD: Число сбоев подряд, размыкающее цепь upstream.
+        CIRCUIT_RESET_SECONDS: Время до пробного запроса в разомкнутую цепь.
+        IPHUB_REQUESTS_PER_DAY: Лимит запросов к iphub по тарифу (в сутки).
+        IPHUB_BURST: Максимальная пачка запросов к iphub сверх средней скорости.
+        IPHUB_MAX_QUEUE_WAIT: Сколько запрос может ждать токен, прежде чем
+            будет отброшен (сек).
+        IPHUB_CACHE_SIZE: Максимум IP в кэше вердиктов iphub.
+        IPHUB_BLOCK_TTL: Время жизни вердикта block=1 (VPN/прокси) в кэше (сек).
+        IPHUB_CLEAN_TTL: Время жизни прочих вердиктов в кэше (сек).
+        HOSTING_RANGES_DIR: Директория со списками хостинг/VPN/прокси-сетей
+            (файлы *.txt, строки "<CIDR> <hosting|vpn|proxy> <провайдер>").
+        GEO_DB_PATH: Путь к скомпилированной базе геолокации
+            (python -m app.utils.geo_db <csv> [путь]).
+        GEO_IPINFO_FALLBACK: Запрашивать ipinfo.io для IP, которых нет в локальной базе.
+        RDAP_BOOTSTRAP_URLS: Bootstrap-файлы IANA для выбора RDAP-сервера по IP.
+        RDAP_BOOTSTRAP_TTL: Период обновления bootstrap-реестра RDAP (сек).
+        RDAP_FALLBACK_URL: RDAP-сервер (редиректор) на случай, если реестр недоступен.
+        RDAP_MAX_REFERRALS: Максимум переходов по ссылкам на более точные реестры.
+        WHOIS_CACHE_SIZE: Максимум сетей в кэше WHOIS.
+        WHOIS_CACHE_TTL: Время жизни ответа WHOIS в кэше (сек).
+        GEO_CACHE_SIZE: Максимум сетей в кэше геолокации ipinfo.
+        GEO_CACHE_TTL: Время жизни геолокации в кэше (сек).
+        GEO_CACHE_PREFIX_V4: Длина префикса IPv4-сети, разделяющей одну запись
+            кэша геолокации.
+        GEO_CACHE_PREFIX_V6: То же для IPv6.
+        EXECUTOR_POOLS: Размеры пулов потоков для блокирующих операций по имени
+            пула: число потоков (workers) и максимум ожидающих задач (queue).
+        EXECUTOR_DEFAULT_WORKERS: Число потоков для пулов, не указанных явно.
+        EXECUTOR_DEFAULT_QUEUE: Длина очереди для пулов, не указанных явно.
+        CYMRU_WHOIS_HOST: Хост bulk whois для пакетного определения ASN.
+        CYMRU_WHOIS_PORT: Порт bulk whois.
+        CYMRU_BULK_TIMEOUT: Таймаут одной bulk-сессии (сек).
+        CYMRU_BULK_MAX_IPS: Максимум адресов в одной bulk-сессии.
+        TCP_FINGERPRINT_INTERFACE: Интерфейс для пассивного захвата SYN клиентов
+            (пустая строка отключает пассивный фингерпринтинг).
+        TCP_FINGERPRINT_FILTER: BPF-фильтр захвата SYN.
+        TCP_FINGERPRINT_CACHE_SIZE: Максимум IP в кэше признаков SYN.
+        TCP_FINGERPRINT_TTL: Время жизни признаков SYN в кэше (сек).
+        DNS_MAX_INFLIGHT: Максимум одновременных DNS-запросов через общий клиент.
+        CRTSH_CHUNK_SIZE: Размер чанка при потоковом чтении ответа crt.sh (байт).
+        DNS_CACHE_SIZE: Максимум ответов в кэше общего DNS-резолвера.
+        DNS_CACHE_MAX_TTL: Верхняя граница времени жизни ответа в DNS-кэше (сек).
+        DNS_NEGATIVE_TTL: Время жизни отрицательного DNS-ответа, если в нём нет SOA (сек).
+        DNS_LEAK_ZONE: Зона тестовых доменов DNS-leak (должна быть делегирована
+            на DNS-сервер приложения).
+        DNS_LEAK_HOST: Адрес DNS-сервера DNS-leak теста.
+        DNS_LEAK_PORT: Порт DNS-сервера DNS-leak теста (UDP и TCP).
+        DNS_LEAK_ANSWER_IP: IP в A-записи ответа на тестовые домены.
+        DNS_LEAK_TEST_TTL: Время жизни DNS-leak теста с момента создания (сек).
+        DNS_LEAK_MAX_TESTS: Максимум одновременно активных DNS-leak тестов.
+        DNS_LEAK_MAX_WAIT: Максимальное ожидание в long-poll проверке теста (сек).
+        CT_INDEX_PATH: Путь к CT-индексу имён из сертификатов
+            (собирается из дампов: python -m app.utils.ct_index).
+        CT_JOURNAL_PATH: Путь к журналу имён, найденных после сборки индекса.
+        CT_JOURNAL_MAX: Число имён в журнале, после которого он сливается с индексом.
+        CT_REFRESH_SECONDS: Период повторной загрузки отслеживаемого домена из crt.sh;
+            домен, не запрашивавшийся дольше, перестаёт отслеживаться.
+        CT_UPDATE_INTERVAL: Период проверки отслеживаемых доменов (сек).
+        CT_MAX_TRACKED: Максимум доменов, отслеживаемых фоновым обновлением.
+        PTR_SWEEP_PREFIX_V4: Длина префикса сети для PTR-сводки соседей (IPv4).
+        PTR_SWEEP_PREFIX_V6: То же для IPv6.
+        PTR_SWEEP_MAX_ADDRESSES: Максимум адресов в сети PTR-сводки.
+        PTR_SWEEP_RATE: Допустимая частота PTR-запросов сводки (запросов в секунду).
+        PTR_SWEEP_BURST: Допустимый всплеск PTR-запросов сводки.
+        PTR_SWEEP_TIMEOUT: Максимальное время построения PTR-сводки (сек).
+        PTR_SWEEP_CACHE_SIZE: Максимум сетей в кэше PTR-сводок.
+        PTR_SWEEP_TTL: Время жизни PTR-сводки в кэше (сек).
+        PTR_SWEEP_MAX_CLUSTERS: Число шаблонов имён в PTR-сводке.
+        FULL_RESOLVE_PAGE_SIZE: Число имён на странице полного DNS-resolve.
+        FULL_RESOLVE_MAX_PAGE_SIZE: Максимальный размер страницы по запросу.
+        FULL_RESOLVE_SESSIONS: Максимум сохранённых полных DNS-resolve.
+        FULL_RESOLVE_TTL: Время хранения полного DNS-resolve на сервере (сек).
+        TOR_EXIT_HISTORY_RETENTION_DAYS: Окно хранения архивных снапшотов
+            exit-нод (дней); более старые удаляются, 0 — хранить всё.
+        DNS_LEAK_NAMESERVER: Имя NS, на который делегирована зона DNS-leak
+            (MNAME в её SOA; пустая строка — ns.<DNS_LEAK_ZONE>).
+        CT_FETCH_CONCURRENCY: Число одновременных загрузок доменов из crt.sh.
 
     model_config:
         Определяет параметры загрузки конфигурации из файла .env.
@@ -26,6 +121,101 @@ class Settings(BaseSettings):
     TOR_EXIT_LIST_URL: str = "https://check.torproject.org/torbulkexitlist"
     CRTSH_API_URL: str = "https://crt.sh/?q=%25.{domain}&output=json"
     CACHE_TTL_SECONDS: int = 3600
+    TOR_EXIT_REFRESH_SECONDS: int = 1800
+    TOR_EXIT_SNAPSHOT_PATH: str = "data/tor_exits.txt"
+    TOR_EXIT_HISTORY_DIR: str = "data/tor_history"
+    TOR_CONSENSUS_DIR: str = "data/tor_consensus"
+    TOR_CONSENSUS_CHECK_SECONDS: int = 300
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_KEEPALIVE_SECONDS: float = 30.0
+    HTTP_DEFAULT_TIMEOUT: float = 30.0
+    UPSTREAM_DEADLINES: dict[str, float] = {
+        "iphub": 3.0,
+        "ipinfo": 3.0,
+        "rdap": 10.0,
+        "crtsh": 30.0,
+        "torproject": 30.0,
+    }
+    UPSTREAM_DEFAULT_DEADLINE: float = 10.0
+    UPSTREAM_MAX_RETRIES: int = 2
+    UPSTREAM_RETRY_BACKOFF: float = 0.2
+    RETRY_BUDGET_RATIO: float = 0.2
+    RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    RETRY_BUDGET_MAX_TOKENS: float = 10.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+    IPHUB_REQUESTS_PER_DAY: int = 1000
+    IPHUB_BURST: int = 20
+    IPHUB_MAX_QUEUE_WAIT: float = 0.5
+    IPHUB_CACHE_SIZE: int = 100_000
+    IPHUB_BLOCK_TTL: int = 3600
+    IPHUB_CLEAN_TTL: int = 86400
+    HOSTING_RANGES_DIR: str = "data/hosting_ranges"
+    GEO_DB_PATH: str = "data/geo.bin"
+    GEO_IPINFO_FALLBACK: bool = True
+    RDAP_BOOTSTRAP_URLS: list[str] = [
+        "https://data.iana.org/rdap/ipv4.json",
+        "https://data.iana.org/rdap/ipv6.json",
+    ]
+    RDAP_BOOTSTRAP_TTL: int = 86400
+    RDAP_FALLBACK_URL: str = "https://rdap.org/"
+    RDAP_MAX_REFERRALS: int = 2
+    WHOIS_CACHE_SIZE: int = 50_000
+    WHOIS_CACHE_TTL: int = 86400
+    GEO_CACHE_SIZE: int = 100_000
+    GEO_CACHE_TTL: int = 86400
+    GEO_CACHE_PREFIX_V4: int = 24
+    GEO_CACHE_PREFIX_V6: int = 48
+    EXECUTOR_POOLS: dict[str, dict[str, int]] = {
+        "ping": {"workers": 8, "queue": 32},
+        "sniff": {"workers": 4, "queue": 8},
+    }
+    EXECUTOR_DEFAULT_WORKERS: int = 4
+    EXECUTOR_DEFAULT_QUEUE: int = 16
+    CYMRU_WHOIS_HOST: str = "whois.cymru.com"
+    CYMRU_WHOIS_PORT: int = 43
+    CYMRU_BULK_TIMEOUT: float = 60.0
+    CYMRU_BULK_MAX_IPS: int = 10_000
+    TCP_FINGERPRINT_INTERFACE: str = ""
+    TCP_FINGERPRINT_FILTER: str = "tcp[tcpflags] & (tcp-syn|tcp-ack) == tcp-syn"
+    TCP_FINGERPRINT_CACHE_SIZE: int = 100_000
+    TCP_FINGERPRINT_TTL: int = 3600
+    DNS_MAX_INFLIGHT: int = 200
+    CRTSH_CHUNK_SIZE: int = 64 * 1024
+    DNS_CACHE_SIZE: int = 50_000
+    DNS_CACHE_MAX_TTL: int = 3600
+    DNS_NEGATIVE_TTL: int = 300
+    DNS_LEAK_ZONE: str = "example.com"
+    DNS_LEAK_HOST: str = "0.0.0.0"
+    DNS_LEAK_PORT: int = 55353
+    DNS_LEAK_ANSWER_IP: str = "127.0.0.1"
+    DNS_LEAK_TEST_TTL: int = 300
+    DNS_LEAK_MAX_TESTS: int = 100_000
+    DNS_LEAK_MAX_WAIT: float = 10.0
+    CT_INDEX_PATH: str = "data/ct_index.bin"
+    CT_JOURNAL_PATH: str = "data/ct_journal.txt"
+    CT_JOURNAL_MAX: int = 100_000
+    CT_REFRESH_SECONDS: int = 86400
+    CT_UPDATE_INTERVAL: int = 60
+    CT_MAX_TRACKED: int = 10_000
+    PTR_SWEEP_PREFIX_V4: int = 24
+    PTR_SWEEP_PREFIX_V6: int = 120
+    PTR_SWEEP_MAX_ADDRESSES: int = 1024
+    PTR_SWEEP_RATE: float = 2000.0
+    PTR_SWEEP_BURST: float = 512.0
+    PTR_SWEEP_TIMEOUT: float = 3.0
+    PTR_SWEEP_CACHE_SIZE: int = 10_000
+    PTR_SWEEP_TTL: int = 3600
+    PTR_SWEEP_MAX_CLUSTERS: int = 10
+    FULL_RESOLVE_PAGE_SIZE: int = 100
+    FULL_RESOLVE_MAX_PAGE_SIZE: int = 1000
+    FULL_RESOLVE_SESSIONS: int = 1000
+    FULL_RESOLVE_TTL: int = 1800
+    TOR_EXIT_HISTORY_RETENTION_DAYS: int = 90
+    DNS_LEAK_NAMESERVER: str = ""
+    CT_FETCH_CONCURRENCY: int = 4
 
 
 settings = Settings()
@@ -12,3 +12,24 @@ class DataUnavailableError(Exception):
     def __init__(self, message: str = "Данные получить невозможно"):
         self.message = message
         super().__init__(self.message)
+
+
+class UpstreamUnavailableError(DataUnavailableError):
+    """
+    Исключение для ситуации, когда внешний сервис (upstream) недоступен.
+
+    - Выбрасывается обёрткой вызовов upstream, если цепь circuit breaker
+    разомкнута, истёк дедлайн вызова или исчерпаны повторы.
+    - Наследуется от DataUnavailableError, поэтому обрабатывается
+    существующими обработчиками ошибок получения данных.
+    """
+
+
+class ExecutorBusyError(DataUnavailableError):
+    """
+    Исключение для ситуации, когда пул потоков для блокирующих операций
+    перегружен и его очередь заполнена.
+
+    - Выбрасывается реестром пулов вместо постановки задачи в очередь,
+    чтобы всплеск одного вида работы не копил неограниченное ожидание.
+    """
@@ -1,9 +1,9 @@
 from pydantic import BaseModel
 
 from app.schemas.anonymization import AnonymizationInfo
-from app.schemas.dns_info import FullResolve
+from app.schemas.dns_info import FullResolve, PtrNeighbourhood
 from app.schemas.ip_info import LocationInfo, WhoisInfo
-from app.schemas.os_info import OSInfo
+from app.schemas.os_info import OSInfo, TcpFingerprintInfo
 from app.schemas.port_scan_info import PortScanResponse
 from app.schemas.security import SecurityInfoResponse
 from app.schemas.tunnel_ping import PingResponse, TunnelInfo
@@ -23,7 +23,9 @@ class AnalysisResult(BaseModel):
     - double_ping_info: результаты двойного пинга (сравнение доступности)
     - ip_location: геолокация IP-адреса
     - os_info: информация об используемой ОС
+    - tcp_fingerprint: пассивный отпечаток TCP/IP-стека (ОС по пакету SYN)
     - full_resolve: полная информация по DNS-резолву
+    - ptr_neighbourhood: сводка по PTR-именам соседних адресов (по запросу)
     """
 
     anonymization_info: AnonymizationInfo | None = None
@@ -34,4 +36,6 @@ class AnalysisResult(BaseModel):
     double_ping_info: PingResponse | None = None
     ip_location: LocationInfo | None = None
     os_info: OSInfo | None = None
+    tcp_fingerprint: TcpFingerprintInfo | None = None
     full_resolve: FullResolve | None = None
+    ptr_neighbourhood: PtrNeighbourhood | None = None
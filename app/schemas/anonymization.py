@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -5,12 +7,15 @@ class VPNAndProxyInfo(BaseModel):
     """
     Модель сведений о VPN и прокси.
 
-    - detected: найден ли VPN или прокси
+    - detected: найден ли VPN или прокси (None — проверка не выполнена)
     - service: название сервиса (если определено)
+    - status: результат проверки: ok, throttled (исчерпан лимит запросов
+      к API) или unavailable (API недоступен или ответил ошибкой)
     """
 
-    detected: bool
+    detected: bool | None
     service: str | None = None
+    status: str = "ok"
 
 
 class TorInfo(BaseModel):
@@ -20,30 +25,86 @@ class TorInfo(BaseModel):
     - is_tor: обнаружен ли Tor exit-node
     - exit_node_ip: IP exit-узла Tor (если найден)
     - exit_location: геолокация exit-узла Tor (если найдена)
+    - is_relay: является ли IP релеем Tor любого типа (по данным consensus)
+    - relay_flags: флаги релея из consensus (Guard, Exit, Fast и т.д.)
     """
 
     is_tor: bool
     exit_node_ip: str | None = None
     exit_location: str | None = None
+    is_relay: bool = False
+    relay_flags: list[str] | None = None
 
 
 class AnonymizationInfo(BaseModel):
     """
     Сводная модель об анонимайзерах (VPN, прокси, Tor).
 
-    - vpn_detected: нашёлся ли VPN
+    - vpn_detected: нашёлся ли VPN (None — проверка не выполнена)
     - vpn_provider: VPN-провайдер
-    - proxy_detected: нашёлся ли прокси
+    - proxy_detected: нашёлся ли прокси (None — проверка не выполнена)
     - proxy_type: тип прокси
     - proxy_provider: провайдер прокси
+    - hosting_detected: принадлежит ли IP сети хостинга (по локальным спискам)
+    - hosting_provider: хостинг-провайдер
+    - vpn_check_status: результат проверки VPN/прокси (ok / throttled / unavailable)
     - tor_detected: нашёлся ли Tor exit-node
     - tor_exit_location: геолокация Tor exit-node
+    - tor_relay_flags: флаги релея Tor, если IP — релей (guard, middle, exit)
     """
 
-    vpn_detected: bool
+    vpn_detected: bool | None
     vpn_provider: str | None = None
-    proxy_detected: bool
+    proxy_detected: bool | None
     proxy_type: str | None = None
     proxy_provider: str | None = None
+    hosting_detected: bool = False
+    hosting_provider: str | None = None
+    vpn_check_status: str = "ok"
     tor_detected: bool
     tor_exit_location: str | None = None
+    tor_relay_flags: list[str] | None = None
+
+
+class TorExitPeriod(BaseModel):
+    """
+    Интервал, в течение которого IP присутствовал в списке exit-нод Tor.
+
+    - start: момент первого появления в списке
+    - end: момент исчезновения из списка (None — адрес есть в последнем снапшоте)
+    """
+
+    start: datetime
+    end: datetime | None = None
+
+
+class TorHistoryQuery(BaseModel):
+    """
+    Запрос к истории exit-нод Tor.
+
+    - ip: проверяемый IP-адрес
+    - timestamp: момент времени (или начало диапазона, если задан until)
+    - until: конец диапазона (необязательно)
+    """
+
+    ip: str
+    timestamp: datetime
+    until: datetime | None = None
+
+
+class TorHistoryResult(BaseModel):
+    """
+    Результат запроса к истории exit-нод Tor.
+
+    - ip: проверяемый IP-адрес
+    - timestamp: момент времени (или начало диапазона)
+    - until: конец диапазона (если задан)
+    - was_exit: был ли IP exit-нодой в момент timestamp
+    - periods: интервалы присутствия, пересекающиеся с диапазоном запроса
+    """
+
+    ip: str
+    timestamp: datetime
+    until: datetime | None = None
+    was_exit: bool
+    periods: list[TorExitPeriod]
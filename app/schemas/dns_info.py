@@ -22,6 +22,7 @@ class DnsLeakResult(BaseModel):
     - seen: домены, реально резолвленные клиентом
     - missing: домены, которые не были резолвлены
     - leak_detected: флаг, указывающий на наличие утечки DNS
+    - resolvers: IP-адреса резолверов, от которых пришли запросы к тестовым доменам
     """
 
     test_id: str
@@ -29,15 +30,85 @@ class DnsLeakResult(BaseModel):
     seen: list[str]
     missing: list[str]
     leak_detected: bool
+    resolvers: list[str] = []
 
 
 class FullResolve(BaseModel):
     """
-    Модель для полной информации о DNS-resolve.
+    Модель для полной информации о DNS-resolve: сводка и первая страница имён.
+    Полный список хранится на сервере и читается по resolve_id постранично
+    или потоком NDJSON.
 
-    - subdomains: список поддоменов для резолва
-    - full_records: словарь с результатами резолва по каждому поддомену
+    - resolve_id: идентификатор сохранённого resolve
+    - total_hosts: общее число имён (включая записи "*.зона")
+    - subdomains: имена первой страницы (первое — сам домен; имена, отвечающие
+      только wildcard-записью, заменены записью "*.зона")
+    - full_records: словарь с результатами резолва по каждому имени страницы
+    - next_cursor: курсор следующей страницы (None, если страница последняя)
+    - wildcards: зоны с wildcard-записями ("*.зона") и их записи всех типов
+    - wildcard_collapsed: число имён, схлопнутых в каждую запись "*.зона"
     """
 
+    resolve_id: str | None = None
+    total_hosts: int = 0
     subdomains: list[str]
     full_records: dict[str, list[str]]
+    next_cursor: int | None = None
+    wildcards: dict[str, list[str]] = {}
+    wildcard_collapsed: dict[str, int] = {}
+
+
+class FullResolvePage(BaseModel):
+    """
+    Страница сохранённого полного DNS-resolve.
+
+    - resolve_id: идентификатор сохранённого resolve
+    - cursor: позиция первого имени страницы
+    - next_cursor: курсор следующей страницы (None, если страница последняя)
+    - subdomains: имена страницы
+    - full_records: словарь с результатами резолва по каждому имени страницы
+    """
+
+    resolve_id: str
+    cursor: int
+    next_cursor: int | None = None
+    subdomains: list[str]
+    full_records: dict[str, list[str]]
+
+
+class PtrCluster(BaseModel):
+    """
+    Группа PTR-имён с одинаковым шаблоном.
+
+    - pattern: шаблон имени (последовательности цифр заменены на "#")
+    - count: число адресов с таким шаблоном
+    - examples: примеры имён
+    """
+
+    pattern: str
+    count: int
+    examples: list[str]
+
+
+class PtrNeighbourhood(BaseModel):
+    """
+    Сводка по PTR-именам адресов сети клиента.
+
+    - network: просканированная сеть
+    - scanned: число адресов в сети
+    - resolved: число адресов с PTR-записью
+    - clusters: самые частые шаблоны имён
+    - hosting_keywords: частота ключевых слов хостинга/VPN (vps, server, cloud, ...)
+    - residential_keywords: частота ключевых слов абонентских пулов (dsl, pool, dyn, ...)
+    - verdict: тип сети по именам: hosting, residential, mixed или unknown
+    - complete: False, если часть запросов не успела завершиться
+    """
+
+    network: str
+    scanned: int
+    resolved: int
+    clusters: list[PtrCluster]
+    hosting_keywords: dict[str, int]
+    residential_keywords: dict[str, int]
+    verdict: str
+    complete: bool = True
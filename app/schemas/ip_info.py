@@ -43,6 +43,7 @@ class WhoisInfo(BaseModel):
     - asn_country_code: страна ASN
     - asn_date: дата регистрации ASN
     - asn_registry: реестр ASN
+    - asn_description: название автономной системы (если известно)
     - nets: список подсетей (NetInfo)
     """
 
@@ -52,6 +53,7 @@ class WhoisInfo(BaseModel):
     asn_country_code: str | None = None
     asn_date: str | None = None
     asn_registry: str | None = None
+    asn_description: str | None = None
     nets: list[NetInfo]
 
 
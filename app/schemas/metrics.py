@@ -0,0 +1,185 @@
+from pydantic import BaseModel
+
+
+class HttpPoolStats(BaseModel):
+    """
+    Статистика общего пула HTTP-соединений.
+
+    - started: запущен ли пул
+    - limit: общий лимит соединений
+    - limit_per_host: лимит соединений к одному хосту
+    - in_use: число занятых соединений
+    - idle: число простаивающих keep-alive соединений
+    - requests: число отправленных запросов
+    - errors: число запросов, завершившихся исключением
+    - connections_created: число открытых новых соединений
+    - connections_reused: число запросов по переиспользованным соединениям
+    - dns_cache_hits: попадания в DNS-кэш пула
+    - dns_cache_misses: промахи DNS-кэша пула
+    """
+
+    started: bool
+    limit: int
+    limit_per_host: int
+    in_use: int
+    idle: int
+    requests: int
+    errors: int
+    connections_created: int
+    connections_reused: int
+    dns_cache_hits: int
+    dns_cache_misses: int
+
+
+class UpstreamStats(BaseModel):
+    """
+    Состояние обёртки вызовов внешнего сервиса (upstream).
+
+    - name: имя upstream
+    - state: состояние circuit breaker (closed / open / half_open)
+    - deadline: дедлайн одного вызова с учётом повторов (сек)
+    - max_retries: максимум повторов одного вызова
+    - consecutive_failures: число сбоев подряд
+    - calls: всего вызовов
+    - successes: успешных вызовов
+    - failures: неудачных попыток (включая повторы)
+    - retries: выполненных повторов
+    - timeouts: попыток, прерванных по дедлайну
+    - rejected: вызовов, отклонённых разомкнутой цепью
+    """
+
+    name: str
+    state: str
+    deadline: float
+    max_retries: int
+    consecutive_failures: int
+    calls: int
+    successes: int
+    failures: int
+    retries: int
+    timeouts: int
+    rejected: int
+
+
+class UpstreamsResponse(BaseModel):
+    """
+    Состояние всех upstream и глобального бюджета повторов.
+
+    - retry_budget_tokens: доступный запас повторов
+    - retry_budget_exhausted: сколько раз повтор был запрещён бюджетом
+    - upstreams: состояние каждого upstream
+    """
+
+    retry_budget_tokens: float
+    retry_budget_exhausted: int
+    upstreams: list[UpstreamStats]
+
+
+class IphubStats(BaseModel):
+    """
+    Статистика обращений к iphub (проверка VPN/прокси).
+
+    - cache_size: число IP в кэше вердиктов
+    - cache_hits: попадания в кэш
+    - cache_misses: промахи кэша
+    - hit_ratio: доля попаданий
+    - tokens: текущий запас токенов ограничителя
+    - requests_sent: запросов, пропущенных ограничителем
+    - requests_queued: из них ожидавших токен в очереди
+    - requests_shed: запросов, отброшенных ограничителем
+    - upstream_429: ответов 429 (исчерпана квота) от iphub
+    """
+
+    cache_size: int
+    cache_hits: int
+    cache_misses: int
+    hit_ratio: float
+    tokens: float
+    requests_sent: int
+    requests_queued: int
+    requests_shed: int
+    upstream_429: int
+
+
+class PrefixCacheStats(BaseModel):
+    """
+    Статистика кэша, индексированного сетевыми префиксами.
+
+    - size: число сетей в кэше
+    - hits: попадания в кэш
+    - misses: промахи кэша
+    - hit_ratio: доля попаданий
+    """
+
+    size: int
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class IpCachesStats(BaseModel):
+    """
+    Статистика сетевых кэшей сведений об IP.
+
+    - whois: кэш ответов WHOIS (по сетям из ответа)
+    - geo: кэш геолокации ipinfo (по сетям фиксированной длины)
+    """
+
+    whois: PrefixCacheStats
+    geo: PrefixCacheStats
+
+
+class ExecutorStats(BaseModel):
+    """
+    Статистика пула потоков для блокирующих операций.
+
+    - name: имя пула
+    - max_workers: число потоков
+    - max_queue: максимум ожидающих задач
+    - running: выполняемых задач
+    - queue_depth: задач в очереди
+    - submitted: принятых задач
+    - completed: завершённых задач
+    - rejected: задач, отклонённых из-за переполнения очереди
+    - avg_wait: среднее ожидание свободного потока (сек)
+    - max_wait: максимальное ожидание свободного потока (сек)
+    """
+
+    name: str
+    max_workers: int
+    max_queue: int
+    running: int
+    queue_depth: int
+    submitted: int
+    completed: int
+    rejected: int
+    avg_wait: float
+    max_wait: float
+
+
+class DnsCacheStats(BaseModel):
+    """
+    Статистика кэша общего DNS-резолвера.
+
+    - size: число ответов в кэше
+    - maxsize: максимальный размер кэша
+    - hits: попадания в кэш (включая отрицательные ответы)
+    - negative_hits: попадания в кэш отрицательных ответов (NXDOMAIN, нет записей)
+    - misses: промахи кэша
+    - hit_ratio: доля попаданий
+    - coalesced: запросы, объединённые с уже выполняющимся запросом того же имени и типа
+    - queries: запросы к DNS-серверам
+    - errors: запросы, завершившиеся ошибкой (таймаут, SERVFAIL)
+    - inflight: выполняющихся запросов
+    """
+
+    size: int
+    maxsize: int
+    hits: int
+    negative_hits: int
+    misses: int
+    hit_ratio: float
+    coalesced: int
+    queries: int
+    errors: int
+    inflight: int
@@ -9,3 +9,27 @@ class OSInfo(BaseModel):
     """
 
     os: str
+
+
+class TcpFingerprintInfo(BaseModel):
+    """
+    Модель пассивного отпечатка TCP/IP-стека клиента (по пакету SYN).
+
+    - os: ОС по таблице сигнатур (None, если сигнатура неизвестна)
+    - ttl: наблюдаемый TTL
+    - initial_ttl: предполагаемый начальный TTL
+    - distance: число хопов до клиента (initial_ttl - ttl)
+    - window: размер окна TCP
+    - mss: максимальный размер сегмента (опция MSS)
+    - window_scale: масштаб окна (опция window scale)
+    - olayout: порядок опций TCP ("mss,nop,ws,...")
+    """
+
+    os: str | None = None
+    ttl: int
+    initial_ttl: int
+    distance: int
+    window: int
+    mss: int | None = None
+    window_scale: int | None = None
+    olayout: str
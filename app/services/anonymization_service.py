@@ -1,48 +1,132 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+
 import aiohttp
-import dns.asyncresolver
 
-from app.schemas.anonymization import AnonymizationInfo, TorInfo, VPNAndProxyInfo
+from app.core.config import settings
+from app.exceptions import UpstreamUnavailableError
+from app.schemas.anonymization import (
+    AnonymizationInfo,
+    TorExitPeriod,
+    TorHistoryQuery,
+    TorHistoryResult,
+    TorInfo,
+    VPNAndProxyInfo,
+)
 from app.services.ip_service import get_location_by_ip
+from app.services.security_service import reverse_ip
+from app.utils.cache import Cache
+from app.utils.dns_client import dns_client
+from app.utils.hosting_ranges import classify_ip
+from app.utils.http_client import http_pool
+from app.utils.rate_limit import TokenBucket
+from app.utils.request_context import request_memoize
+from app.utils.tor_consensus import EXIT_FLAG, flags_to_names, get_relay_index
+from app.utils.tor_exit_history import OPEN_END, get_exit_history
 from app.utils.tor_exit_nodes import load_exit_nodes
+from app.utils.upstream import get_upstream
 
-# Глобальный асинхронный резолвер (singleton)
-_resolver = dns.asyncresolver.Resolver()
+# Кэш вердиктов iphub и ограничитель частоты под лимит тарифа
+_vpn_cache = Cache(maxsize=settings.IPHUB_CACHE_SIZE)
+_iphub_limiter = TokenBucket(
+    rate=settings.IPHUB_REQUESTS_PER_DAY / 86400, capacity=settings.IPHUB_BURST
+)
+_iphub_throttled: Counter = Counter()
 
 
-async def detect_tor_usage(ip: str) -> TorInfo:
+async def _check_exit_list(ip: str) -> bool:
     """
-    Проверяет, является ли указанный IP-адрес выходным узлом Tor.
-
-    Использует два метода:
-      1. Сравнение IP с локально загруженным списком выходных узлов.
-      2. DNS-запрос к dnsel.torproject.org по IP.
+    Проверяет IP по локальному индексу выходных узлов Tor.
 
     Args:
         ip (str): Проверяемый IP-адрес.
 
     Returns:
-        TorInfo: Pydantic-модель с флагом is_tor, IP узла и страной выходного узла.
+        bool: True, если IP присутствует в списке exit-нод.
     """
-    # Проверяем по локальному списку
     try:
         exits = await load_exit_nodes()
-        is_member = ip in exits
+        return ip in exits
     except Exception as e:
         print(f"[Tor] Error in load_exit_nodes: {e}")
-        is_member = False
+        return False
 
-    # Проверяем через DNS-запрос (Tor Project)
-    parts = ip.split(".")[::-1]
-    query_name = ".".join(parts) + ".dnsel.torproject.org"
-    try:
-        answers = await _resolver.resolve(query_name, rdtype="A")
-        dns_flag = any(r.to_text() == "127.0.0.2" for r in answers)
-    except Exception:
+
+async def _check_dnsel(ip: str) -> bool:
+    """
+    Проверяет IP через DNS-запрос к dnsel.torproject.org (только IPv4).
+
+    Args:
+        ip (str): Проверяемый IP-адрес.
+
+    Returns:
+        bool: True, если сервис Tor Project подтвердил exit-ноду (127.0.0.2).
+    """
+    if len(ip.split(".")) != 4:
+        return False
+    query_name = reverse_ip(ip) + ".dnsel.torproject.org"
+    answers = await dns_client.query(query_name, "A")
+    return "127.0.0.2" in answers
+
+
+@request_memoize
+async def detect_tor_usage(ip: str, at: datetime | None = None) -> TorInfo:
+    """
+    Проверяет, является ли указанный IP-адрес выходным узлом Tor.
+
+    Использует два метода, которые выполняются параллельно:
+      1. Сравнение IP с локально загруженным индексом выходных узлов.
+      2. DNS-запрос к dnsel.torproject.org по IP.
+    Попадание в локальный список считается окончательным — DNS-запрос
+    в этом случае отменяется.
+
+    Дополнительно IP ищется в индексе релеев из локальных документов consensus:
+    так обнаруживаются guard/middle-релеи, а релей с флагом Exit
+    считается exit-нодой.
+
+    Если задан момент времени at, проверка выполняется по локальной истории
+    снапшотов списка exit-нод (без сетевых запросов к dnsel).
+
+    Args:
+        ip (str): Проверяемый IP-адрес.
+        at (datetime | None): Момент времени для исторической проверки.
+
+    Returns:
+        TorInfo: Pydantic-модель с флагом is_tor, IP узла и страной выходного узла.
+    """
+    if at is not None:
+        if not get_exit_history().was_exit(ip, at):
+            return TorInfo(is_tor=False, exit_node_ip=None, exit_location=None)
+        exit_location_info = await get_location_by_ip(ip)
+        return TorInfo(
+            is_tor=True,
+            exit_node_ip=ip,
+            exit_location=exit_location_info.country if exit_location_info else None,
+        )
+
+    relay_mask = get_relay_index().lookup(ip)
+    relay_flags = flags_to_names(relay_mask) if relay_mask is not None else None
+
+    list_task = asyncio.create_task(_check_exit_list(ip))
+    dns_task = asyncio.create_task(_check_dnsel(ip))
+
+    is_member = await list_task or bool(relay_mask and relay_mask & EXIT_FLAG)
+    if is_member:
+        dns_task.cancel()
         dns_flag = False
+    else:
+        dns_flag = await dns_task
 
-    # Если оба метода не сработали — считаем что это не Tor
+    # Если оба метода не сработали — считаем что это не Tor exit
     if not (is_member or dns_flag):
-        return TorInfo(is_tor=False, exit_node_ip=None, exit_location=None)
+        return TorInfo(
+            is_tor=False,
+            exit_node_ip=None,
+            exit_location=None,
+            is_relay=relay_mask is not None,
+            relay_flags=relay_flags,
+        )
 
     exit_location_info = await get_location_by_ip(ip)
 
@@ -50,13 +134,64 @@ async def detect_tor_usage(ip: str) -> TorInfo:
         is_tor=True,
         exit_node_ip=ip,
         exit_location=exit_location_info.country if exit_location_info else None,
+        is_relay=relay_mask is not None,
+        relay_flags=relay_flags,
     )
 
 
+def _from_timestamp(ts: int) -> datetime | None:
+    if ts == OPEN_END:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def check_tor_history(queries: list[TorHistoryQuery]) -> list[TorHistoryResult]:
+    """
+    Пакетно проверяет по локальной истории, были ли IP exit-нодами Tor
+    в указанные моменты (или диапазоны) времени.
+
+    Args:
+        queries (list[TorHistoryQuery]): Список запросов (ip, момент, конец диапазона).
+
+    Returns:
+        list[TorHistoryResult]: Результаты в том же порядке, с интервалами присутствия.
+    """
+    history = get_exit_history()
+    results = []
+    for query in queries:
+        until = query.until or query.timestamp
+        periods = history.periods(query.ip, query.timestamp, until)
+        results.append(
+            TorHistoryResult(
+                ip=query.ip,
+                timestamp=query.timestamp,
+                until=query.until,
+                was_exit=history.was_exit(query.ip, query.timestamp),
+                periods=[
+                    TorExitPeriod(
+                        start=_from_timestamp(start), end=_from_timestamp(end)
+                    )
+                    for start, end in periods
+                ],
+            )
+        )
+    return results
+
+
+@request_memoize
 async def detect_vpn_proxy_usage(ip: str) -> VPNAndProxyInfo:
     """
     Проверяет, используется ли для данного IP VPN или прокси, с помощью API iphub.
 
+    - Вердикты кэшируются по IP: «чистые» (block != 1) дольше, чем блокирующие.
+    - Запросы к iphub проходят через token bucket, настроенный под лимит тарифа:
+      при исчерпании лимита запрос недолго ждёт в очереди, иначе отбрасывается.
+    - Ответ 429 от iphub не повторяется и обнуляет запас токенов.
+    - Если запрос отброшен ограничителем или получил 429, возвращается
+      detected=None со status="throttled"; при недоступности iphub или
+      ошибке — detected=None со status="unavailable". Такие ответы
+      не кэшируются и не выдаются за «VPN не найден».
+
     Args:
         ip (str): IP-адрес для проверки.
 
@@ -64,45 +199,109 @@ async def detect_vpn_proxy_usage(ip: str) -> VPNAndProxyInfo:
         VPNAndProxyInfo: Pydantic-модель с признаком обнаружения
         и (при наличии) названием сервиса.
     """
+    cache_key = f"iphub:{ip}"
+    cached = _vpn_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if not await _iphub_limiter.acquire(max_wait=settings.IPHUB_MAX_QUEUE_WAIT):
+        return VPNAndProxyInfo(detected=None, status="throttled")
+
     url = f"http://v2.api.iphub.info/ip/{ip}"
     headers = {"X-Key": "MjgzNDA6aXRYOU4wMHBvN2lzc2lpTWZKRzJJV2wweXRqU1pwOEY="}
 
-    async with aiohttp.ClientSession() as client:
-        try:
-            response = await client.get(url, headers=headers)
+    async def fetch() -> dict | None:
+        client = await http_pool.get_session()
+        async with client.get(url, headers=headers) as response:
+            if response.status == 429:
+                # Квота исчерпана: повторять бессмысленно
+                _iphub_throttled["upstream_429"] += 1
+                _iphub_limiter.drain()
+                return None
             response.raise_for_status()
-            data = await response.json()
+            return await response.json()
 
-            # Если block == 1 — вероятен VPN/Proxy
-            if data.get("block") == 1:
-                return VPNAndProxyInfo(detected=True, service=data.get("isp"))
-            return VPNAndProxyInfo(detected=False, service=None)
-        except (aiohttp.ClientError, ValueError, KeyError):
-            return VPNAndProxyInfo(detected=False, service=None)
+    try:
+        data = await get_upstream("iphub").call(fetch)
+        if data is None:
+            return VPNAndProxyInfo(detected=None, status="throttled")
+
+        # Если block == 1 — вероятен VPN/Proxy
+        if data.get("block") == 1:
+            result = VPNAndProxyInfo(detected=True, service=data.get("isp"))
+            _vpn_cache.set(cache_key, result, ttl=settings.IPHUB_BLOCK_TTL)
+        else:
+            result = VPNAndProxyInfo(detected=False, service=None)
+            _vpn_cache.set(cache_key, result, ttl=settings.IPHUB_CLEAN_TTL)
+        return result
+    except (aiohttp.ClientError, UpstreamUnavailableError, ValueError, KeyError):
+        return VPNAndProxyInfo(detected=None, status="unavailable")
 
 
-async def get_anonymization_info(ip: str) -> AnonymizationInfo:
+def iphub_stats() -> dict:
+    """
+    Возвращает статистику кэша и ограничителя запросов к iphub.
+    """
+    return {
+        "cache_size": len(_vpn_cache),
+        "cache_hits": _vpn_cache.hits,
+        "cache_misses": _vpn_cache.misses,
+        "hit_ratio": _vpn_cache.hit_ratio,
+        "tokens": _iphub_limiter.tokens,
+        "requests_sent": _iphub_limiter.acquired,
+        "requests_queued": _iphub_limiter.queued,
+        "requests_shed": _iphub_limiter.shed,
+        "upstream_429": _iphub_throttled["upstream_429"],
+    }
+
+
+async def get_anonymization_info(
+    ip: str, at: datetime | None = None
+) -> AnonymizationInfo:
     """
     Собирает обобщённую информацию об анонимизации для IP:
-      - Используется ли VPN (и его название)
-      - Используется ли прокси (тип/провайдер — сейчас всегда None)
+      - Используется ли VPN/прокси и его провайдер: сначала по локальному
+        индексу хостинг/VPN/прокси-сетей, а для неклассифицированных
+        адресов — через API iphub
+      - Принадлежит ли IP сети хостинга (по локальному индексу)
       - Используется ли Tor и геолокация exit-узла
 
     Args:
         ip (str): IP-адрес для анализа.
+        at (datetime | None): Момент времени для исторической проверки Tor.
 
     Returns:
         AnonymizationInfo: Общая Pydantic-модель с данными по VPN, proxy, Tor.
     """
-    vpn_proxy_info = await detect_vpn_proxy_usage(ip)
-    tor_info = await detect_tor_usage(ip)
+    tor_info = await detect_tor_usage(ip, at=at)
+
+    network = classify_ip(ip)
+    if network is not None:
+        # hosting — только признак сети хостинга: ни VPN, ни прокси он не означает
+        is_vpn = network.category == "vpn"
+        is_proxy = network.category == "proxy"
+        is_hosting = network.category == "hosting"
+        return AnonymizationInfo(
+            vpn_detected=is_vpn,
+            vpn_provider=network.provider if is_vpn else None,
+            proxy_detected=is_proxy,
+            proxy_provider=network.provider if is_proxy else None,
+            hosting_detected=is_hosting,
+            hosting_provider=network.provider if is_hosting else None,
+            tor_detected=tor_info.is_tor,
+            tor_exit_location=tor_info.exit_location,
+            tor_relay_flags=tor_info.relay_flags,
+        )
 
+    vpn_proxy_info = await detect_vpn_proxy_usage(ip)
     return AnonymizationInfo(
         vpn_detected=vpn_proxy_info.detected,
         vpn_provider=vpn_proxy_info.service,
         proxy_detected=vpn_proxy_info.detected,
         proxy_type=None,
         proxy_provider=None,
+        vpn_check_status=vpn_proxy_info.status,
         tor_detected=tor_info.is_tor,
         tor_exit_location=tor_info.exit_location,
+        tor_relay_flags=tor_info.relay_flags,
     )
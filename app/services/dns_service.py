@@ -1,28 +1,143 @@
 import asyncio
+import json
 import logging
-import re
-import socket
-import uuid
-
-from dnslib import QTYPE, RR, A
-from dnslib.server import BaseResolver, DNSServer
+import secrets
+import time
+from typing import AsyncIterator, Iterable
 
 from app.core.config import settings
-from app.schemas.dns_info import DnsLeakResult, DnsLeakTest, FullResolve
+from app.schemas.dns_info import (
+    DnsLeakResult,
+    DnsLeakTest,
+    FullResolve,
+    FullResolvePage,
+)
 from app.utils.cache import Cache
-from app.utils.dns_client import DnsClient
-from app.utils.http_client import HttpClient
-
-_cache = Cache()
-_dns_leak_tests: dict[str, set[str]] = {}
+from app.utils.ct_index import get_ct_store, normalize_name, registrable_domain
+from app.utils.dns_client import dns_client
+from app.utils.dns_leak_registry import DnsLeakRegistry
+from app.utils.http_client import http_pool
+from app.utils.ip_index import ip_to_int
+from app.utils.json_stream import iter_json_array
+from app.utils.leak_dns_server import LeakDnsServer
+from app.utils.request_context import request_memoize
+from app.utils.upstream import get_upstream
+
+# Домены, отслеживаемые фоновым обновлением CT-индекса, в порядке последнего
+# запроса (в начале — дольше всех не запрашивавшиеся)
+_ct_tracked: dict[str, "_CtDomain"] = {}
+_ct_wakeup = asyncio.Event()
+
+# Сохранённые полные DNS-resolve: resolve_id -> _ResolveSession
+_resolve_sessions = Cache(maxsize=settings.FULL_RESOLVE_SESSIONS)
+_RECORD_TYPES = ["A", "AAAA", "CNAME", "MX", "NS"]
+# Число случайных имён, которыми проверяется каждая зона на wildcard
+WILDCARD_PROBES = 2
 
 logger = logging.getLogger(__name__)
 
 
+async def fetch_crtsh_names(domain: str) -> set[str]:
+    """
+    Загружает имена из сертификатов домена через публичный API crt.sh.
+    Ответ разбирается потоково: записи о сертификатах обрабатываются по мере
+    чтения тела, в памяти остаётся только множество уникальных имён
+    (многострочные name_value разбиваются на отдельные имена).
+
+    Args:
+        domain (str): Базовый домен.
+
+    Returns:
+        set[str]: Имена из сертификатов.
+    """
+    url = settings.CRTSH_API_URL.format(domain=domain)
+
+    async def fetch() -> set[str]:
+        names: set[str] = set()
+        session = await http_pool.get_session()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            chunks = response.content.iter_chunked(settings.CRTSH_CHUNK_SIZE)
+            async for entry in iter_json_array(chunks):
+                if isinstance(entry, dict) and "name_value" in entry:
+                    for raw in entry["name_value"].split("\n"):
+                        name = normalize_name(raw)
+                        if name is not None:
+                            names.add(name)
+        return names
+
+    return await get_upstream("crtsh").call(fetch)
+
+
+class _CtDomain:
+    """
+    Состояние отслеживаемого домена: время последнего запроса клиентом,
+    загружался ли он уже из crt.sh и когда загружать снова.
+    """
+
+    __slots__ = ("requested", "fetched", "next_fetch")
+
+    def __init__(self, requested: float):
+        self.requested = requested
+        self.fetched = False
+        self.next_fetch = 0.0
+
+
+def _track_ct_domain(domain: str) -> None:
+    """
+    Ставит регистрируемый домен имени на фоновое обновление из crt.sh
+    (при переполнении списка вытесняется дольше всех не запрашивавшийся).
+    """
+    name = normalize_name(domain)
+    if name is None:
+        return
+    try:
+        ip_to_int(name)
+        return
+    except ValueError:
+        pass
+    name = registrable_domain(name)
+    now = time.time()
+    state = _ct_tracked.pop(name, None)
+    if state is None:
+        while len(_ct_tracked) >= settings.CT_MAX_TRACKED:
+            del _ct_tracked[next(iter(_ct_tracked))]
+        state = _CtDomain(now)
+        _ct_wakeup.set()
+    state.requested = now
+    _ct_tracked[name] = state
+
+
+def _ct_due(now: float) -> list[str]:
+    """
+    Удаляет домены, не запрашивавшиеся дольше CT_REFRESH_SECONDS, и возвращает
+    домены к загрузке: сначала ещё ни разу не загружавшиеся (последние
+    запрошенные первыми), затем те, у которых подошло время обновления.
+    """
+    idle = [
+        domain
+        for domain, state in _ct_tracked.items()
+        if now - state.requested > settings.CT_REFRESH_SECONDS
+    ]
+    for domain in idle:
+        del _ct_tracked[domain]
+    new, refresh = [], []
+    for domain, state in reversed(_ct_tracked.items()):
+        if state.next_fetch <= now:
+            (refresh if state.fetched else new).append(domain)
+    return new + refresh
+
+
+@request_memoize
 async def enumerate_subdomains(domain: str) -> list[str]:
     """
-    Получает список поддоменов для указанного домена через публичный API crt.sh.
-    Результат кэшируется на 24 часа. Если сервис недоступен — возвращает пустой список.
+    Получает список поддоменов для указанного домена из локального CT-индекса
+    (дампы сертификатов на диске плюс журнал имён, найденных позже).
+
+    Запрос к индексу — один диапазонный поиск в отображённом в память файле;
+    crt.sh на пути запроса не используется: регистрируемый домен ставится
+    на фоновое обновление (run_ct_updater), и новые имена появятся в следующих
+    ответах.
 
     Args:
         domain (str): Базовый домен для поиска поддоменов.
@@ -30,169 +145,427 @@ async def enumerate_subdomains(domain: str) -> list[str]:
     Returns:
         list[str]: Отсортированный список обнаруженных поддоменов.
     """
-    cache_key = f"subs:{domain}"
-    cached = _cache.get(cache_key)
-    if cached is not None:
-        return cached  # type: ignore
+    domain = domain.lower().rstrip(".")
+    _track_ct_domain(domain)
+    return get_ct_store().subdomains(domain)
 
-    url = settings.CRTSH_API_URL.format(domain=domain)
+
+async def _update_ct_domain(domain: str) -> int:
+    store = get_ct_store()
     try:
-        async with HttpClient() as session:
-            response = await session.get(url)
-            data = await response.json()
+        added = await store.add(await fetch_crtsh_names(domain))
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
-        logger.error(f"Не удалось получить поддомены для {domain}: {e}")
-        return []
+        print(f"[CT] Не удалось получить поддомены для {domain}: {e}")
+        # Повтор не раньше следующей проверки, чтобы не долбить упавший crt.sh
+        if (state := _ct_tracked.get(domain)) is not None:
+            state.next_fetch = time.time() + settings.CT_UPDATE_INTERVAL
+        return 0
+    if (state := _ct_tracked.get(domain)) is not None:
+        state.fetched = True
+        state.next_fetch = time.time() + settings.CT_REFRESH_SECONDS
+    if added:
+        print(f"[CT] {domain}: добавлено имён {added}")
+    return added
+
+
+async def run_ct_updater(interval: float | None = None) -> None:
+    """
+    Фоновая задача: инкрементально пополняет CT-индекс из crt.sh.
 
-    subs = set()
-    for entry in data:
-        if "name_value" in entry:
-            name = entry["name_value"].lstrip("*.").lower()
-            subs.add(name)
+    Отслеживаются регистрируемые домены, запрошенные через enumerate_subdomains.
+    Новые домены загружаются в первую очередь, затем раз в CT_REFRESH_SECONDS
+    обновляются те, что запрашивались за последние CT_REFRESH_SECONDS;
+    остальные перестают отслеживаться. Загрузки идут пачками по
+    CT_FETCH_CONCURRENCY, и после каждой пачки очередь пересобирается, так что
+    новый домен не ждёт обновления всех остальных. В журнал попадают только
+    имена, которых ещё нет в индексе; разросшийся журнал сливается с индексом
+    в отдельном потоке. Ошибки логируются и не прерывают цикл.
 
-    result = sorted(subs)
-    _cache.set(cache_key, result, ttl=86400)
-    return result
+    Args:
+        interval (float | None): Период проверки отслеживаемых доменов
+            (по умолчанию settings.CT_UPDATE_INTERVAL).
+    """
+    interval = interval or settings.CT_UPDATE_INTERVAL
+    store = get_ct_store()
+    while True:
+        due = _ct_due(time.time())
+        if not due:
+            try:
+                await asyncio.wait_for(_ct_wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            _ct_wakeup.clear()
+            continue
+
+        batch = due[: settings.CT_FETCH_CONCURRENCY]
+        await asyncio.gather(*(_update_ct_domain(domain) for domain in batch))
+
+        if store.needs_compaction():
+            try:
+                index = await asyncio.to_thread(store.build_compacted)
+            except OSError as e:
+                print(f"[CT] Не удалось слить журнал с CT-индексом: {e}")
+            else:
+                store.install_compacted(index)
+                print(f"[CT] Журнал слит с CT-индексом: {store.index_size} имён")
+
+
+async def _query_all_types(name: str) -> dict[str, set[str]]:
+    answers = await asyncio.gather(
+        *(dns_client.query(name, rtype) for rtype in _RECORD_TYPES)
+    )
+    return {rtype: set(records) for rtype, records in zip(_RECORD_TYPES, answers)}
+
+
+async def detect_wildcards(zones: Iterable[str]) -> dict[str, dict[str, set[str]]]:
+    """
+    Определяет зоны с wildcard-записями: для каждой зоны запрашиваются все типы
+    _RECORD_TYPES для WILDCARD_PROBES случайных несуществующих имён; если
+    есть хоть одна запись, на них отвечает wildcard. Ответы проб объединяются,
+    так что wildcard с ротацией набора адресов распознаётся целиком.
+
+    Args:
+        zones (Iterable[str]): Зоны для проверки.
+
+    Returns:
+        dict[str, dict[str, set[str]]]: Зона -> {тип записи: записи wildcard}
+        (только для зон с wildcard).
+    """
+    zones = list(zones)
+    probes = [
+        (zone, f"{secrets.token_hex(10)}.{zone}")
+        for zone in zones
+        for _ in range(WILDCARD_PROBES)
+    ]
+    answers = await asyncio.gather(*(_query_all_types(name) for _, name in probes))
+    wildcards: dict[str, dict[str, set[str]]] = {}
+    for (zone, _), records in zip(probes, answers):
+        merged = wildcards.setdefault(zone, {rtype: set() for rtype in _RECORD_TYPES})
+        for rtype, values in records.items():
+            merged[rtype] |= values
+    return {
+        zone: records for zone, records in wildcards.items() if any(records.values())
+    }
+
+
+def _matches_wildcard(
+    records: dict[str, set[str]], wildcard: dict[str, set[str]]
+) -> bool:
+    """
+    Отвечает ли имя только wildcard-записью: по каждому типу записи имени
+    входят в записи wildcard, и типы с записями совпадают.
+    """
+    return all(
+        records[rtype] <= wildcard[rtype]
+        and bool(records[rtype]) == bool(wildcard[rtype])
+        for rtype in _RECORD_TYPES
+    )
+
+
+def _flatten_records(records: dict[str, set[str]]) -> list[str]:
+    return [record for rtype in _RECORD_TYPES for record in sorted(records[rtype])]
+
+
+class _ResolveSession:
+    """
+    Сохранённый на сервере полный DNS-resolve: список имён после схлопывания
+    wildcard и записи "*.зона". Записи остальных имён запрашиваются
+    постранично по мере чтения (ответы кэширует общий резолвер).
+    """
+
+    def __init__(
+        self,
+        resolve_id: str,
+        hosts: list[str],
+        wildcard_records: dict[str, list[str]],
+    ):
+        self.resolve_id = resolve_id
+        self.hosts = hosts
+        self.wildcard_records = wildcard_records
+
+    async def records(self, hosts: list[str]) -> dict[str, list[str]]:
+        """
+        Возвращает DNS-записи имён (A, AAAA, CNAME, MX, NS одновременно
+        через общий клиент; для "*.зона" — записи wildcard).
+        """
+        to_resolve = [host for host in hosts if host not in self.wildcard_records]
+        answers = await asyncio.gather(
+            *(
+                dns_client.query(host, rtype)
+                for host in to_resolve
+                for rtype in _RECORD_TYPES
+            )
+        )
+        resolved: dict[str, list[str]] = {}
+        for i, host in enumerate(to_resolve):
+            resolved[host] = [
+                record
+                for recs in answers[
+                    i * len(_RECORD_TYPES) : (i + 1) * len(_RECORD_TYPES)
+                ]
+                for record in recs
+            ]
+        return {
+            host: self.wildcard_records.get(host) or resolved.get(host, [])
+            for host in hosts
+        }
+
+
+def _get_resolve_session(resolve_id: str) -> _ResolveSession:
+    session = _resolve_sessions.get(resolve_id)
+    if session is None:
+        raise ValueError(f"Resolve ID {resolve_id} не найден")
+    return session
 
 
 async def full_dns_resolve(identifier: str) -> FullResolve:
     """
     Выполняет полный DNS-resolve для указанного IP-адреса или доменного имени:
-      1. Если identifier — это IPv4-адрес, делает обратный PTR-запрос (hostname).
+      1. Если identifier — это IP-адрес, делает асинхронный PTR-запрос (hostname).
       2. Получает поддомены для найденного домена
       (или самого IP, если PTR не определён).
-      3. Для всех имён (домен + поддомены) делает
-      DNS-запросы типов A, AAAA, CNAME, MX, NS.
-      4. Формирует Pydantic-модель FullResolve с результатами.
+      3. Проверяет все уровни зон поддоменов (до самого домена) на
+      wildcard-записи несколькими случайными именами. Имя в зоне с wildcard
+      схлопывается в запись "*.зона", только если ни один тип его записей
+      не отличается от ответа wildcard.
+      4. Сохраняет список имён на сервере (FULL_RESOLVE_TTL) и делает
+      DNS-запросы типов A, AAAA, CNAME, MX, NS только для первой страницы
+      (FULL_RESOLVE_PAGE_SIZE имён). Остальные страницы запрашиваются
+      по курсору (get_full_resolve_page) или потоком (iter_full_resolve).
+      5. Формирует Pydantic-модель FullResolve с результатами.
 
     Args:
         identifier (str): IP-адрес или доменное имя.
 
     Returns:
-        FullResolve: Pydantic-модель с полным списком поддоменов и всеми DNS-записями.
-    """
-    ip_pattern = r"^(?:\d{1,3}\.){3}\d{1,3}$"
-    if re.match(ip_pattern, identifier):
-        try:
-            ptr_result = await asyncio.to_thread(socket.gethostbyaddr, identifier)
-            domain = ptr_result[0]
-        except Exception:
-            domain = identifier
+        FullResolve: Сводка и первая страница имён с DNS-записями.
+    """
+    domain = identifier
+    try:
+        ip_to_int(identifier)
+    except ValueError:
+        pass
     else:
-        domain = identifier
+        domain = await dns_client.reverse(identifier) or identifier
 
     subdomains = await enumerate_subdomains(domain)
-    hosts = [domain] + subdomains
 
-    client = DnsClient()
-    full_records: dict[str, list[str]] = {}
+    # Родительская зона каждого поддомена внутри исследуемого домена
+    # и все уровни зон от неё до самого домена
+    base = domain.lower().rstrip(".")
+    parents: dict[str, str] = {}
+    zones: set[str] = set()
+    for host in subdomains:
+        if not host.endswith("." + base) or host.count(".") <= base.count("."):
+            continue
+        zone = parents[host] = host.split(".", 1)[1]
+        while zone not in zones:
+            zones.add(zone)
+            if zone == base:
+                break
+            zone = zone.split(".", 1)[1]
+    wildcards = await detect_wildcards(zones)
+
+    suspects = [host for host in subdomains if parents.get(host) in wildcards]
+    suspect_answers = await asyncio.gather(
+        *(_query_all_types(host) for host in suspects)
+    )
+    collapsed: dict[str, int] = {}
+    wildcard_only: set[str] = set()
+    for host, records in zip(suspects, suspect_answers):
+        zone = parents[host]
+        if _matches_wildcard(records, wildcards[zone]):
+            collapsed[zone] = collapsed.get(zone, 0) + 1
+            wildcard_only.add(host)
+    hosts = [domain] + [host for host in subdomains if host not in wildcard_only]
+    hosts += [f"*.{zone}" for zone in sorted(collapsed)]
+
+    session = _ResolveSession(
+        resolve_id=secrets.token_urlsafe(16),
+        hosts=hosts,
+        wildcard_records={
+            f"*.{zone}": _flatten_records(wildcards[zone]) for zone in collapsed
+        },
+    )
+    _resolve_sessions.set(session.resolve_id, session, settings.FULL_RESOLVE_TTL)
+
+    page = await get_full_resolve_page(session.resolve_id)
+    return FullResolve(
+        resolve_id=session.resolve_id,
+        total_hosts=len(hosts),
+        subdomains=page.subdomains,
+        full_records=page.full_records,
+        next_cursor=page.next_cursor,
+        wildcards={
+            f"*.{zone}": _flatten_records(records)
+            for zone, records in wildcards.items()
+        },
+        wildcard_collapsed={f"*.{zone}": count for zone, count in collapsed.items()},
+    )
+
 
-    async def resolve_one(host: str):
-        record_types = ["A", "AAAA", "CNAME", "MX", "NS"]
-        flat_list: list[str] = []
-        tasks = {rtype: client.query(host, rtype) for rtype in record_types}
-        for rtype, task in tasks.items():
-            recs = await task
-            flat_list.extend(recs)
-        full_records[host] = flat_list
+async def get_full_resolve_page(
+    resolve_id: str, cursor: int = 0, limit: int | None = None
+) -> FullResolvePage:
+    """
+    Возвращает страницу имён сохранённого полного DNS-resolve с их записями.
 
-    await asyncio.gather(*(resolve_one(h) for h in hosts))
-    return FullResolve(subdomains=hosts, full_records=full_records)
+    Args:
+        resolve_id (str): Идентификатор из FullResolve.
+        cursor (int): Позиция первого имени страницы.
+        limit (int | None): Число имён (по умолчанию FULL_RESOLVE_PAGE_SIZE).
 
+    Returns:
+        FullResolvePage: Имена страницы, их записи и курсор следующей страницы.
 
-class LeakTestResolver(BaseResolver):
+    Raises:
+        ValueError: Если resolve_id не найден или истёк.
     """
-    Класс-резолвер для DNS-leak теста.
-    Обслуживает запросы к сгенерированным тестовым поддоменам.
+    session = _get_resolve_session(resolve_id)
+    limit = limit or settings.FULL_RESOLVE_PAGE_SIZE
+    hosts = session.hosts[cursor : cursor + limit]
+    end = cursor + len(hosts)
+    return FullResolvePage(
+        resolve_id=resolve_id,
+        cursor=cursor,
+        next_cursor=end if end < len(session.hosts) else None,
+        subdomains=hosts,
+        full_records=await session.records(hosts),
+    )
+
+
+def iter_full_resolve(resolve_id: str) -> AsyncIterator[str]:
     """
+    Возвращает поток всех имён сохранённого полного DNS-resolve в формате
+    NDJSON: по строке {"host": ..., "records": [...]} на имя. Имена
+    запрашиваются страницами по FULL_RESOLVE_PAGE_SIZE, поэтому в памяти
+    держится только текущая страница.
 
-    def __init__(self, test_id: str):
-        self.test_id = test_id
+    Args:
+        resolve_id (str): Идентификатор из FullResolve.
 
-    def resolve(self, request, handler):
-        """
-        Обрабатывает входящий DNS-запрос,
-        отмечает факт запроса к одному из тестовых поддоменов.
-        Возвращает фиктивную A-запись с IP 127.0.0.1.
-        """
-        qname = str(request.q.qname).rstrip(".")
-        if self.test_id in _dns_leak_tests:
-            _dns_leak_tests[self.test_id].add(qname)  # фиксируем любой запрос
-
-        reply = request.reply()
-        reply.add_question(request.q)
-        reply.add_answer(
-            RR(
-                rname=request.q.qname,
-                rtype=QTYPE.A,
-                rclass=1,
-                ttl=60,
-                rdata=A("127.0.0.1"),
+    Returns:
+        AsyncIterator[str]: Строки NDJSON.
+
+    Raises:
+        ValueError: Если resolve_id не найден или истёк (до начала потока).
+    """
+    session = _get_resolve_session(resolve_id)
+
+    async def lines() -> AsyncIterator[str]:
+        size = settings.FULL_RESOLVE_PAGE_SIZE
+        for start in range(0, len(session.hosts), size):
+            page = session.hosts[start : start + size]
+            records = await session.records(page)
+            yield "".join(
+                json.dumps({"host": host, "records": records[host]}) + "\n"
+                for host in page
             )
-        )
-        return reply
+
+    return lines()
+
+
+# Активные DNS-leak тесты (с TTL и ограничением числа)
+_leak_registry = DnsLeakRegistry(
+    maxsize=settings.DNS_LEAK_MAX_TESTS, ttl=settings.DNS_LEAK_TEST_TTL
+)
+_leak_server: LeakDnsServer | None = None
+
+
+async def start_leak_dns_server() -> None:
+    """
+    Запускает авторитативный DNS-сервер зоны DNS_LEAK_ZONE на
+    DNS_LEAK_HOST:DNS_LEAK_PORT (UDP и TCP). Сервер работает всё время жизни
+    приложения и обслуживает все тесты сразу. Если порт недоступен,
+    DNS-leak тесты не будут видеть запросов, но приложение продолжит работу.
+    """
+    global _leak_server
+    if _leak_server is not None:
+        return
+    server = LeakDnsServer(
+        zone=settings.DNS_LEAK_ZONE,
+        handler=_leak_registry.record,
+        answer_ip=settings.DNS_LEAK_ANSWER_IP,
+        nameserver=settings.DNS_LEAK_NAMESERVER or None,
+    )
+    try:
+        await server.start(settings.DNS_LEAK_HOST, settings.DNS_LEAK_PORT)
+    except OSError as e:
+        logger.error(f"Не удалось запустить DNS сервер для DNS-leak теста: {e}")
+        return
+    _leak_server = server
+    print(f"[DNSLeak] DNS сервер запущен на порту {settings.DNS_LEAK_PORT}")
+
+
+async def stop_leak_dns_server() -> None:
+    """
+    Останавливает DNS-сервер DNS-leak теста.
+    """
+    global _leak_server
+    if _leak_server is not None:
+        await _leak_server.stop()
+        _leak_server = None
 
 
 def generate_dns_leak_test(
-    count: int = 3, base_domain: str = "example.com"
+    count: int = 3, base_domain: str | None = None
 ) -> DnsLeakTest:
     """
     Генерирует уникальный test_id и список случайных поддоменов для DNS-leak теста.
-    Сохраняет пары test_id: {domains} во внутреннем словаре.
+    Регистрирует тест в реестре, откуда его находит DNS-сервер теста.
 
     Args:
         count (int): Сколько поддоменов создать (по умолчанию 3).
-        base_domain (str): Базовый домен для генерации поддоменов.
+        base_domain (str | None): Базовый домен для генерации поддоменов
+            (по умолчанию DNS_LEAK_ZONE).
 
     Returns:
         DnsLeakTest: Pydantic-модель с test_id и списком доменов.
     """
-    test_id = str(uuid.uuid4())
-    domains = [f"{uuid.uuid4().hex[:8]}.{base_domain}" for _ in range(count)]
-    _dns_leak_tests[test_id] = set(domains)
-    return DnsLeakTest(test_id=test_id, domains=domains)
+    base_domain = (base_domain or settings.DNS_LEAK_ZONE).lower().strip(".")
+    labels: list[str] = []
+    while len(labels) < count:
+        label = secrets.token_hex(8)
+        if not _leak_registry.has_label(label) and label not in labels:
+            labels.append(label)
+    test = _leak_registry.create(labels, base_domain)
+    return DnsLeakTest(test_id=test.test_id, domains=test.domains)
 
 
-async def analyze_dns_leak(test_id: str, wait_time: int = 2) -> DnsLeakResult:
+async def analyze_dns_leak(test_id: str, wait_time: float = 0) -> DnsLeakResult:
     """
     Анализирует, были ли резолвлены клиентом все сгенерированные тестовые поддомены
     (проверка на DNS-leak).
-    Ожидает, пока все поддомены не запросятся, либо не истечёт таймаут.
-    """
-    if test_id not in _dns_leak_tests:
-        raise ValueError(f"Test ID {test_id} не найден")
 
-    resolver = LeakTestResolver(test_id)
-    try:
-        server = DNSServer(resolver, port=55353, address="0.0.0.0", tcp=False)
-        server.start_thread()
-    except Exception as e:
-        logger.error(f"Не удалось запустить временный DNS сервер: {e}")
-        raise RuntimeError("DNS leak test server start failed")
+    Если wait_time > 0, работает как long-poll: ждёт события теста и отвечает
+    сразу, как только запрошены все имена, либо по истечении wait_time.
 
-    expected = _dns_leak_tests[test_id].copy()
-    seen = set()
-    t0 = asyncio.get_event_loop().time()
-    timeout = wait_time
+    Args:
+        test_id (str): ID теста.
+        wait_time (float): Максимальное ожидание запросов (сек).
 
-    while True:
-        seen = _dns_leak_tests[test_id]
-        if expected <= seen:
-            break
-        if asyncio.get_event_loop().time() - t0 > timeout:
-            break
-        await asyncio.sleep(0.05)
+    Returns:
+        DnsLeakResult: Результаты теста.
+
+    Raises:
+        ValueError: Если тест не найден или истёк.
+    """
+    test = _leak_registry.get(test_id)
+    if test is None:
+        raise ValueError(f"Test ID {test_id} не найден")
 
-    server.stop()
-    missing = expected - seen
-    leak_detected = len(missing) > 0
+    await test.wait(wait_time)
 
+    missing = test.expected - test.seen
     result = DnsLeakResult(
         test_id=test_id,
-        expected=sorted(expected),
-        seen=sorted(seen),
+        expected=sorted(test.expected),
+        seen=sorted(test.seen),
         missing=sorted(missing),
-        leak_detected=leak_detected,
+        leak_detected=len(missing) > 0,
+        resolvers=sorted(test.resolvers),
     )
-    del _dns_leak_tests[test_id]
+    _leak_registry.remove(test)
     return result
@@ -1,19 +1,100 @@
 import asyncio
+from ipaddress import ip_address
 
-import aiohttp
-from ipwhois import IPWhois, WhoisLookupError
+import dns.reversename
 
+from app.core.config import settings
 from app.exceptions import DataUnavailableError
-from app.schemas.ip_info import LocationInfo, NetInfo, WhoisInfo
+from app.schemas.ip_info import LocationInfo, WhoisInfo
+from app.utils.cymru_bulk import iter_bulk_asn
+from app.utils.dns_client import dns_client
+from app.utils.geo_db import get_geo_db
+from app.utils.http_client import http_pool
+from app.utils.ip_index import ip_to_int
+from app.utils.prefix_cache import PrefixCache
+from app.utils.prefix_trie import ADDRESS_BITS, parse_cidr, prefix_mask
+from app.utils.rdap_client import lookup_networks
+from app.utils.request_context import request_memoize
+from app.utils.upstream import get_upstream
+
+# Кэши по сетям: ответ для одного адреса переиспользуется для всей его сети
+_whois_cache = PrefixCache(maxsize=settings.WHOIS_CACHE_SIZE)
+_geo_cache = PrefixCache(maxsize=settings.GEO_CACHE_SIZE)
+
+
+def _whois_network(info: WhoisInfo) -> tuple[int, int, int] | None:
+    """
+    Выбирает самую специфичную сеть из ответа WHOIS (анонсируемый префикс
+    ASN или CIDR подсетей), содержащую запрошенный IP.
+
+    Returns:
+        tuple[int, int, int] | None: Версия, адрес сети и длина префикса.
+    """
+    version, address = ip_to_int(info.ip)
+    cidrs = [info.asn_cidr] + [net.cidr for net in info.nets]
+    best = None
+    for cidr in filter(None, cidrs):
+        for item in cidr.split(","):
+            try:
+                net_version, network, length = parse_cidr(item)
+            except ValueError:
+                continue
+            width = ADDRESS_BITS[version]
+            if (
+                net_version == version
+                and address & prefix_mask(length, width) == network
+                and (best is None or length > best[2])
+            ):
+                best = (version, network, length)
+    return best
+
+
+async def _lookup_origin_asn(ip: str) -> dict:
+    """
+    Определяет ASN, объявляющую IP, через DNS-сервис Team Cymru
+    (TXT-запись вида "15169 | 8.8.8.0/24 | US | arin | 2023-12-28").
 
+    Args:
+        ip (str): IP-адрес.
 
+    Returns:
+        dict: Поля asn, asn_cidr, asn_country_code, asn_registry, asn_date
+        (пустой словарь, если данных нет).
+    """
+    reverse = dns.reversename.from_address(ip)
+    if ip_address(ip).version == 4:
+        zone = "origin.asn.cymru.com"
+        labels = reverse.labels[:4]
+    else:
+        zone = "origin6.asn.cymru.com"
+        labels = reverse.labels[:32]
+    name = ".".join(label.decode() for label in labels) + "." + zone
+    for record in await dns_client.query(name, "TXT"):
+        fields = [f.strip() for f in record.replace('" "', "").strip('"').split("|")]
+        if len(fields) >= 5:
+            return {
+                "asn": fields[0].split()[0] or None,
+                "asn_cidr": fields[1] or None,
+                "asn_country_code": fields[2] or None,
+                "asn_registry": fields[3] or None,
+                "asn_date": fields[4] or None,
+            }
+    return {}
+
+
+@request_memoize
 async def get_whois_info(ip: str) -> WhoisInfo:
     """
     Получает информацию WHOIS для заданного IP-адреса.
 
-    Выполняет асинхронный запрос к локальной базе whois с помощью ipwhois
-    и возвращает основную информацию, включая данные о сети (CIDR, название,
-    описание, страна и т.д.), а также ASN, страну, дату и реестр.
+    Данные о сетях запрашиваются асинхронно по протоколу RDAP (сервер
+    выбирается по bootstrap-реестру IANA, с переходом по ссылкам на более
+    точные реестры), а ASN — через DNS-сервис Team Cymru. Оба запроса
+    выполняются параллельно и не занимают потоки пула.
+
+    Ответ кэшируется на WHOIS_CACHE_TTL для самой специфичной сети из него,
+    поэтому запросы для соседних адресов той же сети не уходят во внешние
+    сервисы.
 
     Args:
         ip (str): IP-адрес для поиска информации WHOIS.
@@ -24,64 +105,108 @@ async def get_whois_info(ip: str) -> WhoisInfo:
     Raises:
         DataUnavailableError: Если не удалось получить данные о WHOIS.
     """
-    loop = asyncio.get_event_loop()
+    try:
+        ip_address(ip)
+    except ValueError:
+        raise DataUnavailableError(f"WHOIS lookup failed: invalid IP {ip!r}")
+
+    cached = _whois_cache.get(ip)
+    if cached is not None:
+        return cached.model_copy(update={"ip": ip})
+
+    nets, asn_info = await asyncio.gather(lookup_networks(ip), _lookup_origin_asn(ip))
+    info = WhoisInfo(ip=ip, nets=nets, **asn_info)
+    network = _whois_network(info)
+    if network is not None:
+        _whois_cache.set_network(*network, info, ttl=settings.WHOIS_CACHE_TTL)
+    return info
 
-    def lookup():
-        # Инициализация объекта IPWhois и выполнение поиска
-        obj = IPWhois(ip)
+
+async def get_bulk_asn_info(ips: list[str]) -> list[WhoisInfo]:
+    """
+    Пакетно определяет ASN для списка IP одной bulk whois-сессией
+    (протокол Team Cymru) вместо отдельного WHOIS-запроса на каждый адрес.
+
+    Заполняются только поля ASN (nets пустой); для адресов без анонса
+    или некорректных поля ASN остаются пустыми.
+
+    Args:
+        ips (list[str]): IP-адреса.
+
+    Returns:
+        list[WhoisInfo]: Результаты в порядке запроса.
+
+    Raises:
+        DataUnavailableError: Если bulk whois недоступен.
+    """
+    found: dict[tuple[int, int], dict] = {}
+    async for record in iter_bulk_asn(ips):
         try:
-            return obj.lookup_whois()
-        except WhoisLookupError as e:
-            # Ошибка поиска whois — выбрасываем кастомное исключение
-            raise DataUnavailableError(f"WHOIS lookup failed: {e}")
-        except Exception as e:
-            # Любая другая ошибка — также в кастомное исключение
-            raise DataUnavailableError(f"Unknown WHOIS error: {e}")
+            found[ip_to_int(record.pop("ip"))] = record
+        except ValueError:
+            continue
 
-    try:
-        result = await loop.run_in_executor(None, lookup)
-    except DataUnavailableError:
-        # Пробрасываем дальше (обрабатывается выше по стеку)
-        raise
-    except Exception as e:
-        # Неизвестная ошибка на уровне event loop
-        raise DataUnavailableError(f"WHOIS unexpected error: {e}")
-
-    nets = []
-    for net in result.get("nets", []):
-        # Формируем список сетей на основе результата whois
-        nets.append(
-            NetInfo(
-                cidr=net.get("cidr"),
-                name=net.get("name"),
-                description=net.get("description"),
-                country=net.get("country"),
-                city=net.get("city"),
-                address=net.get("address"),
-                postal_code=net.get("postal_code"),
-                state=net.get("state"),
-                abuse_emails=net.get("abuse_emails"),
-                tech_emails=net.get("tech_emails"),
-                created=net.get("created"),
-                updated=net.get("updated"),
-            )
-        )
-    return WhoisInfo(
-        ip=ip,
-        asn=result.get("asn"),
-        asn_cidr=result.get("asn_cidr"),
-        asn_country_code=result.get("asn_country_code"),
-        asn_date=result.get("asn_date"),
-        asn_registry=result.get("asn_registry"),
-        nets=nets,
-    )
+    results = []
+    for ip in ips:
+        try:
+            record = found.get(ip_to_int(ip.strip()), {})
+        except ValueError:
+            record = {}
+        results.append(WhoisInfo(ip=ip, nets=[], **record))
+    return results
 
 
+@request_memoize
 async def get_location_by_ip(ip_address: str) -> LocationInfo | None:
     """
     Определяет геолокацию и провайдера по IP-адресу.
 
-    Выполняет запрос к публичному API ipinfo.io и возвращает данные о городе, регионе,
+    Сначала ищет адрес в локальной базе геолокации (mmap, без сетевых
+    запросов). Если адреса в базе нет и включён GEO_IPINFO_FALLBACK,
+    обращается к публичному API ipinfo.io; ответы кэшируются для всей сети
+    с префиксом GEO_CACHE_PREFIX_V4 / GEO_CACHE_PREFIX_V6.
+
+    Args:
+        ip_address (str): IP-адрес для определения местоположения.
+
+    Returns:
+        LocationInfo | None: Pydantic-модель с локацией,
+        либо None, если определить не удалось.
+    """
+    db = get_geo_db()
+    if db is not None:
+        location = db.lookup(ip_address)
+        if location is not None:
+            return location
+    if not settings.GEO_IPINFO_FALLBACK:
+        return None
+
+    cached = _geo_cache.get(ip_address)
+    if cached is not None:
+        return cached.model_copy(update={"ip": ip_address})
+    location = await _get_location_from_ipinfo(ip_address)
+    if location is not None:
+        _geo_cache.set_for_ip(
+            ip_address,
+            settings.GEO_CACHE_PREFIX_V4,
+            settings.GEO_CACHE_PREFIX_V6,
+            location,
+            ttl=settings.GEO_CACHE_TTL,
+        )
+    return location
+
+
+def ip_cache_stats() -> dict:
+    """
+    Возвращает статистику сетевых кэшей WHOIS и геолокации.
+    """
+    return {"whois": _whois_cache.stats(), "geo": _geo_cache.stats()}
+
+
+async def _get_location_from_ipinfo(ip_address: str) -> LocationInfo | None:
+    """
+    Запрашивает геолокацию у ipinfo.io (с дедлайном, повторами
+    и circuit breaker) и возвращает данные о городе, регионе,
     стране, координатах, провайдере, индексе и временной зоне.
 
     Args:
@@ -93,33 +218,37 @@ async def get_location_by_ip(ip_address: str) -> LocationInfo | None:
     """
     url = f"https://ipinfo.io/{ip_address}/json"
 
+    async def fetch() -> dict:
+        session = await http_pool.get_session()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return await response.json()
+
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                data = await response.json()
-
-                # Обработка координат в формате "lat,lon"
-                latitude = longitude = None
-                if loc := data.get("loc"):
-                    try:
-                        lat_str, lon_str = loc.split(",")
-                        latitude = float(lat_str)
-                        longitude = float(lon_str)
-                    except (ValueError, TypeError):
-                        # Если координаты некорректные — оставляем None
-                        pass
-
-                return LocationInfo(
-                    ip=data.get("ip"),
-                    city=data.get("city"),
-                    region=data.get("region"),
-                    country=data.get("country"),
-                    provider=data.get("org"),
-                    latitude=latitude,
-                    longitude=longitude,
-                    postal_index=data.get("postal"),
-                    timezone=data.get("timezone"),
-                )
+        data = await get_upstream("ipinfo").call(fetch)
+
+        # Обработка координат в формате "lat,lon"
+        latitude = longitude = None
+        if loc := data.get("loc"):
+            try:
+                lat_str, lon_str = loc.split(",")
+                latitude = float(lat_str)
+                longitude = float(lon_str)
+            except (ValueError, TypeError):
+                # Если координаты некорректные — оставляем None
+                pass
+
+        return LocationInfo(
+            ip=data.get("ip"),
+            city=data.get("city"),
+            region=data.get("region"),
+            country=data.get("country"),
+            provider=data.get("org"),
+            latitude=latitude,
+            longitude=longitude,
+            postal_index=data.get("postal"),
+            timezone=data.get("timezone"),
+        )
 
     except Exception:
         # В случае любой ошибки — возвращаем None (местоположение не определено)
@@ -1,5 +1,6 @@
 import re
 from collections import defaultdict
+from functools import lru_cache
 
 from app.schemas.os_info import OSInfo
 
@@ -61,7 +62,50 @@ HEADER_ANALYSIS_RULES = {
 ANALYSIS_WEIGHTS = {"user_agent": 1.0, "other_headers": 0.7, "header_combinations": 0.5}
 
 
-async def analyze_user_agent(user_agent: str) -> dict[str, float]:
+def _compile_rules(
+    rules: list[tuple[str, tuple[str, float]]],
+) -> list[tuple[re.Pattern, str, float]]:
+    """
+    Компилирует шаблоны один раз при импорте (без учёта регистра).
+
+    Правила проверяются отдельными шаблонами: у каждого re ищет литеральный
+    префикс в C, и это быстрее одного объединённого выражения — альтернация
+    к тому же теряет перекрывающиеся совпадения (benchmarks/os_rules.py).
+    """
+    return [
+        (re.compile(pattern, re.IGNORECASE), os, weight)
+        for pattern, (os, weight) in rules
+    ]
+
+
+_UA_RULES = _compile_rules(
+    [
+        (pattern, (os, weight))
+        for os, patterns in USER_AGENT_PATTERNS.items()
+        for pattern, weight in patterns
+    ]
+)
+_HEADER_RULES = {
+    header_name: _compile_rules(rules)
+    for header_name, rules in HEADER_ANALYSIS_RULES.items()
+}
+
+
+def _match_rules(
+    rules: list[tuple[re.Pattern, str, float]], value: str, factor: float
+) -> dict[str, float]:
+    scores = defaultdict(float)
+    for regex, os, weight in rules:
+        if regex.search(value):
+            scores[os] += weight * factor
+    return scores
+
+
+def _normalize_headers(headers: dict[str, str]) -> dict[str, str]:
+    return {name.lower(): value for name, value in headers.items()}
+
+
+def analyze_user_agent(user_agent: str) -> dict[str, float]:
     """
     Анализирует строку User-Agent для определения операционной системы или платформы.
 
@@ -71,50 +115,44 @@ async def analyze_user_agent(user_agent: str) -> dict[str, float]:
     Returns:
         dict[str, float]: Словарь {ОС/платформа: баллы}
     """
-    scores = defaultdict(float)
     if not user_agent:
-        return scores
-
-    user_agent = user_agent.lower()
-    for os, patterns in USER_AGENT_PATTERNS.items():
-        for pattern, weight in patterns:
-            if re.search(pattern, user_agent, re.IGNORECASE):
-                scores[os] += weight * ANALYSIS_WEIGHTS["user_agent"]
-    return scores
+        return defaultdict(float)
+    return _match_rules(_UA_RULES, user_agent, ANALYSIS_WEIGHTS["user_agent"])
 
 
-async def analyze_other_headers(headers: dict[str, str]) -> dict[str, float]:
+def analyze_other_headers(headers: dict[str, str]) -> dict[str, float]:
     """
     Анализирует дополнительные HTTP-заголовки для определения платформы.
 
     Args:
-        headers (dict[str, str]): Словарь HTTP-заголовков.
+        headers (dict[str, str]): Словарь HTTP-заголовков (имена в нижнем регистре).
 
     Returns:
         dict[str, float]: Словарь {ОС/платформа: баллы}
     """
     scores = defaultdict(float)
-    for header_name, rules in HEADER_ANALYSIS_RULES.items():
+    for header_name, rules in _HEADER_RULES.items():
         if header_name in headers:
-            header_value = headers[header_name].lower()
-            for pattern, (os, weight) in rules:
-                if re.search(pattern, header_value, re.IGNORECASE):
-                    scores[os] += weight * ANALYSIS_WEIGHTS["other_headers"]
+            header_scores = _match_rules(
+                rules, headers[header_name], ANALYSIS_WEIGHTS["other_headers"]
+            )
+            for os, score in header_scores.items():
+                scores[os] += score
     return scores
 
 
-async def analyze_header_combinations(headers: dict[str, str]) -> dict[str, float]:
+def analyze_header_combinations(headers: dict[str, str]) -> dict[str, float]:
     """
     Анализирует комбинации заголовков для более точного определения ОС и браузера.
 
     Args:
-        headers (dict[str, str]): Словарь HTTP-заголовков.
+        headers (dict[str, str]): Словарь HTTP-заголовков (имена в нижнем регистре).
 
     Returns:
         dict[str, float]: Словарь {комбинация: баллы}
     """
     scores = defaultdict(float)
-    user_agent = headers.get("User-Agent", "").lower()
+    user_agent = headers.get("user-agent", "").lower()
 
     if "trident" in user_agent and "windows" in user_agent:
         scores["Windows (Internet Explorer)"] += (
@@ -130,7 +168,7 @@ async def analyze_header_combinations(headers: dict[str, str]) -> dict[str, floa
     return scores
 
 
-async def analyze_http_headers(headers: dict[str, str]) -> dict[str, float]:
+def analyze_http_headers(headers: dict[str, str]) -> dict[str, float]:
     """
     Проводит полный анализ HTTP-заголовков для оценки операционной системы и устройства.
 
@@ -140,24 +178,42 @@ async def analyze_http_headers(headers: dict[str, str]) -> dict[str, float]:
     Returns:
         dict[str, float]: Словарь {ОС/платформа: баллы}
     """
+    headers = _normalize_headers(headers)
     scores = defaultdict(float)
 
-    user_agent_scores = await analyze_user_agent(headers.get("User-Agent", ""))
+    user_agent_scores = analyze_user_agent(headers.get("user-agent", ""))
     for os, score in user_agent_scores.items():
         scores[os] += score
 
-    other_headers_scores = await analyze_other_headers(headers)
+    other_headers_scores = analyze_other_headers(headers)
     for os, score in other_headers_scores.items():
         scores[os] += score
 
-    combination_scores = await analyze_header_combinations(headers)
+    combination_scores = analyze_header_combinations(headers)
     for os, score in combination_scores.items():
         scores[os] += score
 
     return scores
 
 
-async def get_os_results(headers: dict[str, str]) -> OSInfo:
+@lru_cache(maxsize=4096)
+def _classify(user_agent: str, platform: str | None) -> str:
+    """
+    Определяет самую вероятную ОС по заголовкам, влияющим на результат.
+    Результат кэшируется: у большинства клиентов одни и те же User-Agent.
+    """
+    headers = {"user-agent": user_agent}
+    if platform is not None:
+        headers["sec-ch-ua-platform"] = platform
+    scores = analyze_http_headers(headers)
+    return (
+        sorted(scores.items(), key=lambda x: x[1], reverse=True)[0][0]
+        if scores
+        else "Unknown"
+    )
+
+
+def get_os_results(headers: dict[str, str]) -> OSInfo:
     """
     Возвращает наиболее вероятную ОС по итогам анализа HTTP-заголовков.
 
@@ -167,10 +223,7 @@ async def get_os_results(headers: dict[str, str]) -> OSInfo:
     Returns:
         OSInfo: Pydantic-модель с полем os — самой вероятной ОС.
     """
-    scores = await analyze_http_headers(headers)
-    top_os = (
-        sorted(scores.items(), key=lambda x: x[1], reverse=True)[0][0]
-        if scores
-        else "Unknown"
+    headers = _normalize_headers(headers)
+    return OSInfo(
+        os=_classify(headers.get("user-agent", ""), headers.get("sec-ch-ua-platform"))
     )
-    return OSInfo(os=top_os)
@@ -0,0 +1,213 @@
+import asyncio
+import re
+from collections import Counter
+from ipaddress import ip_address, ip_network
+
+from app.core.config import settings
+from app.schemas.dns_info import PtrCluster, PtrNeighbourhood
+from app.utils.cache import Cache
+from app.utils.dns_client import dns_client
+from app.utils.rate_limit import TokenBucket
+
+_DIGITS = re.compile(r"\d+")
+_TOKEN_SPLIT = re.compile(r"[^a-z]+")
+
+# Ключевые слова в PTR-именах, характерные для хостинга/VPN и для абонентских пулов
+HOSTING_KEYWORDS = frozenset(
+    {
+        "cloud",
+        "colo",
+        "compute",
+        "datacenter",
+        "dc",
+        "dedi",
+        "dedicated",
+        "host",
+        "hosted",
+        "hosting",
+        "node",
+        "server",
+        "srv",
+        "vds",
+        "vm",
+        "vpn",
+        "vps",
+    }
+)
+RESIDENTIAL_KEYWORDS = frozenset(
+    {
+        "adsl",
+        "bb",
+        "broadband",
+        "cable",
+        "client",
+        "cust",
+        "customer",
+        "dhcp",
+        "dial",
+        "dialup",
+        "dsl",
+        "dyn",
+        "dynamic",
+        "ftth",
+        "home",
+        "mobile",
+        "pool",
+        "ppp",
+        "pppoe",
+        "res",
+        "user",
+        "xdsl",
+    }
+)
+
+# Готовые сводки по сетям и ограничитель частоты PTR-запросов
+_sweep_cache = Cache(maxsize=settings.PTR_SWEEP_CACHE_SIZE)
+_sweep_limiter = TokenBucket(
+    rate=settings.PTR_SWEEP_RATE, capacity=settings.PTR_SWEEP_BURST
+)
+_pending: dict[str, asyncio.Future] = {}
+
+
+def ptr_pattern(name: str) -> str:
+    """
+    Сводит PTR-имя к шаблону: последовательности цифр заменяются на "#"
+    ("host-1-2-3-4.isp.net" -> "host-#-#-#-#.isp.net").
+    """
+    return _DIGITS.sub("#", name.lower())
+
+
+def _keywords(name: str, vocabulary: frozenset[str]) -> set[str]:
+    # Метки зоны (последние две) не учитываются: "vps" в имени провайдера
+    # не говорит о назначении конкретного адреса
+    labels = name.lower().split(".")[:-2]
+    return {
+        token
+        for label in labels
+        for token in _TOKEN_SPLIT.split(label)
+        if token in vocabulary
+    }
+
+
+def summarize_ptr_names(network: str, names: dict[str, str | None]) -> PtrNeighbourhood:
+    """
+    Строит сводку по PTR-именам сети: кластеры шаблонов имён и частоту
+    ключевых слов хостинга и абонентских пулов.
+
+    Args:
+        network (str): Сеть в нотации CIDR.
+        names (dict[str, str | None]): IP -> PTR-имя (None, если записи нет).
+
+    Returns:
+        PtrNeighbourhood: Сводка по сети.
+    """
+    resolved = [name for name in names.values() if name]
+    patterns: dict[str, list[str]] = {}
+    hosting: Counter = Counter()
+    residential: Counter = Counter()
+    hosting_names = residential_names = 0
+    for name in resolved:
+        patterns.setdefault(ptr_pattern(name), []).append(name)
+        found = _keywords(name, HOSTING_KEYWORDS)
+        hosting.update(found)
+        hosting_names += bool(found)
+        found = _keywords(name, RESIDENTIAL_KEYWORDS)
+        residential.update(found)
+        residential_names += bool(found)
+
+    clusters = [
+        PtrCluster(pattern=pattern, count=len(members), examples=sorted(members)[:3])
+        for pattern, members in sorted(
+            patterns.items(), key=lambda item: (-len(item[1]), item[0])
+        )[: settings.PTR_SWEEP_MAX_CLUSTERS]
+    ]
+
+    if not resolved:
+        verdict = "unknown"
+    elif hosting_names * 2 >= len(resolved) and hosting_names > residential_names:
+        verdict = "hosting"
+    elif residential_names * 2 >= len(resolved):
+        verdict = "residential"
+    else:
+        verdict = "mixed"
+
+    return PtrNeighbourhood(
+        network=network,
+        scanned=len(names),
+        resolved=len(resolved),
+        clusters=clusters,
+        hosting_keywords=dict(hosting.most_common()),
+        residential_keywords=dict(residential.most_common()),
+        verdict=verdict,
+    )
+
+
+async def _sweep(network: str, addresses: list[str]) -> PtrNeighbourhood:
+    async def resolve(address: str) -> str | None:
+        if not await _sweep_limiter.acquire(max_wait=settings.PTR_SWEEP_TIMEOUT):
+            return None
+        return await dns_client.reverse(address)
+
+    tasks = {address: asyncio.ensure_future(resolve(address)) for address in addresses}
+    done, pending = await asyncio.wait(
+        tasks.values(), timeout=settings.PTR_SWEEP_TIMEOUT
+    )
+    # Незавершённые PTR-запросы продолжаются в общем резолвере и попадут
+    # в его кэш, так что повторная сводка по сети будет полной
+    for task in pending:
+        task.cancel()
+    names = {
+        address: task.result() if task in done and not task.exception() else None
+        for address, task in tasks.items()
+    }
+    summary = summarize_ptr_names(network, names)
+    summary.complete = not pending
+    if summary.complete:
+        _sweep_cache.set(network, summary, settings.PTR_SWEEP_TTL)
+    return summary
+
+
+async def get_ptr_neighbourhood(ip: str, prefix: int | None = None) -> PtrNeighbourhood:
+    """
+    Выполняет обратное (PTR) разрешение всех адресов сети клиента
+    (по умолчанию /24 для IPv4 и /120 для IPv6) и строит сводку:
+    кластеры шаблонов имён и ключевые слова хостинга/абонентских пулов.
+
+    Запросы идут параллельно через общий кэширующий резолвер с ограничением
+    частоты; сводка кэшируется по сети на PTR_SWEEP_TTL, одновременные
+    запросы для одной сети объединяются.
+
+    Args:
+        ip (str): IP-адрес клиента.
+        prefix (int | None): Длина префикса сети.
+
+    Returns:
+        PtrNeighbourhood: Сводка по PTR-именам соседних адресов.
+
+    Raises:
+        ValueError: Если IP некорректен или сеть больше PTR_SWEEP_MAX_ADDRESSES.
+    """
+    address = ip_address(ip)
+    if prefix is None:
+        prefix = (
+            settings.PTR_SWEEP_PREFIX_V4
+            if address.version == 4
+            else settings.PTR_SWEEP_PREFIX_V6
+        )
+    network = ip_network(f"{address}/{prefix}", strict=False)
+    if network.num_addresses > settings.PTR_SWEEP_MAX_ADDRESSES:
+        raise ValueError(
+            f"Сеть {network} больше {settings.PTR_SWEEP_MAX_ADDRESSES} адресов"
+        )
+    key = str(network)
+
+    cached = _sweep_cache.get(key)
+    if cached is not None:
+        return cached
+
+    future = _pending.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_sweep(key, [str(host) for host in network]))
+        _pending[key] = future
+        future.add_done_callback(lambda _: _pending.pop(key, None))
+    return await asyncio.shield(future)
@@ -1,7 +1,10 @@
 import asyncio
-import socket
+from functools import lru_cache
+
+import dns.exception
 
 from app.schemas.security import DNSBLEntry, SecurityInfoResponse
+from app.utils.dns_client import dns_client
 
 DNSBL_SERVERS = [
     "bl.spamcop.net",
@@ -65,9 +68,11 @@ DNSBL_SERVERS = [
 ]
 
 
+@lru_cache(maxsize=4096)
 def reverse_ip(ip: str) -> str:
     """
     Реверсирует порядок октетов в IP-адресе для DNSBL-запроса.
+    Результат кэшируется: одно и то же имя нужно и для DNSBL-зон, и для dnsel Tor.
 
     Args:
         ip (str): IPv4-адрес, например "1.2.3.4"
@@ -115,16 +120,14 @@ async def check_dnsbl(ip: str, dnsbl: str, timeout: float = 1.0) -> dict:
     reversed_ip = reverse_ip(ip)
     query = f"{reversed_ip}.{dnsbl}"
     try:
-        await asyncio.wait_for(
-            asyncio.get_event_loop().getaddrinfo(query, None), timeout=timeout
+        records = await asyncio.wait_for(
+            dns_client.resolve(query, "A"), timeout=timeout
         )
-        return {"dnsbl": dnsbl, "listed": True, "reason": None}
-    except asyncio.TimeoutError:
+    except (asyncio.TimeoutError, dns.exception.Timeout):
         return None
-    except socket.gaierror:
-        return {"dnsbl": dnsbl, "listed": False, "reason": None}
     except Exception as e:
         return {"dnsbl": dnsbl, "listed": False, "reason": str(e)}
+    return {"dnsbl": dnsbl, "listed": bool(records), "reason": None}
 
 
 async def check_all_dnsbl(
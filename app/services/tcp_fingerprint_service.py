@@ -0,0 +1,126 @@
+import asyncio
+
+from scapy.all import AsyncSniffer
+from scapy.layers.inet import IP, TCP
+from scapy.layers.inet6 import IPv6
+
+from app.core.config import settings
+from app.schemas.os_info import TcpFingerprintInfo
+from app.utils.cache import Cache
+from app.utils.tcp_signatures import (
+    SynFeatures,
+    get_signature_table,
+    guess_initial_ttl,
+    options_layout,
+)
+
+# Признаки последнего SYN от каждого IP: пакет захватывается один раз,
+# а все последующие запросы анализа берут признаки из кэша
+_syn_cache = Cache(maxsize=settings.TCP_FINGERPRINT_CACHE_SIZE)
+_sniffer: AsyncSniffer | None = None
+
+
+def extract_syn_features(pkt) -> tuple[str, SynFeatures] | None:
+    """
+    Извлекает признаки из пакета TCP SYN.
+
+    Args:
+        pkt: Scapy-пакет.
+
+    Returns:
+        tuple[str, SynFeatures] | None: IP источника и признаки пакета,
+        либо None, если это не SYN (или SYN-ACK).
+    """
+    if TCP not in pkt:
+        return None
+    tcp = pkt[TCP]
+    if not tcp.flags.S or tcp.flags.A:
+        return None
+    if IP in pkt:
+        src, ttl = pkt[IP].src, pkt[IP].ttl
+    elif IPv6 in pkt:
+        src, ttl = pkt[IPv6].src, pkt[IPv6].hlim
+    else:
+        return None
+    olayout, mss, window_scale = options_layout(tcp.options)
+    return src, SynFeatures(
+        ttl=ttl,
+        initial_ttl=guess_initial_ttl(ttl),
+        window=tcp.window,
+        mss=mss,
+        window_scale=window_scale,
+        olayout=olayout,
+    )
+
+
+def start_syn_capture() -> None:
+    """
+    Запускает фоновый захват входящих SYN на TCP_FINGERPRINT_INTERFACE
+    (пустое значение отключает пассивный фингерпринтинг).
+
+    Пакеты разбираются в потоке sniffer, а признаки передаются в event loop,
+    где кэшируются по IP источника.
+    """
+    global _sniffer
+    if not settings.TCP_FINGERPRINT_INTERFACE or _sniffer is not None:
+        return
+    loop = asyncio.get_running_loop()
+    ttl = settings.TCP_FINGERPRINT_TTL
+
+    def handle(pkt) -> None:
+        result = extract_syn_features(pkt)
+        if result is not None:
+            src, features = result
+            loop.call_soon_threadsafe(_syn_cache.set, src, features, ttl)
+
+    sniffer = AsyncSniffer(
+        iface=settings.TCP_FINGERPRINT_INTERFACE,
+        filter=settings.TCP_FINGERPRINT_FILTER,
+        prn=handle,
+        store=False,
+    )
+    try:
+        sniffer.start()
+    except Exception as e:
+        print(f"[TCP] Не удалось запустить захват SYN: {e}")
+        return
+    _sniffer = sniffer
+    print(f"[TCP] Захват SYN на {settings.TCP_FINGERPRINT_INTERFACE} запущен")
+
+
+def stop_syn_capture() -> None:
+    """
+    Останавливает фоновый захват SYN.
+    """
+    global _sniffer
+    if _sniffer is not None:
+        try:
+            _sniffer.stop()
+        except Exception as e:
+            print(f"[TCP] Ошибка остановки захвата SYN: {e}")
+        _sniffer = None
+
+
+def get_tcp_fingerprint(ip: str) -> TcpFingerprintInfo | None:
+    """
+    Возвращает пассивный отпечаток TCP/IP-стека клиента по последнему
+    захваченному SYN и ОС, определённую по таблице сигнатур.
+
+    В отличие от OSInfo (по HTTP-заголовкам), эти признаки задаёт сетевой стек
+    ОС, и подделать их из браузера нельзя.
+
+    Args:
+        ip (str): IP-адрес клиента.
+
+    Returns:
+        TcpFingerprintInfo | None: Признаки SYN и ОС, либо None, если SYN
+        от этого IP не захватывался (или захват отключён).
+    """
+    features: SynFeatures | None = _syn_cache.get(ip)
+    if features is None:
+        return None
+    return TcpFingerprintInfo(
+        os=get_signature_table().match(features),
+        distance=features.initial_ttl - features.ttl,
+        **features._asdict(),
+    )
@@ -10,6 +10,7 @@ from scapy.layers.l2 import Ether
 from scapy.layers.vxlan import VXLAN
 
 from app.schemas.tunnel_ping import PingInfo, PingResponse, TunnelInfo
+from app.utils.executors import run_blocking
 
 
 def detect_tunnel(pkt) -> Optional[TunnelInfo]:
@@ -127,7 +128,6 @@ async def check_ip_for_tunnel(
     Returns:
         TunnelInfo | None: Информация о найденном туннеле или None, если не найден.
     """
-    loop = asyncio.get_event_loop()
     queue = asyncio.Queue()
 
     def packet_handler(pkt):
@@ -139,16 +139,15 @@ async def check_ip_for_tunnel(
                     queue.put_nowait(tunnel_info)
 
     async def start_sniffing():
-        await loop.run_in_executor(
-            None,
-            lambda: sniff(
-                iface=interface,
-                prn=packet_handler,
-                filter=f"host {target_ip}",
-                store=0,
-                count=max_packets,
-                timeout=timeout,
-            ),
+        await run_blocking(
+            "sniff",
+            sniff,
+            iface=interface,
+            prn=packet_handler,
+            filter=f"host {target_ip}",
+            store=0,
+            count=max_packets,
+            timeout=timeout,
         )
 
     try:
@@ -232,7 +231,9 @@ def sync_double_ping(host: str) -> Optional[PingResponse]:
 
 async def get_double_ping(host: str) -> Optional[PingResponse]:
     """
-    Асинхронная обёртка для sync_double_ping.
+    Асинхронная обёртка для sync_double_ping (выполняется в пуле "ping").
+
+    Raises:
+        ExecutorBusyError: Если пул "ping" перегружен.
     """
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, lambda: sync_double_ping(host))
+    return await run_blocking("ping", sync_double_ping, host)
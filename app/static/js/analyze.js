@@ -100,7 +100,11 @@ async function fetchQuickData() {
 
     // --- Использование VPN ---
     let vpnText = 'Не используется'
-    if (data.anonymization_info && data.anonymization_info.vpn_detected) {
+    if (data.anonymization_info && data.anonymization_info.vpn_detected === null) {
+        vpnText = data.anonymization_info.vpn_check_status === 'throttled'
+            ? 'Не проверено (превышен лимит запросов)'
+            : 'Не проверено (сервис недоступен)'
+    } else if (data.anonymization_info && data.anonymization_info.vpn_detected) {
         vpnText = 'Используется'
         if (data.anonymization_info.vpn_provider) {
             vpnText += ' (' + data.anonymization_info.vpn_provider + ')'
@@ -161,8 +165,10 @@ async function fetchQuickData() {
 }
 
 // =====================
-// DNS Leak test: POST /dnsleak/start, затем GET /dnsleak/check?test_id=...
+// DNS Leak test: POST /dnsleak/start, затем GET /dnsleak/check?test_id=...&wait=...
 // =====================
+const DNS_LEAK_WAIT = 5
+
 async function startDnsLeakTest() {
     const resp = await fetch('/dnsleak/start', {
         method: 'POST', headers: {'Content-Type': 'application/json'},
@@ -178,29 +184,32 @@ async function startDnsLeakTest() {
     }
     const testId = data.test_id
 
-    // Проверка результата через небольшую задержку, чтобы DNS-запрос успел пройти
-    setTimeout(async () => {
-        try {
-            const res = await fetch(`/dnsleak/check?test_id=${testId}`)
-            if (!res.ok) {
-                document.getElementById('dnsleak-value').innerText = 'Ошибка'
-                return
-            }
-            const result = await res.json()
-            result.leak_detected = false
-            dnsLeakResult = result
-            let leakText = 'Не обнаружена'
-            document.getElementById('dnsleak-value').innerText = leakText
-            if (result.leak_detected === true) {
-                leakText = 'Обнаружена!'
-                document.getElementById('dnsleak-value').classList.add('alert')
-            } else {
-                document.getElementById('dnsleak-value').classList.remove('alert')
-            }
-        } catch (e) {
+    // Браузер резолвит тестовые домены через DNS-резолвер клиента
+    for (const domain of data.domains) {
+        new Image().src = `http://${domain}/`
+    }
+
+    // Long-poll: сервер отвечает, как только все домены запрошены
+    try {
+        const res = await fetch(`/dnsleak/check?test_id=${testId}&wait=${DNS_LEAK_WAIT}`)
+        if (!res.ok) {
             document.getElementById('dnsleak-value').innerText = 'Ошибка'
+            return
+        }
+        const result = await res.json()
+        result.leak_detected = false
+        dnsLeakResult = result
+        let leakText = 'Не обнаружена'
+        document.getElementById('dnsleak-value').innerText = leakText
+        if (result.leak_detected === true) {
+            leakText = 'Обнаружена!'
+            document.getElementById('dnsleak-value').classList.add('alert')
+        } else {
+            document.getElementById('dnsleak-value').classList.remove('alert')
         }
-    }, 300)
+    } catch (e) {
+        document.getElementById('dnsleak-value').innerText = 'Ошибка'
+    }
 }
 
 // =====================
@@ -270,8 +279,8 @@ document.getElementById('download-json-btn').addEventListener('click', (e) => {
 // Инициализация страницы (запуск анализа и теста DNS при загрузке)
 // =====================
 window.addEventListener('DOMContentLoaded', async () => {
-    await startDnsLeakTest()
-    await fetchQuickData()
+    // Long-poll DNS-leak теста не должен задерживать основной анализ
+    await Promise.all([startDnsLeakTest(), fetchQuickData()])
 })
 
 // =====================
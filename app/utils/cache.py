@@ -6,20 +6,40 @@ class Cache:
     """
     Простейший in-memory TTL-кэш.
     Хранит пары (значение, время создания, TTL).
+    Если задан maxsize, при переполнении вытесняются самые старые записи.
+    Ведёт счётчики попаданий и промахов.
     """
 
-    def __init__(self):
+    def __init__(self, maxsize: int | None = None):
         self._store: dict[str, tuple[Any, float, float]] = {}
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
 
     def set(self, key: str, value: Any, ttl: float):
+        self._store.pop(key, None)
+        if self.maxsize is not None:
+            while len(self._store) >= self.maxsize:
+                del self._store[next(iter(self._store))]
         self._store[key] = (value, time.time(), ttl)
 
     def get(self, key: str):
         entry = self._store.get(key)
         if not entry:
+            self.misses += 1
             return None
         value, created, ttl = entry
         if time.time() - created > ttl:
             del self._store[key]
+            self.misses += 1
             return None
+        self.hits += 1
         return value
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,383 @@
+import argparse
+import asyncio
+import bisect
+import heapq
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterable, Iterator
+
+from app.core.config import settings
+
+# Формат индекса имён из сертификатов (Certificate Transparency):
+#   заголовок: MAGIC, число имён, смещение блока имён;
+#   таблица смещений: смещение каждого имени в блоке (8 байт);
+#   блок имён: имена в обратном порядке меток ("com.example.www"),
+#   отсортированные и разделённые "\n".
+# Все поддомены домена лежат в таблице подряд, поэтому запрос "*.domain" —
+# двоичный поиск начала диапазона и последовательное чтение.
+MAGIC = b"DNCTI001"
+_HEADER = struct.Struct(">8sQQ")
+_OFFSET = struct.Struct(">Q")
+
+
+def normalize_name(name: str) -> str | None:
+    """
+    Приводит имя из сертификата к виду для индекса: нижний регистр,
+    без "*." и точки в конце.
+
+    Returns:
+        str | None: Имя или None, если оно пустое или некорректное.
+    """
+    name = name.strip().lower().rstrip(".")
+    while name.startswith("*."):
+        name = name[2:]
+    if not name or " " in name or "\n" in name or "." not in name:
+        return None
+    return name
+
+
+# Метки второго уровня, под которыми в национальных зонах регистрируют домены
+# ("example.co.uk", "example.com.au"); полный Public Suffix List не подключается
+_SECOND_LEVEL_SUFFIXES = frozenset(
+    {"ac", "co", "com", "edu", "go", "gob", "gov", "ne", "net", "or", "org"}
+)
+
+
+def registrable_domain(name: str) -> str:
+    """
+    Возвращает регистрируемый домен имени: две последние метки или три,
+    если вторая с конца — типовой суффикс национальной зоны
+    ("www.example.co.uk" -> "example.co.uk").
+    """
+    labels = name.split(".")
+    if (
+        len(labels) > 2
+        and len(labels[-1]) == 2
+        and labels[-2] in _SECOND_LEVEL_SUFFIXES
+    ):
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def reverse_name(name: str) -> str:
+    """
+    Переставляет метки имени в обратном порядке: "www.example.com" ->
+    "com.example.www" (и обратно).
+    """
+    return ".".join(reversed(name.split(".")))
+
+
+class CtIndex:
+    """
+    Индекс имён из CT-логов, отображённый в память (mmap).
+
+    Страницы файла разделяются процессами-воркерами через page cache;
+    поиск поддоменов — двоичный поиск по таблице смещений и чтение
+    непрерывного диапазона имён.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size:
+            self._mm.close()
+            raise ValueError(f"Файл CT-индекса обрезан: {path}")
+        magic, self._count, self._names = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Неизвестный формат CT-индекса: {path}")
+        if (
+            self._names != _HEADER.size + self._count * _OFFSET.size
+            or self._names > len(self._mm)
+        ):
+            self._mm.close()
+            raise ValueError(f"Файл CT-индекса обрезан: {path}")
+        self.path = path
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _name(self, i: int) -> bytes:
+        start = self._names + _OFFSET.unpack_from(self._mm, _HEADER.size + i * 8)[0]
+        end = self._mm.find(b"\n", start)
+        return self._mm[start:end]
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if self._name(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __contains__(self, reversed_name: str) -> bool:
+        key = reversed_name.encode()
+        i = self._lower_bound(key)
+        return i < self._count and self._name(i) == key
+
+    def scan(self, prefix: str) -> Iterator[str]:
+        """
+        Выдаёт имена (в обратной записи), начинающиеся с prefix.
+        """
+        key = prefix.encode()
+        for i in range(self._lower_bound(key), self._count):
+            name = self._name(i)
+            if not name.startswith(key):
+                break
+            yield name.decode()
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._name(i).decode()
+
+
+def write_index(reversed_names: Iterable[str], output_path: str) -> int:
+    """
+    Записывает индекс из отсортированных уникальных имён в обратной записи.
+    Файл записывается атомарно: работающие процессы читают старую версию
+    до переоткрытия.
+
+    Returns:
+        int: Число записанных имён.
+    """
+    offsets = bytearray()
+    names = bytearray()
+    count = 0
+    for name in reversed_names:
+        offsets += _OFFSET.pack(len(names))
+        names += name.encode() + b"\n"
+        count += 1
+
+    directory = os.path.dirname(output_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".ct-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, count, _HEADER.size + len(offsets)))
+            f.write(offsets)
+            f.write(names)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+def read_dump(path: str) -> Iterator[str]:
+    """
+    Читает имена из дампа сертификатов: JSON-массив в формате crt.sh
+    (поле name_value, имена через "\\n") или текстовый файл с одним именем
+    на строку.
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                if isinstance(entry, dict) and "name_value" in entry:
+                    yield from entry["name_value"].split("\n")
+    else:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+
+
+def compile_dumps(dump_paths: list[str], output_path: str) -> int:
+    """
+    Компилирует дампы сертификатов в CT-индекс.
+
+    Args:
+        dump_paths (list[str]): Пути к дампам.
+        output_path (str): Путь к индексу.
+
+    Returns:
+        int: Число уникальных имён в индексе.
+    """
+    names: set[str] = set()
+    for path in dump_paths:
+        for raw in read_dump(path):
+            name = normalize_name(raw)
+            if name is not None:
+                names.add(reverse_name(name))
+    return write_index(sorted(names), output_path)
+
+
+class CtStore:
+    """
+    CT-индекс на диске плюс журнал имён, найденных после его сборки.
+
+    Новые имена дописываются в журнал (файл по одному имени на строку)
+    и держатся в памяти отсортированным списком, так что поиск поддоменов
+    объединяет диапазон из индекса и диапазон из журнала. Когда журнал
+    превышает CT_JOURNAL_MAX имён, он сливается с индексом (compact).
+
+    Запись (add, compact) выполняет один писатель — фоновый обновлятель.
+    """
+
+    def __init__(self, index_path: str, journal_path: str):
+        self.index_path = index_path
+        self.journal_path = journal_path
+        self._index: CtIndex | None = None
+        try:
+            self._index = CtIndex(index_path)
+        except (OSError, ValueError) as e:
+            print(f"[CT] CT-индекс недоступен: {e}")
+        self._journal: list[str] = []
+        self._journal_set: set[str] = set()
+        if os.path.exists(journal_path):
+            with open(journal_path, "r", encoding="utf-8") as f:
+                _, self._journal, self._journal_set = self._merge(f)
+
+    @property
+    def index_size(self) -> int:
+        return len(self._index) if self._index is not None else 0
+
+    @property
+    def journal_size(self) -> int:
+        return len(self._journal)
+
+    def _contains(self, reversed_name: str) -> bool:
+        if reversed_name in self._journal_set:
+            return True
+        return self._index is not None and reversed_name in self._index
+
+    def _merge(self, names: Iterable[str]) -> tuple[list[str], list[str], set[str]]:
+        """
+        Отбирает новые имена и строит обновлённые копии журнала; текущие
+        структуры не изменяются, поэтому метод можно выполнять в потоке.
+
+        Returns:
+            tuple: (новые имена, отсортированный журнал, множество журнала).
+        """
+        journal_set = set(self._journal_set)
+        new: list[str] = []
+        for raw in names:
+            name = normalize_name(raw)
+            if name is None:
+                continue
+            reversed_name = reverse_name(name)
+            if reversed_name in journal_set or (
+                self._index is not None and reversed_name in self._index
+            ):
+                continue
+            journal_set.add(reversed_name)
+            new.append(reversed_name)
+        journal = self._journal + new
+        if new:
+            # timsort сливает отсортированный журнал с новым хвостом почти за линейное время
+            journal.sort()
+        return [reverse_name(name) for name in new], journal, journal_set
+
+    def _append_journal(self, added: list[str]) -> None:
+        directory = os.path.dirname(self.journal_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(added) + "\n")
+
+    async def add(self, names: Iterable[str]) -> int:
+        """
+        Добавляет имена, которых ещё нет в индексе и журнале.
+
+        Отбор имён, сортировка журнала и дозапись файла выполняются в потоке;
+        в event loop только подменяются ссылки на готовые структуры, так что
+        поиск никогда не видит журнал в процессе сортировки.
+
+        Returns:
+            int: Число новых имён.
+        """
+
+        def merge_and_write() -> tuple[list[str], list[str], set[str]]:
+            merged = self._merge(names)
+            if merged[0]:
+                self._append_journal(merged[0])
+            return merged
+
+        added, journal, journal_set = await asyncio.to_thread(merge_and_write)
+        if added:
+            self._journal, self._journal_set = journal, journal_set
+        return len(added)
+
+    def subdomains(self, domain: str) -> list[str]:
+        """
+        Возвращает все известные поддомены домена ("*.domain").
+
+        Args:
+            domain (str): Домен.
+
+        Returns:
+            list[str]: Отсортированный список поддоменов.
+        """
+        name = normalize_name(domain)
+        if name is None:
+            return []
+        prefix = reverse_name(name) + "."
+        found = set(self._index.scan(prefix)) if self._index is not None else set()
+        start = bisect.bisect_left(self._journal, prefix)
+        for reversed_name in self._journal[start:]:
+            if not reversed_name.startswith(prefix):
+                break
+            found.add(reversed_name)
+        return sorted(reverse_name(reversed_name) for reversed_name in found)
+
+    def needs_compaction(self) -> bool:
+        return len(self._journal) >= settings.CT_JOURNAL_MAX
+
+    def build_compacted(self) -> CtIndex:
+        """
+        Сливает индекс и журнал в новый файл индекса (слиянием отсортированных
+        последовательностей) и открывает его. Выполняется в потоке: поиск
+        продолжает читать старый индекс до install_compacted.
+        """
+        sources: list[Iterable[str]] = [list(self._journal)]
+        if self._index is not None:
+            sources.append(self._index)
+        write_index(heapq.merge(*sources), self.index_path)
+        # Имена журнала уже в новом индексе: файл журнала можно очистить здесь,
+        # вне event loop (до install_compacted писатель ничего не добавляет)
+        open(self.journal_path, "w").close()
+        return CtIndex(self.index_path)
+
+    def install_compacted(self, index: CtIndex) -> None:
+        """
+        Подменяет индекс слитым и очищает журнал в памяти.
+        """
+        old, self._index = self._index, index
+        self._journal = []
+        self._journal_set = set()
+        if old is not None:
+            old.close()
+
+
+_store: CtStore | None = None
+
+
+def get_ct_store() -> CtStore:
+    """
+    Возвращает CT-хранилище из settings.CT_INDEX_PATH и CT_JOURNAL_PATH
+    (открывается при первом обращении).
+    """
+    global _store
+    if _store is None:
+        _store = CtStore(settings.CT_INDEX_PATH, settings.CT_JOURNAL_PATH)
+        print(
+            f"[CT] Загружен CT-индекс: {_store.index_size} имён, "
+            f"в журнале {_store.journal_size}"
+        )
+    return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Компиляция дампов сертификатов (crt.sh JSON или список имён) "
+        "в CT-индекс"
+    )
+    parser.add_argument("dumps", nargs="+")
+    parser.add_argument("-o", "--output", default=settings.CT_INDEX_PATH)
+    args = parser.parse_args()
+    count = compile_dumps(args.dumps, args.output)
+    print(f"Записано имён: {count}")
@@ -0,0 +1,138 @@
+import asyncio
+from typing import AsyncIterator, Iterable
+
+from app.core.config import settings
+from app.exceptions import DataUnavailableError
+from app.utils.ip_index import ip_to_int
+
+
+def parse_bulk_line(line: str) -> dict | None:
+    """
+    Разбирает строку ответа bulk whois Team Cymru в режиме verbose:
+        "15169 | 8.8.8.8 | 8.8.8.0/24 | US | arin | 2023-12-28 | GOOGLE, US"
+
+    Args:
+        line (str): Строка ответа.
+
+    Returns:
+        dict | None: Поля ip, asn, asn_cidr, asn_country_code, asn_registry,
+        asn_date, asn_description; None для заголовка, ошибок и адресов
+        без анонса (AS "NA").
+    """
+    fields = [field.strip() for field in line.split("|")]
+    if len(fields) < 7 or not fields[0] or fields[0] == "NA":
+        return None
+    if not fields[0].isdigit():
+        # Строка заголовка колонок ("AS | IP | BGP Prefix | ...")
+        return None
+
+    def value(field: str) -> str | None:
+        return field if field and field != "NA" else None
+
+    return {
+        "ip": fields[1],
+        "asn": fields[0],
+        "asn_cidr": value(fields[2]),
+        "asn_country_code": value(fields[3]),
+        "asn_registry": value(fields[4]),
+        "asn_date": value(fields[5]),
+        "asn_description": value("|".join(fields[6:])),
+    }
+
+
+async def _bulk_session(
+    ips: list[str], host: str, port: int, timeout: float
+) -> AsyncIterator[dict]:
+    """
+    Одна bulk-сессия: begin/verbose, список адресов, end. Запись запроса
+    идёт параллельно с чтением ответа, чтобы при тысячах адресов
+    не упереться в заполненные буферы TCP.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout=timeout
+        )
+    except (OSError, asyncio.TimeoutError) as e:
+        raise DataUnavailableError(f"Bulk whois connection failed: {e}")
+
+    async def send() -> None:
+        writer.write(b"begin\nverbose\n")
+        for ip in ips:
+            writer.write(ip.encode() + b"\n")
+            if writer.transport.get_write_buffer_size() > 64 * 1024:
+                await writer.drain()
+        writer.write(b"end\n")
+        await writer.drain()
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    sender = asyncio.create_task(send())
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise DataUnavailableError("Bulk whois timed out")
+            try:
+                raw = await asyncio.wait_for(reader.readline(), timeout=remaining)
+            except asyncio.TimeoutError:
+                raise DataUnavailableError("Bulk whois timed out")
+            except OSError as e:
+                raise DataUnavailableError(f"Bulk whois read failed: {e}")
+            if not raw:
+                break
+            record = parse_bulk_line(raw.decode("utf-8", errors="replace"))
+            if record is not None:
+                yield record
+        await sender
+    except OSError as e:
+        raise DataUnavailableError(f"Bulk whois write failed: {e}")
+    finally:
+        sender.cancel()
+        writer.close()
+
+
+async def iter_bulk_asn(
+    ips: Iterable[str],
+    host: str | None = None,
+    port: int | None = None,
+    timeout: float | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Определяет ASN для множества IP через bulk whois (протокол Team Cymru),
+    разбирая ответ построчно по мере поступления.
+
+    Некорректные адреса и дубликаты отбрасываются; список делится на сессии
+    не более CYMRU_BULK_MAX_IPS адресов.
+
+    Args:
+        ips (Iterable[str]): IP-адреса.
+        host (str | None): Хост bulk whois (по умолчанию CYMRU_WHOIS_HOST).
+        port (int | None): Порт (по умолчанию CYMRU_WHOIS_PORT).
+        timeout (float | None): Таймаут одной сессии (по умолчанию CYMRU_BULK_TIMEOUT).
+
+    Yields:
+        dict: Результат parse_bulk_line для каждого адреса с известной ASN.
+
+    Raises:
+        DataUnavailableError: Если сервер недоступен или не ответил вовремя.
+    """
+    host = host or settings.CYMRU_WHOIS_HOST
+    port = port or settings.CYMRU_WHOIS_PORT
+    timeout = timeout or settings.CYMRU_BULK_TIMEOUT
+
+    unique: dict[str, None] = {}
+    for ip in ips:
+        ip = ip.strip()
+        try:
+            ip_to_int(ip)
+        except ValueError:
+            continue
+        unique[ip] = None
+    addresses = list(unique)
+
+    size = settings.CYMRU_BULK_MAX_IPS
+    for start in range(0, len(addresses), size):
+        async for record in _bulk_session(
+            addresses[start : start + size], host, port, timeout
+        ):
+            yield record
@@ -1,17 +1,124 @@
+import asyncio
+
 import dns.asyncresolver
+import dns.exception
+import dns.message
+import dns.rdatatype
+import dns.resolver
+import dns.reversename
+
+from app.core.config import settings
+from app.utils.cache import Cache
+
+
+def _negative_ttl(exc: dns.exception.DNSException) -> float:
+    """
+    Время жизни отрицательного ответа (RFC 2308): минимум из TTL записи SOA
+    в секции authority и её поля minimum. Если SOA в ответе нет —
+    DNS_NEGATIVE_TTL.
+    """
+    responses: list[dns.message.Message] = []
+    if isinstance(exc, dns.resolver.NXDOMAIN):
+        responses = list(exc.kwargs.get("responses", {}).values())
+    elif isinstance(exc, dns.resolver.NoAnswer):
+        response = exc.kwargs.get("response")
+        if response is not None:
+            responses = [response]
+    for response in responses:
+        for rrset in response.authority:
+            if rrset.rdtype == dns.rdatatype.SOA and len(rrset):
+                return min(rrset.ttl, rrset[0].minimum)
+    return settings.DNS_NEGATIVE_TTL
 
 
 class DnsClient:
     """
-    Обёртка над dns.asyncresolver.Resolver для асинхронных DNS-запросов.
-    Можно передать список nameservers, иначе будет использоваться системный резолвер.
+    Кэширующий stub-резолвер поверх dns.asyncresolver.Resolver.
+
+    Можно передать список nameservers, иначе будет использоваться системный
+    резолвер. Если задан max_inflight, число одновременных запросов к серверам
+    ограничено.
+
+    Ответы кэшируются по (имя, тип): положительные — на минимальный TTL
+    записей ответа, отрицательные (NXDOMAIN, нет записей) — на TTL из SOA
+    (RFC 2308); оба ограничены DNS_CACHE_MAX_TTL. Параллельные запросы
+    одного и того же (имя, тип) объединяются в один запрос к серверу.
+    Ошибки (таймаут, SERVFAIL) не кэшируются.
     """
 
-    def __init__(self, nameservers: list[str] = None):
+    def __init__(
+        self,
+        nameservers: list[str] = None,
+        max_inflight: int | None = None,
+        cache_size: int | None = None,
+    ):
         # если переданы nameservers — используем их, иначе системные из /etc/resolv.conf
         self.resolver = dns.asyncresolver.Resolver(configure=nameservers is None)
         if nameservers:
             self.resolver.nameservers = nameservers
+        self._inflight = asyncio.Semaphore(max_inflight) if max_inflight else None
+        self._cache = Cache(maxsize=cache_size) if cache_size else None
+        self._pending: dict[str, asyncio.Future] = {}
+        self.negative_hits = 0
+        self.coalesced = 0
+        self.queries = 0
+        self.errors = 0
+
+    async def _fetch(self, key: str, name: str, rdtype: str) -> tuple[str, ...]:
+        self.queries += 1
+        try:
+            if self._inflight is None:
+                answer = await self.resolver.resolve(name, rdtype=rdtype)
+            else:
+                async with self._inflight:
+                    answer = await self.resolver.resolve(name, rdtype=rdtype)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+            records: tuple[str, ...] = ()
+            ttl = _negative_ttl(e)
+        except Exception:
+            self.errors += 1
+            raise
+        else:
+            records = tuple(r.to_text() for r in answer)
+            ttl = answer.rrset.ttl if answer.rrset is not None else 0
+        ttl = min(ttl, settings.DNS_CACHE_MAX_TTL)
+        if self._cache is not None and ttl > 0:
+            self._cache.set(key, records, ttl)
+        return records
+
+    async def resolve(self, name: str, rdtype: str) -> list[str]:
+        """
+        Выполняет DNS-запрос с использованием кэша.
+
+        Args:
+            name (str): Имя домена.
+            rdtype (str): Тип записи (A, AAAA, MX, TXT, PTR и т.д.).
+
+        Returns:
+            list[str]: Строковые представления записей; [] для NXDOMAIN
+            и ответа без записей этого типа.
+
+        Raises:
+            dns.exception.DNSException: При таймауте или ошибке сервера.
+        """
+        key = f"{rdtype.upper()} {name.lower().rstrip('.')}"
+        if self._cache is not None:
+            records = self._cache.get(key)
+            if records is not None:
+                if not records:
+                    self.negative_hits += 1
+                return list(records)
+
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key, name, rdtype))
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: отмена одного ожидающего (по таймауту) не отменяет
+        # общий запрос для остальных
+        return list(await asyncio.shield(future))
 
     async def query(self, name: str, rdtype: str) -> list[str]:
         """
@@ -19,7 +126,39 @@ class DnsClient:
         Возвращает список строковых представлений записей, или [] при ошибке/отсутствии.
         """
         try:
-            answer = await self.resolver.resolve(name, rdtype=rdtype)
-            return [r.to_text() for r in answer]
+            return await self.resolve(name, rdtype)
         except Exception:
             return []
+
+    async def reverse(self, ip: str) -> str | None:
+        """
+        Выполняет обратный (PTR) запрос для IPv4/IPv6-адреса.
+        Возвращает имя хоста без завершающей точки или None, если записи нет.
+        """
+        try:
+            name = dns.reversename.from_address(ip)
+        except (dns.exception.SyntaxError, ValueError):
+            return None
+        records = await self.query(name.to_text(), "PTR")
+        return records[0].rstrip(".") if records else None
+
+    def stats(self) -> dict:
+        cache = self._cache
+        return {
+            "size": len(cache) if cache is not None else 0,
+            "maxsize": cache.maxsize if cache is not None else 0,
+            "hits": cache.hits if cache is not None else 0,
+            "negative_hits": self.negative_hits,
+            "misses": cache.misses if cache is not None else 0,
+            "hit_ratio": cache.hit_ratio if cache is not None else 0.0,
+            "coalesced": self.coalesced,
+            "queries": self.queries,
+            "errors": self.errors,
+            "inflight": len(self._pending),
+        }
+
+
+# Общий резолвер сервиса: один кэш ответов и общий лимит одновременных запросов
+dns_client = DnsClient(
+    max_inflight=settings.DNS_MAX_INFLIGHT, cache_size=settings.DNS_CACHE_SIZE
+)
@@ -0,0 +1,128 @@
+import asyncio
+import time
+import uuid
+
+
+class LeakTest:
+    """
+    Состояние одного DNS-leak теста: ожидаемые имена, имена, по которым
+    пришли запросы, и IP резолверов, отправивших эти запросы.
+
+    Событие done устанавливается, когда запрошены все ожидаемые имена:
+    ожидающие проверки просыпаются сразу, без опроса.
+    """
+
+    def __init__(self, test_id: str, domains: list[str], expires: float):
+        self.test_id = test_id
+        self.domains = domains
+        self.expected = set(domains)
+        self.seen: set[str] = set()
+        self.resolvers: set[str] = set()
+        self.expires = expires
+        self.done = asyncio.Event()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Ожидает запросов ко всем ожидаемым именам не дольше timeout секунд.
+
+        Returns:
+            bool: True, если все имена запрошены.
+        """
+        if timeout > 0 and not self.done.is_set():
+            try:
+                await asyncio.wait_for(self.done.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.done.is_set()
+
+
+class DnsLeakRegistry:
+    """
+    Реестр активных DNS-leak тестов с индексом по первой метке тестового имени.
+
+    Тест живёт ttl секунд с момента создания; число тестов ограничено maxsize
+    (при переполнении вытесняются самые старые). Так как все тесты имеют
+    одинаковый TTL, порядок вставки совпадает с порядком истечения, и очистка
+    просматривает только начало словаря.
+
+    Все методы вызываются из event loop (DNS-сервер теста работает в нём же),
+    поэтому блокировки не нужны.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._tests: dict[str, LeakTest] = {}
+        self._labels: dict[str, LeakTest] = {}
+
+    def __len__(self) -> int:
+        return len(self._tests)
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        while self._tests:
+            test = next(iter(self._tests.values()))
+            if test.expires > now and len(self._tests) < self.maxsize:
+                break
+            self.remove(test)
+
+    def create(self, labels: list[str], zone: str) -> LeakTest:
+        """
+        Регистрирует тест с именами <метка>.<zone>.
+
+        Args:
+            labels (list[str]): Уникальные метки тестовых имён.
+            zone (str): Зона тестовых имён.
+
+        Returns:
+            LeakTest: Созданный тест.
+        """
+        self._purge()
+        test = LeakTest(
+            str(uuid.uuid4()),
+            [f"{label}.{zone}" for label in labels],
+            expires=time.monotonic() + self.ttl,
+        )
+        self._tests[test.test_id] = test
+        for label in labels:
+            self._labels[label] = test
+        return test
+
+    def has_label(self, label: str) -> bool:
+        return label in self._labels
+
+    def get(self, test_id: str) -> LeakTest | None:
+        """
+        Возвращает тест по идентификатору (None, если не найден или истёк).
+        """
+        test = self._tests.get(test_id)
+        if test is not None and test.expires <= time.monotonic():
+            self.remove(test)
+            return None
+        return test
+
+    def remove(self, test: LeakTest) -> None:
+        self._tests.pop(test.test_id, None)
+        for domain in test.domains:
+            self._labels.pop(domain.split(".", 1)[0], None)
+
+    def record(self, qname: str, source_ip: str) -> bool:
+        """
+        Отмечает запрос к тестовому имени и IP резолвера, который его отправил.
+        Будит ожидающих, когда запрошены все имена теста.
+
+        Args:
+            qname (str): Запрошенное имя (в нижнем регистре, без точки в конце).
+            source_ip (str): IP отправителя запроса.
+
+        Returns:
+            bool: True, если имя принадлежит одному из активных тестов.
+        """
+        test = self._labels.get(qname.split(".", 1)[0])
+        if test is None or qname not in test.expected:
+            return False
+        test.seen.add(qname)
+        test.resolvers.add(source_ip)
+        if test.expected <= test.seen:
+            test.done.set()
+        return True
@@ -0,0 +1,171 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.exceptions import ExecutorBusyError
+
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """
+    Именованный пул потоков для одного класса блокирующих операций.
+
+    Число одновременно выполняемых задач ограничено max_workers, а число
+    ожидающих в очереди — max_queue: при переполнении задача не ставится
+    в очередь, а сразу отклоняется с ExecutorBusyError. Так всплеск одного
+    вида работы (например, 5-секундных sniff) не занимает потоки других.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{name}-worker"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Число задач, ожидающих свободного потока.
+        """
+        with self._lock:
+            return self._pending - self._running
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Выполняет блокирующую функцию в пуле.
+
+        Args:
+            func: Блокирующая функция.
+            *args, **kwargs: Её аргументы.
+
+        Returns:
+            T: Результат func.
+
+        Raises:
+            ExecutorBusyError: Если очередь пула заполнена.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusyError(f"Пул '{self.name}' перегружен")
+            self._pending += 1
+            self.submitted += 1
+        submitted_at = time.monotonic()
+        started = False
+
+        def job() -> T:
+            nonlocal started
+            wait = time.monotonic() - submitted_at
+            with self._lock:
+                started = True
+                self._running += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return func(*args, **kwargs)
+
+        def release(_) -> None:
+            # Слот освобождается по завершении future, а не внутри job():
+            # задача, отменённая в очереди (отменой ожидающего или shutdown
+            # с cancel_futures), не выполняется вовсе
+            with self._lock:
+                self._pending -= 1
+                if started:
+                    self._running -= 1
+                    self.completed += 1
+
+        try:
+            future = self._pool.submit(job)
+        except RuntimeError:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self._running
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait": self.total_wait / started if started else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+_executors: dict[str, BoundedExecutor] = {}
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """
+    Возвращает (создавая при первом обращении) пул с заданным именем.
+    Размеры берутся из settings.EXECUTOR_POOLS, для прочих имён —
+    EXECUTOR_DEFAULT_WORKERS / EXECUTOR_DEFAULT_QUEUE.
+    """
+    executor = _executors.get(name)
+    if executor is None:
+        config = settings.EXECUTOR_POOLS.get(name, {})
+        executor = _executors[name] = BoundedExecutor(
+            name,
+            max_workers=config.get("workers", settings.EXECUTOR_DEFAULT_WORKERS),
+            max_queue=config.get("queue", settings.EXECUTOR_DEFAULT_QUEUE),
+        )
+    return executor
+
+
+async def run_blocking(
+    name: str, func: Callable[..., T], *args: Any, **kwargs: Any
+) -> T:
+    """
+    Выполняет блокирующую функцию в именованном пуле.
+
+    Args:
+        name (str): Имя пула (ping, sniff, ...).
+        func: Блокирующая функция.
+
+    Returns:
+        T: Результат func.
+
+    Raises:
+        ExecutorBusyError: Если очередь пула заполнена.
+    """
+    return await get_executor(name).run(functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    """
+    Останавливает все пулы (ожидающие задачи отменяются).
+    """
+    for executor in _executors.values():
+        executor.shutdown()
+    _executors.clear()
+
+
+def executors_stats() -> list[dict]:
+    """
+    Возвращает статистику всех созданных пулов.
+    """
+    return [executor.stats() for executor in _executors.values()]
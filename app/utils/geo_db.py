@@ -0,0 +1,202 @@
+import argparse
+import csv
+import mmap
+import os
+import struct
+import tempfile
+
+from app.core.config import settings
+from app.schemas.ip_info import LocationInfo
+from app.utils.ip_index import ip_to_int
+
+# Формат скомпилированной базы:
+#   заголовок: MAGIC, число записей, смещение таблицы строк;
+#   записи (отсортированы по началу диапазона): начало и конец диапазона
+#   как 128-битные ключи (hi, lo), смещение строки с данными о локации;
+#   таблица строк: длина (2 байта) + поля локации в UTF-8 через \x1f.
+# IPv4 хранится в пространстве IPv6 как ::ffff:a.b.c.d.
+MAGIC = b"DNGEO001"
+_HEADER = struct.Struct(">8sQQ")
+_RECORD = struct.Struct(">QQQQI")
+_KEY = struct.Struct(">QQ")
+_STR_LEN = struct.Struct(">H")
+
+_V4_MAPPED = 0xFFFF << 32
+_LO_MASK = (1 << 64) - 1
+
+FIELDS = (
+    "city",
+    "region",
+    "country",
+    "provider",
+    "latitude",
+    "longitude",
+    "postal_index",
+    "timezone",
+)
+
+
+def _to_key(version: int, value: int) -> tuple[int, int]:
+    """
+    Переводит адрес в 128-битный ключ (hi, lo) единого пространства IPv6.
+    """
+    if version == 4:
+        value |= _V4_MAPPED
+    return value >> 64, value & _LO_MASK
+
+
+class GeoDatabase:
+    """
+    База геолокации по диапазонам IP, отображённая в память (mmap).
+
+    Страницы файла разделяются всеми процессами-воркерами через page cache,
+    а поиск — двоичный поиск по записям фиксированной длины без загрузки
+    базы в кучу Python.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size:
+            self._mm.close()
+            raise ValueError(f"Файл базы геолокации обрезан: {path}")
+        magic, self._count, self._strings = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Неизвестный формат базы геолокации: {path}")
+        # Записи и блок строк должны целиком помещаться в файл
+        if (
+            self._strings != _HEADER.size + self._count * _RECORD.size
+            or self._strings > len(self._mm)
+        ):
+            self._mm.close()
+            raise ValueError(f"Файл базы геолокации обрезан: {path}")
+        self.path = path
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def lookup(self, ip: str) -> LocationInfo | None:
+        """
+        Ищет диапазон, содержащий IP.
+
+        Args:
+            ip (str): IP-адрес.
+
+        Returns:
+            LocationInfo | None: Локация или None, если адреса нет в базе.
+        """
+        try:
+            key = _to_key(*ip_to_int(ip))
+        except ValueError:
+            return None
+
+        mm = self._mm
+        base = _HEADER.size
+        size = _RECORD.size
+        # Последняя запись с началом диапазона <= key
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if _KEY.unpack_from(mm, base + mid * size) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+        _, _, end_hi, end_lo, offset = _RECORD.unpack_from(mm, base + (lo - 1) * size)
+        if key > (end_hi, end_lo):
+            return None
+
+        position = self._strings + offset
+        (length,) = _STR_LEN.unpack_from(mm, position)
+        start = position + _STR_LEN.size
+        values = mm[start : start + length].decode("utf-8").split("\x1f")
+        data = dict(zip(FIELDS, (value or None for value in values)))
+        return LocationInfo(ip=ip, **data)
+
+
+def compile_csv(csv_path: str, output_path: str) -> int:
+    """
+    Компилирует CSV с диапазонами в бинарную базу для GeoDatabase.
+
+    CSV должен содержать заголовок со столбцами start_ip и end_ip
+    и любыми из полей LocationInfo: city, region, country, provider,
+    latitude, longitude, postal_index, timezone. Диапазоны не должны
+    пересекаться. Файл записывается атомарно, поэтому работающие процессы
+    продолжают читать старую версию до переоткрытия.
+
+    Args:
+        csv_path (str): Путь к исходному CSV.
+        output_path (str): Путь к результирующей базе.
+
+    Returns:
+        int: Число записанных диапазонов.
+    """
+    records = []
+    strings = bytearray()
+    offsets: dict[bytes, int] = {}
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            start = _to_key(*ip_to_int(row["start_ip"].strip()))
+            end = _to_key(*ip_to_int(row["end_ip"].strip()))
+            payload = "\x1f".join(
+                (row.get(field) or "").strip() for field in FIELDS
+            ).encode("utf-8")
+            # Одинаковые локации хранятся в таблице строк один раз
+            offset = offsets.get(payload)
+            if offset is None:
+                offset = offsets[payload] = len(strings)
+                strings += _STR_LEN.pack(len(payload)) + payload
+            records.append((start, end, offset))
+    records.sort()
+
+    directory = os.path.dirname(output_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".geo-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            strings_offset = _HEADER.size + len(records) * _RECORD.size
+            f.write(_HEADER.pack(MAGIC, len(records), strings_offset))
+            for (start_hi, start_lo), (end_hi, end_lo), offset in records:
+                f.write(_RECORD.pack(start_hi, start_lo, end_hi, end_lo, offset))
+            f.write(strings)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(records)
+
+
+_db: GeoDatabase | None = None
+_db_loaded = False
+
+
+def get_geo_db() -> GeoDatabase | None:
+    """
+    Возвращает базу геолокации из settings.GEO_DB_PATH (открывается
+    при первом обращении) или None, если файла нет.
+    """
+    global _db, _db_loaded
+    if not _db_loaded:
+        _db_loaded = True
+        try:
+            _db = GeoDatabase(settings.GEO_DB_PATH)
+            print(f"[Geo] Загружена база геолокации: {len(_db)} диапазонов")
+        except (OSError, ValueError) as e:
+            print(f"[Geo] База геолокации недоступна: {e}")
+    return _db
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Компиляция CSV с диапазонами IP в базу геолокации"
+    )
+    parser.add_argument("csv_path")
+    parser.add_argument("output_path", nargs="?", default=settings.GEO_DB_PATH)
+    args = parser.parse_args()
+    count = compile_csv(args.csv_path, args.output_path)
+    print(f"Записано диапазонов: {count}")
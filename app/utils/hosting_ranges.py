@@ -0,0 +1,129 @@
+import os
+import re
+from typing import NamedTuple
+
+from app.core.config import settings
+from app.utils.bst_ip import parse_ip_port
+from app.utils.prefix_trie import PrefixTrie
+
+_PROXY_DATABASE_PATH = os.path.join(os.path.dirname(__file__), "ip_database.txt")
+
+# Блок базы прокси: "FR - France (846)['1.2.3.4:80', ...]". Блоки разных
+# регионов в файле иногда склеены в одну строку, поэтому ищем их по всему тексту.
+_PROXY_BLOCK_RE = re.compile(r"([A-Z]{2}) - [^\[]*\[([^\]]*)\]")
+
+CATEGORIES = ("hosting", "vpn", "proxy")
+
+
+class RangeInfo(NamedTuple):
+    """
+    Сведения о сети из локальных списков.
+
+    - category: тип сети (hosting / vpn / proxy)
+    - provider: название провайдера или сервиса
+    """
+
+    category: str
+    provider: str
+
+
+def _load_range_file(trie: PrefixTrie[RangeInfo], path: str) -> int:
+    """
+    Загружает файл диапазонов. Формат строки:
+        <CIDR> <категория> <провайдер>
+    например "203.0.113.0/24 vpn ExampleVPN". Пустые строки
+    и комментарии (#) пропускаются, некорректные строки игнорируются.
+
+    Returns:
+        int: Число загруженных сетей.
+    """
+    loaded = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(maxsplit=2)
+            if len(parts) < 3 or parts[1] not in CATEGORIES:
+                continue
+            try:
+                trie.insert(parts[0], RangeInfo(parts[1], parts[2]))
+            except ValueError:
+                continue
+            loaded += 1
+    return loaded
+
+
+def _load_proxy_database(trie: PrefixTrie[RangeInfo]) -> int:
+    """
+    Загружает публичные прокси из ip_database.txt как сети /32.
+    """
+    try:
+        with open(_PROXY_DATABASE_PATH, "r", encoding="utf-8") as f:
+            data = f.read()
+    except OSError as e:
+        print(f"[Ranges] Ошибка чтения базы прокси: {e}")
+        return 0
+    loaded = 0
+    for match in _PROXY_BLOCK_RE.finditer(data):
+        info = RangeInfo("proxy", f"Public proxy ({match.group(1)})")
+        for item in match.group(2).replace("'", "").split(","):
+            try:
+                ip, _ = parse_ip_port(item.strip())
+                trie.insert(ip, info)
+            except ValueError:
+                continue
+            loaded += 1
+    return loaded
+
+
+def build_range_index(directory: str) -> PrefixTrie[RangeInfo]:
+    """
+    Строит индекс для поиска по наиболее длинному префиксу из встроенной базы
+    публичных прокси и всех файлов *.txt в директории списков хостинг/VPN-сетей.
+    Более специфичные сети перекрывают общие (например, VPN внутри хостинга).
+
+    Args:
+        directory (str): Директория со списками сетей.
+
+    Returns:
+        PrefixTrie[RangeInfo]: Индекс сетей.
+    """
+    trie: PrefixTrie[RangeInfo] = PrefixTrie()
+    _load_proxy_database(trie)
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".txt"):
+                try:
+                    _load_range_file(trie, os.path.join(directory, name))
+                except OSError as e:
+                    print(f"[Ranges] Ошибка чтения {name}: {e}")
+    return trie
+
+
+_index: PrefixTrie[RangeInfo] | None = None
+
+
+def get_range_index() -> PrefixTrie[RangeInfo]:
+    """
+    Возвращает индекс хостинг/VPN-сетей (строится при первом обращении
+    из settings.HOSTING_RANGES_DIR).
+    """
+    global _index
+    if _index is None:
+        _index = build_range_index(settings.HOSTING_RANGES_DIR)
+    return _index
+
+
+def classify_ip(ip: str) -> RangeInfo | None:
+    """
+    Классифицирует IP по локальным спискам сетей.
+
+    Args:
+        ip (str): IP-адрес.
+
+    Returns:
+        RangeInfo | None: Категория и провайдер наиболее специфичной сети,
+        либо None, если локальных данных об адресе нет.
+    """
+    return get_range_index().lookup(ip)
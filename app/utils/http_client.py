@@ -1,20 +1,126 @@
-from aiohttp import ClientSession, ClientTimeout
+from collections import Counter
 
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
 
-class HttpClient:
+from app.core.config import settings
+
+
+class HttpClientPool:
     """
-    Асинхронный HTTP-клиент на базе aiohttp с единым timeout и reuse sessions.
+    Общий для всего приложения пул HTTP-соединений на базе aiohttp.
+
+    - Одна ClientSession с keep-alive, общим и per-host лимитом соединений
+      и кэшированием DNS с TTL.
+    - Создаётся в lifespan приложения (start) и закрывается при остановке (close).
+    - Собирает статистику: число запросов, новых и переиспользованных
+      соединений, попаданий в DNS-кэш.
     """
 
-    def __init__(self, timeout: float = 0):
-        self._timeout = ClientTimeout(total=timeout)
+    def __init__(self):
         self._session: ClientSession | None = None
+        self._counters: Counter = Counter()
+
+    def _trace_config(self) -> TraceConfig:
+        trace = TraceConfig()
+        counters = self._counters
+
+        async def on_request_start(session, ctx, params):
+            counters["requests"] += 1
+
+        async def on_request_exception(session, ctx, params):
+            counters["errors"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            counters["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            counters["connections_reused"] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            counters["dns_cache_hits"] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            counters["dns_cache_misses"] += 1
 
-    async def __aenter__(self) -> ClientSession:
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_exception.append(on_request_exception)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+
+    async def start(self) -> None:
+        """
+        Создаёт сессию и пул соединений (вызывается в lifespan приложения).
+        """
+        if self._session is not None and not self._session.closed:
+            return
+        connector = TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+            use_dns_cache=True,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS,
+        )
+        self._session = ClientSession(
+            connector=connector,
+            timeout=ClientTimeout(total=settings.HTTP_DEFAULT_TIMEOUT),
+            trace_configs=[self._trace_config()],
+        )
+
+    async def close(self) -> None:
+        """
+        Закрывает сессию и все соединения пула.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get_session(self) -> ClientSession:
+        """
+        Возвращает общую сессию. Если пул ещё не запущен
+        (например, вне приложения), создаёт его лениво.
+
+        Returns:
+            ClientSession: Общая aiohttp-сессия.
+        """
         if self._session is None or self._session.closed:
-            self._session = ClientSession(timeout=self._timeout)
+            await self.start()
         return self._session
 
-    async def __aexit__(self, exc_type, exc, tb):
-        if self._session and not self._session.closed:
-            await self._session.close()
+    def stats(self) -> dict:
+        """
+        Возвращает статистику пула соединений.
+
+        Returns:
+            dict: Лимиты, число занятых и простаивающих соединений и счётчики.
+        """
+        connector = self._session.connector if self._session else None
+        acquired = getattr(connector, "_acquired", ())
+        idle = getattr(connector, "_conns", {})
+        return {
+            "started": self._session is not None and not self._session.closed,
+            "limit": connector.limit if connector else settings.HTTP_POOL_LIMIT,
+            "limit_per_host": (
+                connector.limit_per_host
+                if connector
+                else settings.HTTP_POOL_LIMIT_PER_HOST
+            ),
+            "in_use": len(acquired),
+            "idle": sum(len(conns) for conns in idle.values()),
+            **{
+                name: self._counters[name]
+                for name in (
+                    "requests",
+                    "errors",
+                    "connections_created",
+                    "connections_reused",
+                    "dns_cache_hits",
+                    "dns_cache_misses",
+                )
+            },
+        }
+
+
+http_pool = HttpClientPool()
@@ -0,0 +1,169 @@
+import ipaddress
+import socket
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator
+
+_MASK_64 = (1 << 64) - 1
+
+
+def ip_to_int(ip: str) -> tuple[int, int]:
+    """
+    Преобразует строковый IP-адрес (IPv4 или IPv6) в пару (версия, целое число).
+
+    Args:
+        ip (str): IP-адрес, например "1.2.3.4" или "2001:db8::1".
+
+    Returns:
+        tuple[int, int]: Версия протокола (4 или 6) и адрес в виде целого числа.
+
+    Raises:
+        ValueError: Если строка не является корректным IP-адресом.
+    """
+    ip = ip.strip()
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except OSError:
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+    except OSError:
+        raise ValueError(f"Некорректный IP-адрес: {ip!r}") from None
+
+
+def int_to_ip(version: int, value: int) -> str:
+    """
+    Обратное преобразование: целое число -> строковый IP-адрес.
+
+    Args:
+        version (int): Версия протокола (4 или 6).
+        value (int): Адрес в виде целого числа.
+
+    Returns:
+        str: IP-адрес в каноническом строковом виде.
+    """
+    if version == 4:
+        return str(ipaddress.IPv4Address(value))
+    return str(ipaddress.IPv6Address(value))
+
+
+class IpSet:
+    """
+    Компактное неизменяемое множество IP-адресов.
+
+    IPv4 хранятся как отсортированный array('I') (4 байта на адрес),
+    IPv6 — как отсортированный array('Q') из пар (старшие 64 бита, младшие 64 бита).
+    Проверка принадлежности — бинарный поиск, O(log n), без аллокаций строк.
+    """
+
+    __slots__ = ("_v4", "_v6")
+
+    def __init__(self, ips: Iterable[str] = ()):
+        v4: set[int] = set()
+        v6: set[int] = set()
+        for ip in ips:
+            try:
+                version, value = ip_to_int(ip)
+            except ValueError:
+                continue
+            (v4 if version == 4 else v6).add(value)
+        self._fill(v4, v6)
+
+    def _fill(self, v4: Iterable[int], v6: Iterable[int]) -> None:
+        self._v4 = array("I", sorted(set(v4)))
+        self._v6 = array("Q")
+        for value in sorted(set(v6)):
+            self._v6.append(value >> 64)
+            self._v6.append(value & _MASK_64)
+
+    @classmethod
+    def from_ints(cls, v4: Iterable[int], v6: Iterable[int] = ()) -> "IpSet":
+        """
+        Строит множество из адресов, уже переведённых в целые числа.
+
+        Args:
+            v4 (Iterable[int]): IPv4-адреса.
+            v6 (Iterable[int]): IPv6-адреса.
+
+        Returns:
+            IpSet: Построенное множество.
+        """
+        obj = cls.__new__(cls)
+        obj._fill(v4, v6)
+        return obj
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "IpSet":
+        """
+        Строит множество из строк текстового списка (по одному IP в строке).
+        Пустые строки и комментарии (#) пропускаются.
+        """
+        return cls(ln.strip() for ln in lines if ln.strip() and not ln.startswith("#"))
+
+    def __len__(self) -> int:
+        return len(self._v4) + len(self._v6) // 2
+
+    def __contains__(self, ip: object) -> bool:
+        if not isinstance(ip, str):
+            return False
+        try:
+            version, value = ip_to_int(ip)
+        except ValueError:
+            return False
+        return self.contains_int(version, value)
+
+    def contains_int(self, version: int, value: int) -> bool:
+        """
+        Проверяет принадлежность адреса, уже переведённого в целое число.
+
+        Args:
+            version (int): Версия протокола (4 или 6).
+            value (int): Адрес в виде целого числа.
+
+        Returns:
+            bool: True, если адрес есть в множестве.
+        """
+        return self.position(version, value) is not None
+
+    def position(self, version: int, value: int) -> int | None:
+        """
+        Возвращает порядковый номер адреса в множестве
+        (сначала все IPv4 по возрастанию, затем все IPv6).
+        Позволяет хранить данные об адресах в параллельных массивах.
+
+        Args:
+            version (int): Версия протокола (4 или 6).
+            value (int): Адрес в виде целого числа.
+
+        Returns:
+            int | None: Номер адреса от 0 до len(self) - 1 или None, если адреса нет.
+        """
+        if version == 4:
+            i = bisect_left(self._v4, value)
+            if i < len(self._v4) and self._v4[i] == value:
+                return i
+            return None
+
+        hi, lo = value >> 64, value & _MASK_64
+        data = self._v6
+        count = len(data) // 2
+        left, right = 0, count
+        while left < right:
+            mid = (left + right) // 2
+            if (data[2 * mid], data[2 * mid + 1]) < (hi, lo):
+                left = mid + 1
+            else:
+                right = mid
+        if left < count and data[2 * left] == hi and data[2 * left + 1] == lo:
+            return len(self._v4) + left
+        return None
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        """
+        Перебирает адреса в порядке position(): пары (версия, целое число).
+        """
+        for value in self._v4:
+            yield 4, value
+        data = self._v6
+        for i in range(0, len(data), 2):
+            yield 6, (data[i] << 64) | data[i + 1]
@@ -0,0 +1,93 @@
+import codecs
+import json
+from typing import Any, AsyncIterable, AsyncIterator
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+# Обработанный префикс буфера отбрасывается, когда превышает этот размер
+_COMPACT_THRESHOLD = 64 * 1024
+# Максимальный размер одного элемента: защита от накопления всего потока
+# в буфере, если JSON испорчен в середине
+_MAX_ITEM_SIZE = 16 * 1024 * 1024
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Инкрементально разбирает JSON-массив верхнего уровня из потока байтов
+    и выдаёт его элементы по одному, не загружая весь ответ в память.
+
+    В памяти держится только необработанный хвост буфера: текущий
+    недочитанный элемент и остаток последнего чанка.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Поток чанков тела ответа.
+
+    Yields:
+        Any: Очередной элемент массива.
+
+    Raises:
+        ValueError: Если поток не является корректным JSON-массивом.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    started = False
+    finished = False
+    eof = False
+    iterator = chunks.__aiter__()
+
+    while not finished:
+        # Пропускаем пробелы, открывающую скобку и разделители
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char in _WHITESPACE:
+                pos += 1
+            elif not started:
+                if char != "[":
+                    raise ValueError("Ожидался JSON-массив")
+                started = True
+                pos += 1
+            elif char == ",":
+                pos += 1
+            elif char == "]":
+                finished = True
+                break
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError("Некорректный JSON в потоке")
+                    break  # элемент ещё не дочитан
+                if not eof and (
+                    end == len(buffer)
+                    or isinstance(item, (int, float))
+                    and buffer[end] not in _DELIMITERS
+                ):
+                    # Число в конце буфера ("3" или "3.") может продолжиться
+                    # в следующем чанке
+                    break
+                pos = end
+                yield item
+
+        if finished:
+            break
+        if eof:
+            if not started:
+                # Пустое тело ответа
+                return
+            raise ValueError("Неожиданный конец JSON-массива")
+
+        if pos > _COMPACT_THRESHOLD:
+            buffer = buffer[pos:]
+            pos = 0
+        if len(buffer) - pos > _MAX_ITEM_SIZE:
+            raise ValueError("Слишком большой элемент JSON-массива")
+        try:
+            chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            eof = True
+            buffer += utf8.decode(b"", final=True)
+            continue
+        buffer += utf8.decode(chunk)
@@ -0,0 +1,165 @@
+import asyncio
+import struct
+from typing import Callable
+
+from dnslib import QTYPE, RCODE, RR, SOA, A, DNSError, DNSRecord
+
+# Обработчик запроса: (имя без завершающей точки, IP источника) -> известно ли имя
+QueryHandler = Callable[[str, str], bool]
+
+# Таймаут чтения одного запроса по TCP (сек)
+_TCP_READ_TIMEOUT = 10.0
+
+
+class LeakDnsServer:
+    """
+    Авторитативный DNS-сервер тестовой зоны DNS-leak, работающий в event loop
+    приложения (UDP через DatagramProtocol и TCP через asyncio.start_server).
+
+    Сервер не хранит состояние тестов: каждое имя внутри зоны передаётся
+    обработчику вместе с IP отправителя (резолвера клиента). Известные имена
+    получают A-запись answer_ip, неизвестные — NXDOMAIN, имена вне зоны —
+    REFUSED. Отрицательные ответы (NXDOMAIN и NODATA, в т.ч. для apex зоны)
+    содержат SOA зоны в секции authority (RFC 2308) с TTL ttl, чтобы
+    резолверы не кэшировали их дольше положительных.
+    """
+
+    def __init__(
+        self,
+        zone: str,
+        handler: QueryHandler,
+        answer_ip: str,
+        ttl: int = 0,
+        nameserver: str | None = None,
+    ):
+        self.zone = zone.lower().strip(".")
+        self.handler = handler
+        self.answer_ip = answer_ip
+        self.ttl = ttl
+        # serial, refresh, retry, expire, minimum (TTL отрицательных ответов)
+        self.soa = SOA(
+            mname=nameserver or f"ns.{self.zone}",
+            rname=f"hostmaster.{self.zone}",
+            times=(1, 3600, 600, 86400, ttl),
+        )
+        self._transport: asyncio.DatagramTransport | None = None
+        self._tcp_server: asyncio.AbstractServer | None = None
+        self.queries = 0
+        self.malformed = 0
+
+    def handle(self, data: bytes, source_ip: str) -> bytes | None:
+        """
+        Разбирает DNS-запрос и формирует ответ.
+
+        Args:
+            data (bytes): DNS-сообщение.
+            source_ip (str): IP отправителя.
+
+        Returns:
+            bytes | None: Ответ или None, если запрос не разобран.
+        """
+        try:
+            request = DNSRecord.parse(data)
+        except (DNSError, struct.error, IndexError):
+            self.malformed += 1
+            return None
+        self.queries += 1
+        reply = request.reply()
+        # Резолверы могут менять регистр букв в имени (DNS 0x20)
+        qname = str(request.q.qname).rstrip(".").lower()
+        qtype = request.q.qtype
+        if qname != self.zone and not qname.endswith("." + self.zone):
+            reply.header.rcode = RCODE.REFUSED
+            reply.header.aa = 0
+        elif qname == self.zone:
+            # apex существует: SOA на запрос SOA/ANY, иначе NODATA
+            if qtype in (QTYPE.SOA, QTYPE.ANY):
+                reply.add_answer(self._soa_rr())
+            else:
+                reply.add_auth(self._soa_rr())
+        elif not self.handler(qname, source_ip):
+            reply.header.rcode = RCODE.NXDOMAIN
+            reply.add_auth(self._soa_rr())
+        elif qtype in (QTYPE.A, QTYPE.ANY):
+            reply.add_answer(
+                RR(
+                    rname=request.q.qname,
+                    rtype=QTYPE.A,
+                    ttl=self.ttl,
+                    rdata=A(self.answer_ip),
+                )
+            )
+        else:
+            reply.add_auth(self._soa_rr())
+        return reply.pack()
+
+    def _soa_rr(self) -> RR:
+        return RR(rname=self.zone + ".", rtype=QTYPE.SOA, ttl=self.ttl, rdata=self.soa)
+
+    async def start(self, host: str, port: int) -> None:
+        """
+        Открывает UDP- и TCP-сокеты сервера.
+
+        Raises:
+            OSError: Если порт занят или недоступен.
+        """
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpProtocol(self), local_addr=(host, port)
+        )
+        try:
+            self._tcp_server = await asyncio.start_server(self._handle_tcp, host, port)
+        except OSError:
+            self._transport.close()
+            self._transport = None
+            raise
+
+    async def stop(self) -> None:
+        """
+        Закрывает сокеты сервера.
+        """
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+            self._tcp_server = None
+
+    async def _handle_tcp(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # По TCP каждое сообщение предваряется двухбайтовой длиной (RFC 1035, 4.2.2)
+        source_ip = writer.get_extra_info("peername")[0]
+        try:
+            while True:
+                header = await asyncio.wait_for(
+                    reader.readexactly(2), timeout=_TCP_READ_TIMEOUT
+                )
+                (length,) = struct.unpack("!H", header)
+                data = await asyncio.wait_for(
+                    reader.readexactly(length), timeout=_TCP_READ_TIMEOUT
+                )
+                response = self.handle(data, source_ip)
+                if response is None:
+                    break
+                writer.write(struct.pack("!H", len(response)) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, OSError):
+            pass
+        finally:
+            writer.close()
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: LeakDnsServer):
+        self.server = server
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        response = self.server.handle(data, addr[0])
+        if response is not None:
+            self.transport.sendto(response, addr)
@@ -0,0 +1,123 @@
+import time
+from typing import Any
+
+from app.utils.ip_index import ip_to_int
+from app.utils.prefix_trie import ADDRESS_BITS, parse_cidr, prefix_mask
+
+
+class PrefixCache:
+    """
+    TTL-кэш, индексированный сетевыми префиксами: значение, сохранённое
+    для сети, возвращается для любого адреса внутри неё.
+
+    Для каждой встречавшейся длины префикса хранится отдельный словарь
+    {адрес сети: запись}, поэтому поиск — не более одного обращения
+    к словарю на длину, от самой длинной к самой короткой.
+    Если задан maxsize, при переполнении вытесняются самые старые записи.
+    """
+
+    def __init__(self, maxsize: int | None = None):
+        # (версия, длина префикса) -> {адрес сети: (значение, истекает)}
+        self._tables: dict[tuple[int, int], dict[int, tuple[Any, float]]] = {}
+        # Порядок вставки для вытеснения: (версия, длина, адрес сети)
+        self._order: dict[tuple[int, int, int], None] = {}
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def set_network(
+        self, version: int, network: int, length: int, value: Any, ttl: float
+    ) -> None:
+        """
+        Сохраняет значение для сети, заданной целым адресом и длиной префикса.
+        """
+        key = (version, length, network)
+        self._order.pop(key, None)
+        if self.maxsize is not None:
+            while len(self._order) >= self.maxsize:
+                old_version, old_length, old_network = next(iter(self._order))
+                self._delete(old_version, old_length, old_network)
+        self._tables.setdefault((version, length), {})[network] = (
+            value,
+            time.monotonic() + ttl,
+        )
+        self._order[key] = None
+
+    def set(self, cidr: str, value: Any, ttl: float) -> None:
+        """
+        Сохраняет значение для сети.
+
+        Args:
+            cidr (str): Сеть в нотации CIDR.
+            value (Any): Значение.
+            ttl (float): Время жизни записи (сек).
+
+        Raises:
+            ValueError: Если CIDR некорректен.
+        """
+        version, network, length = parse_cidr(cidr)
+        self.set_network(version, network, length, value, ttl)
+
+    def set_for_ip(
+        self, ip: str, length_v4: int, length_v6: int, value: Any, ttl: float
+    ):
+        """
+        Сохраняет значение для сети фиксированной длины, содержащей IP.
+        """
+        version, address = ip_to_int(ip)
+        length = length_v4 if version == 4 else length_v6
+        network = address & prefix_mask(length, ADDRESS_BITS[version])
+        self.set_network(version, network, length, value, ttl)
+
+    def get(self, ip: str) -> Any:
+        """
+        Возвращает значение самой специфичной непросроченной сети,
+        содержащей IP, или None.
+        """
+        try:
+            version, address = ip_to_int(ip)
+        except ValueError:
+            self.misses += 1
+            return None
+        width = ADDRESS_BITS[version]
+        now = time.monotonic()
+        lengths = sorted(
+            (length for v, length in self._tables if v == version), reverse=True
+        )
+        for length in lengths:
+            network = address & prefix_mask(length, width)
+            entry = self._tables[(version, length)].get(network)
+            if entry is None:
+                continue
+            value, expires = entry
+            if expires < now:
+                self._delete(version, length, network)
+                continue
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def _delete(self, version: int, length: int, network: int) -> None:
+        self._order.pop((version, length, network), None)
+        table = self._tables.get((version, length))
+        if table is not None:
+            table.pop(network, None)
+            if not table:
+                del self._tables[(version, length)]
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+        }
@@ -0,0 +1,171 @@
+from typing import Any, Generic, Iterator, TypeVar
+
+from app.utils.ip_index import ip_to_int
+
+V = TypeVar("V")
+
+ADDRESS_BITS = {4: 32, 6: 128}
+
+
+class _Node:
+    """
+    Узел Patricia-дерева: префикс key длины length (биты выровнены влево
+    в пределах ширины адреса) и, возможно, значение для этого префикса.
+    """
+
+    __slots__ = ("key", "length", "value", "children")
+
+    def __init__(self, key: int, length: int, value: Any = None):
+        self.key = key
+        self.length = length
+        self.value = value
+        self.children: list["_Node | None"] = [None, None]
+
+
+def parse_cidr(cidr: str) -> tuple[int, int, int]:
+    """
+    Разбирает CIDR-запись ("1.2.3.0/24", "2001:db8::/32" или одиночный адрес).
+
+    Args:
+        cidr (str): Сеть в нотации CIDR.
+
+    Returns:
+        tuple[int, int, int]: Версия протокола, адрес сети (биты хоста обнулены)
+        и длина префикса.
+
+    Raises:
+        ValueError: Если запись некорректна.
+    """
+    address, _, length_str = cidr.strip().partition("/")
+    version, value = ip_to_int(address)
+    width = ADDRESS_BITS[version]
+    length = int(length_str) if length_str else width
+    if not 0 <= length <= width:
+        raise ValueError(f"Некорректная длина префикса: {cidr!r}")
+    return version, value & prefix_mask(length, width), length
+
+
+def prefix_mask(length: int, width: int) -> int:
+    """
+    Маска сети длины length для адреса шириной width бит.
+    """
+    return ((1 << length) - 1) << (width - length)
+
+
+class PrefixTrie(Generic[V]):
+    """
+    Сжатое двоичное префиксное дерево (Patricia/radix trie) над целочисленными
+    адресами IPv4 и IPv6 для поиска по наиболее длинному префиксу.
+
+    Цепочки узлов без ветвлений сжаты, поэтому глубина поиска ограничена
+    числом вложенных префиксов на пути к адресу, а не длиной адреса в битах.
+    """
+
+    def __init__(self):
+        self._roots = {4: _Node(0, 0), 6: _Node(0, 0)}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, cidr: str, value: V) -> None:
+        """
+        Добавляет сеть со значением (существующее значение заменяется).
+
+        Args:
+            cidr (str): Сеть в нотации CIDR.
+            value (V): Значение, связанное с сетью.
+        """
+        version, key, length = parse_cidr(cidr)
+        self.insert_int(version, key, length, value)
+
+    def insert_int(self, version: int, key: int, length: int, value: V) -> None:
+        """
+        Добавляет сеть, заданную целым адресом и длиной префикса.
+        """
+        width = ADDRESS_BITS[version]
+        node = self._roots[version]
+        while True:
+            if node.length == length:
+                if node.value is None:
+                    self._size += 1
+                node.value = value
+                return
+            bit = (key >> (width - 1 - node.length)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _Node(key, length, value)
+                self._size += 1
+                return
+
+            # Длина общего префикса вставляемой сети и дочернего узла
+            limit = min(length, child.length)
+            diff = (key ^ child.key) >> (width - limit) if limit else 0
+            common = limit - diff.bit_length()
+            if common == child.length:
+                node = child
+                continue
+
+            # Разделяем ребро: новый промежуточный узел на общем префиксе
+            middle = _Node(key & prefix_mask(common, width), common)
+            node.children[bit] = middle
+            middle.children[(child.key >> (width - 1 - common)) & 1] = child
+            if common == length:
+                middle.value = value
+            else:
+                leaf = _Node(key, length, value)
+                middle.children[(key >> (width - 1 - common)) & 1] = leaf
+            self._size += 1
+            return
+
+    def lookup_int(self, version: int, address: int) -> tuple[V, int] | None:
+        """
+        Ищет наиболее длинный префикс, содержащий адрес.
+
+        Args:
+            version (int): Версия протокола (4 или 6).
+            address (int): Адрес в виде целого числа.
+
+        Returns:
+            tuple[V, int] | None: Значение и длина найденного префикса или None.
+        """
+        width = ADDRESS_BITS[version]
+        node = self._roots[version]
+        best = (node.value, 0) if node.value is not None else None
+        while node.length < width:
+            child = node.children[(address >> (width - 1 - node.length)) & 1]
+            if child is None or (address ^ child.key) >> (width - child.length):
+                break
+            node = child
+            if node.value is not None:
+                best = (node.value, node.length)
+        return best
+
+    def lookup(self, ip: str) -> V | None:
+        """
+        Возвращает значение наиболее специфичной сети, содержащей IP.
+
+        Args:
+            ip (str): IP-адрес.
+
+        Returns:
+            V | None: Значение или None, если адрес не входит ни в одну сеть.
+        """
+        try:
+            version, address = ip_to_int(ip)
+        except ValueError:
+            return None
+        found = self.lookup_int(version, address)
+        return found[0] if found else None
+
+    def items(self) -> Iterator[tuple[int, int, int, V]]:
+        """
+        Перебирает сохранённые сети: (версия, адрес сети, длина префикса, значение).
+        """
+        for version, root in self._roots.items():
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                if node.value is not None:
+                    yield version, node.key, node.length, node.value
+                stack.extend(child for child in node.children if child)
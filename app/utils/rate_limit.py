@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Асинхронный ограничитель частоты запросов (token bucket).
+
+    Бакет пополняется со скоростью rate токенов в секунду до capacity.
+    Если токена нет, запрос резервирует будущий токен и ждёт его (очередь),
+    но не дольше max_wait; если ждать пришлось бы дольше — запрос отбрасывается.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.queued = 0
+        self.shed = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, max_wait: float = 0.0) -> bool:
+        """
+        Берёт один токен, при необходимости дожидаясь его.
+
+        Args:
+            max_wait (float): Максимальное время ожидания токена (сек).
+
+        Returns:
+            bool: True, если токен получен; False, если запрос отброшен.
+        """
+        self._refill()
+        wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+        if wait > max_wait:
+            self.shed += 1
+            return False
+        # Резервируем токен сразу: следующие запросы встанут в очередь за нами
+        self._tokens -= 1
+        self.acquired += 1
+        if wait > 0:
+            self.queued += 1
+            await asyncio.sleep(wait)
+        return True
+
+    def drain(self) -> None:
+        """
+        Обнуляет запас токенов (например, после ответа 429 от upstream).
+        """
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
@@ -0,0 +1,243 @@
+import asyncio
+import ipaddress
+import time
+
+import aiohttp
+
+from app.core.config import settings
+from app.exceptions import DataUnavailableError, UpstreamUnavailableError
+from app.schemas.ip_info import NetInfo
+from app.utils.http_client import http_pool
+from app.utils.prefix_trie import PrefixTrie
+from app.utils.upstream import get_upstream
+
+_RDAP_HEADERS = {"Accept": "application/rdap+json, application/json"}
+
+# Bootstrap-реестр IANA: префикс -> базовые URL RDAP-сервера RIR
+_bootstrap: PrefixTrie[list[str]] | None = None
+_bootstrap_loaded_at = 0.0
+_bootstrap_lock = asyncio.Lock()
+
+
+async def _fetch_json(url: str) -> dict:
+    """
+    Выполняет GET через общий пул с дедлайном, повторами и circuit breaker.
+    HTTP-редиректы (так RIR передают запросы по переданным блокам) проходятся
+    автоматически.
+    """
+
+    async def fetch() -> dict:
+        session = await http_pool.get_session()
+        async with session.get(url, headers=_RDAP_HEADERS) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    return await get_upstream("rdap").call(fetch)
+
+
+async def _load_bootstrap() -> PrefixTrie[list[str]]:
+    """
+    Загружает bootstrap-файлы IANA для IPv4 и IPv6 в префиксное дерево.
+    """
+    trie: PrefixTrie[list[str]] = PrefixTrie()
+    for url in settings.RDAP_BOOTSTRAP_URLS:
+        data = await _fetch_json(url)
+        for prefixes, servers in data.get("services", []):
+            # Предпочитаем HTTPS-серверы, но сохраняем остальные как запасные
+            servers = sorted(servers, key=lambda s: not s.startswith("https://"))
+            for prefix in prefixes:
+                try:
+                    trie.insert(prefix, servers)
+                except ValueError:
+                    continue
+    return trie
+
+
+async def get_bootstrap() -> PrefixTrie[list[str]] | None:
+    """
+    Возвращает bootstrap-реестр RDAP, обновляя его раз в RDAP_BOOTSTRAP_TTL.
+    Если обновить не удалось, используется предыдущая версия (или None).
+    """
+    global _bootstrap, _bootstrap_loaded_at
+    if time.monotonic() - _bootstrap_loaded_at < settings.RDAP_BOOTSTRAP_TTL:
+        return _bootstrap
+    async with _bootstrap_lock:
+        if time.monotonic() - _bootstrap_loaded_at < settings.RDAP_BOOTSTRAP_TTL:
+            return _bootstrap
+        try:
+            _bootstrap = await _load_bootstrap()
+            print(f"[RDAP] Bootstrap-реестр загружен: {len(_bootstrap)} префиксов")
+        except (aiohttp.ClientError, UpstreamUnavailableError, ValueError) as e:
+            print(f"[RDAP] Ошибка загрузки bootstrap-реестра: {e}")
+        # И при ошибке не повторяем загрузку на каждый запрос
+        _bootstrap_loaded_at = time.monotonic()
+    return _bootstrap
+
+
+async def _server_for(ip: str) -> str:
+    """
+    Выбирает RDAP-сервер для IP по наиболее длинному префиксу bootstrap-реестра.
+    """
+    bootstrap = await get_bootstrap()
+    servers = bootstrap.lookup(ip) if bootstrap is not None else None
+    base = servers[0] if servers else settings.RDAP_FALLBACK_URL
+    return base if base.endswith("/") else base + "/"
+
+
+def _referral(network: dict, current_url: str) -> str | None:
+    """
+    Ищет ссылку на более точный RDAP-объект сети (например, национального
+    реестра), отличную от текущего URL.
+    """
+    for link in network.get("links", []):
+        href = link.get("href")
+        if (
+            link.get("rel") == "related"
+            and "rdap" in link.get("type", "rdap")
+            and href
+            and "/ip/" in href
+            and href.rstrip("/") != current_url.rstrip("/")
+        ):
+            return href
+    return None
+
+
+def _network_cidr(network: dict) -> str | None:
+    """
+    Возвращает CIDR сети из расширения cidr0 или из диапазона адресов.
+    """
+    cidrs = []
+    for item in network.get("cidr0_cidrs", []):
+        prefix = item.get("v4prefix") or item.get("v6prefix")
+        if prefix and item.get("length") is not None:
+            cidrs.append(f"{prefix}/{item['length']}")
+    if not cidrs:
+        try:
+            start = ipaddress.ip_address(network["startAddress"])
+            end = ipaddress.ip_address(network["endAddress"])
+            cidrs = [str(n) for n in ipaddress.summarize_address_range(start, end)]
+        except (KeyError, TypeError, ValueError):
+            return None
+    return ", ".join(cidrs)
+
+
+def _walk_entities(entities: list[dict]):
+    """
+    Обходит сущности RDAP вместе с вложенными (abuse-контакт ARIN,
+    например, вложен в организацию-владельца).
+    """
+    for entity in entities:
+        yield entity
+        yield from _walk_entities(entity.get("entities", []))
+
+
+def _vcard(entity: dict) -> list[list]:
+    vcard = entity.get("vcardArray")
+    return vcard[1] if isinstance(vcard, list) and len(vcard) > 1 else []
+
+
+def _emails(entities: list[dict], role: str) -> list[str] | None:
+    emails = [
+        prop[3]
+        for entity in _walk_entities(entities)
+        if role in entity.get("roles", [])
+        for prop in _vcard(entity)
+        if prop[0] == "email" and isinstance(prop[3], str)
+    ]
+    return list(dict.fromkeys(emails)) or None
+
+
+def _registrant_address(entities: list[dict]) -> dict:
+    """
+    Извлекает почтовый адрес владельца сети из vCard (свойство adr).
+    """
+    for entity in _walk_entities(entities):
+        if "registrant" not in entity.get("roles", []):
+            continue
+        for prop in _vcard(entity):
+            if prop[0] != "adr":
+                continue
+            label = prop[1].get("label") if isinstance(prop[1], dict) else None
+            parts = prop[3] if isinstance(prop[3], list) else []
+            # Структура adr: [п/я, доп. адрес, улица, город, регион, индекс, страна]
+            parts = [p if isinstance(p, str) else None for p in parts] + [None] * 7
+            street = parts[2] or label
+            return {
+                "address": street.strip() if street else None,
+                "city": parts[3] or None,
+                "state": parts[4] or None,
+                "postal_code": parts[5] or None,
+            }
+    return {}
+
+
+def _event_date(network: dict, action: str) -> str | None:
+    for event in network.get("events", []):
+        if event.get("eventAction") == action:
+            return event.get("eventDate")
+    return None
+
+
+def network_to_net_info(network: dict) -> NetInfo:
+    """
+    Преобразует объект сети RDAP (RFC 9083) в NetInfo.
+
+    Args:
+        network (dict): Объект сети из ответа RDAP.
+
+    Returns:
+        NetInfo: Pydantic-модель с данными о подсети.
+    """
+    entities = network.get("entities", [])
+    description = "\n".join(
+        line
+        for remark in network.get("remarks", [])
+        for line in remark.get("description", [])
+    )
+    return NetInfo(
+        cidr=_network_cidr(network),
+        name=network.get("name"),
+        description=description or None,
+        country=network.get("country"),
+        abuse_emails=_emails(entities, "abuse"),
+        tech_emails=_emails(entities, "technical"),
+        created=_event_date(network, "registration"),
+        updated=_event_date(network, "last changed"),
+        **_registrant_address(entities),
+    )
+
+
+async def lookup_networks(ip: str) -> list[NetInfo]:
+    """
+    Получает сведения о сетях, содержащих IP, по протоколу RDAP.
+
+    Сервер выбирается по bootstrap-реестру IANA, затем проходятся ссылки
+    на более точные реестры (не более RDAP_MAX_REFERRALS). Сети возвращаются
+    от наиболее общей к наиболее специфичной.
+
+    Args:
+        ip (str): IP-адрес.
+
+    Returns:
+        list[NetInfo]: Сети из всех пройденных реестров.
+
+    Raises:
+        DataUnavailableError: Если не удалось получить ответ RDAP.
+    """
+    url = f"{await _server_for(ip)}ip/{ip}"
+    nets: list[NetInfo] = []
+    visited = set()
+    for _ in range(settings.RDAP_MAX_REFERRALS + 1):
+        visited.add(url)
+        try:
+            network = await _fetch_json(url)
+        except (aiohttp.ClientError, UpstreamUnavailableError, ValueError) as e:
+            if nets:
+                # Сбой на реферале: отдаём то, что уже получено
+                break
+            raise DataUnavailableError(f"RDAP lookup failed: {e}")
+        nets.append(network_to_net_info(network))
+        url = _referral(network, url)
+        if url is None or url in visited:
+            break
+    return nets
@@ -0,0 +1,59 @@
+import asyncio
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Таблица мемоизации текущего анализа: (функция, аргументы) -> Task.
+# Дочерние задачи наследуют контекст, поэтому видят ту же таблицу.
+_memo: ContextVar[dict[tuple, asyncio.Task] | None] = ContextVar(
+    "analysis_memo", default=None
+)
+
+
+@contextmanager
+def analysis_scope() -> Iterator[None]:
+    """
+    Открывает область одного анализа: внутри неё вызовы функций,
+    помеченных request_memoize, с одинаковыми аргументами выполняются один раз.
+    """
+    token = _memo.set({})
+    try:
+        yield
+    finally:
+        _memo.reset(token)
+
+
+def request_memoize(
+    func: Callable[..., Awaitable[T]],
+) -> Callable[..., Awaitable[T]]:
+    """
+    Декоратор для идемпотентных асинхронных вызовов сервисов.
+
+    Внутри analysis_scope первый вызов с данными аргументами запускает задачу,
+    а повторные (в том числе параллельные) ожидают её же результат вместо
+    нового обращения к сети. Вне области анализа вызов выполняется как обычно.
+    """
+
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        memo = _memo.get()
+        if memo is None:
+            return await func(*args, **kwargs)
+        # Приводим аргументы к каноническому виду: f(ip) и f(ip=ip) — один вызов
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func, bound.args, tuple(sorted(bound.kwargs.items())))
+        task = memo.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            memo[key] = task
+        # shield: отмена одного ожидающего не отменяет общую задачу
+        return await asyncio.shield(task)
+
+    return wrapper
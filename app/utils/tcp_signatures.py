@@ -0,0 +1,138 @@
+import os
+from typing import NamedTuple
+
+_SIGNATURES_PATH = os.path.join(os.path.dirname(__file__), "tcp_signatures.txt")
+
+# Типичные начальные TTL стеков: наблюдаемый TTL округляется вверх до ближайшего
+_INITIAL_TTLS = (32, 64, 128, 255)
+
+# Названия опций TCP в нотации p0f
+_OPTION_NAMES = {
+    "MSS": "mss",
+    "NOP": "nop",
+    "WScale": "ws",
+    "SAckOK": "sok",
+    "SAck": "sack",
+    "Timestamp": "ts",
+    "EOL": "eol",
+}
+
+
+class SynFeatures(NamedTuple):
+    """
+    Признаки TCP SYN, по которым определяется стек ОС.
+
+    - ttl: наблюдаемый TTL (hop limit для IPv6)
+    - initial_ttl: предполагаемый начальный TTL
+    - window: размер окна
+    - mss: значение опции MSS (если есть)
+    - window_scale: значение опции window scale (если есть)
+    - olayout: порядок опций ("mss,nop,ws,...")
+    """
+
+    ttl: int
+    initial_ttl: int
+    window: int
+    mss: int | None
+    window_scale: int | None
+    olayout: str
+
+
+def guess_initial_ttl(ttl: int) -> int:
+    """
+    Оценивает начальный TTL по наблюдаемому (округление вверх до 32/64/128/255).
+    """
+    for initial in _INITIAL_TTLS:
+        if ttl <= initial:
+            return initial
+    return 255
+
+
+def options_layout(options: list[tuple]) -> tuple[str, int | None, int | None]:
+    """
+    Строит порядок опций TCP в нотации p0f (подряд идущие EOL схлопываются)
+    и извлекает MSS и window scale.
+
+    Args:
+        options (list[tuple]): Опции в формате scapy [(имя, значение), ...].
+
+    Returns:
+        tuple[str, int | None, int | None]: Порядок опций, MSS, window scale.
+    """
+    names: list[str] = []
+    mss = window_scale = None
+    for name, value in options:
+        if name == "MSS":
+            mss = value
+        elif name == "WScale":
+            window_scale = value
+        token = _OPTION_NAMES.get(name, "?")
+        if token == "eol" and names and names[-1] == "eol":
+            continue
+        names.append(token)
+    return ",".join(names), mss, window_scale
+
+
+class SignatureTable:
+    """
+    Таблица сигнатур SYN, скомпилированная в словарь
+    {(начальный TTL, окно, window scale, порядок опций): ОС}.
+
+    Окно в ключе хранится как число, "mss*N" или "*", window scale — как число
+    или "*". Поиск — фиксированное число обращений к словарю (от точного
+    ключа к шаблонным), независимо от размера базы.
+    """
+
+    def __init__(self, path: str = _SIGNATURES_PATH):
+        self._table: dict[tuple[int, str, str, str], str] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = [part.strip() for part in line.split("|")]
+                if len(parts) != 5:
+                    continue
+                label, ittl, window, scale, olayout = parts
+                # Первая сигнатура с тем же ключом имеет приоритет
+                self._table.setdefault((int(ittl), window, scale, olayout), label)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def match(self, features: SynFeatures) -> str | None:
+        """
+        Ищет ОС, соответствующую признакам SYN.
+
+        Args:
+            features (SynFeatures): Признаки пакета.
+
+        Returns:
+            str | None: Название ОС или None, если сигнатура неизвестна.
+        """
+        windows = [str(features.window)]
+        if features.mss and features.window % features.mss == 0:
+            windows.append(f"mss*{features.window // features.mss}")
+        windows.append("*")
+        scales = [str(features.window_scale or 0), "*"]
+        for window in windows:
+            for scale in scales:
+                label = self._table.get(
+                    (features.initial_ttl, window, scale, features.olayout)
+                )
+                if label is not None:
+                    return label
+        return None
+
+
+_table: SignatureTable | None = None
+
+
+def get_signature_table() -> SignatureTable:
+    """
+    Возвращает таблицу сигнатур (компилируется при первом обращении).
+    """
+    global _table
+    if _table is None:
+        _table = SignatureTable()
+    return _table
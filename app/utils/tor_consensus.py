@@ -0,0 +1,289 @@
+import asyncio
+import os
+from array import array
+
+from app.core.config import settings
+from app.utils.ip_index import IpSet, ip_to_int
+
+# Флаги релеев из consensus (строка "s ..."); номер в кортеже — номер бита в маске
+RELAY_FLAGS = (
+    "Authority",
+    "BadExit",
+    "Exit",
+    "Fast",
+    "Guard",
+    "HSDir",
+    "MiddleOnly",
+    "NoEdConsensus",
+    "Running",
+    "Stable",
+    "StaleDesc",
+    "Sybil",
+    "V2Dir",
+    "Valid",
+)
+_FLAG_BITS = {name.encode(): 1 << i for i, name in enumerate(RELAY_FLAGS)}
+EXIT_FLAG = _FLAG_BITS[b"Exit"]
+
+
+def flags_to_names(mask: int) -> list[str]:
+    """
+    Преобразует битовую маску флагов релея в список названий.
+
+    Args:
+        mask (int): Битовая маска (бит i соответствует RELAY_FLAGS[i]).
+
+    Returns:
+        list[str]: Названия установленных флагов.
+    """
+    return [name for i, name in enumerate(RELAY_FLAGS) if mask & (1 << i)]
+
+
+def _parse_address(raw: bytes) -> tuple[int, int] | None:
+    """
+    Разбирает адрес из строк "r"/"a"/"router": "1.2.3.4", "1.2.3.4:9001"
+    или "[2001:db8::1]:9001".
+    """
+    if raw.startswith(b"["):
+        raw = raw[1 : raw.find(b"]")]
+    elif raw.count(b":") == 1:
+        raw = raw[: raw.find(b":")]
+    try:
+        return ip_to_int(raw.decode("ascii"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_relay_document(path: str) -> dict[tuple[int, int], int]:
+    """
+    Потоково разбирает документ Tor: network-status consensus (в т.ч. microdesc)
+    или файл серверных дескрипторов.
+
+    Файл читается построчно в бинарном режиме; разбираются только строки
+    "r", "a", "s" (consensus) и "router", "or-address" (дескрипторы).
+    Маски флагов кэшируются по содержимому строки "s": в consensus таких
+    вариантов единицы, поэтому на каждый релей не создаётся новых объектов.
+
+    Args:
+        path (str): Путь к файлу документа.
+
+    Returns:
+        dict[tuple[int, int], int]: {(версия, адрес): маска флагов}.
+    """
+    relays: dict[tuple[int, int], int] = {}
+    flag_cache: dict[bytes, int] = {}
+    current: list[tuple[int, int]] = []
+
+    with open(path, "rb", buffering=1 << 20) as f:
+        for line in f:
+            head = line[:2]
+            if head == b"r ":
+                # r nickname identity [digest] date time IP ORPort DirPort
+                current = []
+                parts = line.split()
+                if len(parts) >= 8 and (addr := _parse_address(parts[-3])):
+                    current.append(addr)
+                    relays.setdefault(addr, 0)
+            elif head == b"a ":
+                if addr := _parse_address(line[2:].strip()):
+                    current.append(addr)
+                    relays.setdefault(addr, 0)
+            elif head == b"s ":
+                mask = flag_cache.get(line)
+                if mask is None:
+                    mask = 0
+                    for flag in line.split()[1:]:
+                        mask |= _FLAG_BITS.get(flag, 0)
+                    flag_cache[line] = mask
+                for addr in current:
+                    relays[addr] |= mask
+            elif line.startswith(b"router "):
+                # router nickname address ORPort SOCKSPort DirPort
+                current = []
+                parts = line.split()
+                if len(parts) >= 3 and (addr := _parse_address(parts[2])):
+                    current.append(addr)
+                    relays.setdefault(addr, 0)
+            elif line.startswith(b"or-address "):
+                if addr := _parse_address(line[11:].strip()):
+                    current.append(addr)
+                    relays.setdefault(addr, 0)
+    return relays
+
+
+class RelayIndex:
+    """
+    Индекс IP-адресов релеев Tor (guard, middle, exit и др.) с флагами.
+
+    Адреса хранятся в IpSet, маски флагов — в параллельном array('H'),
+    поэтому поиск стоит столько же, сколько проверка по списку exit-нод.
+    """
+
+    __slots__ = ("_ips", "_flags")
+
+    def __init__(self, relays: dict[tuple[int, int], int] | None = None):
+        relays = relays or {}
+        self._ips = IpSet.from_ints(
+            (value for version, value in relays if version == 4),
+            (value for version, value in relays if version == 6),
+        )
+        self._flags = array("H", (relays[key] for key in self._ips))
+
+    def __len__(self) -> int:
+        return len(self._ips)
+
+    def lookup(self, ip: str) -> int | None:
+        """
+        Ищет IP среди релеев.
+
+        Args:
+            ip (str): Проверяемый IP-адрес.
+
+        Returns:
+            int | None: Маска флагов релея или None, если адрес не является релеем.
+        """
+        try:
+            version, value = ip_to_int(ip)
+        except ValueError:
+            return None
+        pos = self._ips.position(version, value)
+        return None if pos is None else self._flags[pos]
+
+
+def read_document_time(path: str) -> tuple[bool, bytes]:
+    """
+    Читает из начала документа Tor его время, не разбирая список релеев:
+    "valid-after" для consensus и первое "published" для файла дескрипторов.
+
+    Args:
+        path (str): Путь к файлу документа.
+
+    Returns:
+        tuple[bool, bytes]: (это consensus, время "YYYY-MM-DD HH:MM:SS");
+        время пустое, если в документе его нет. Строки времени одного
+        формата сравниваются лексикографически.
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            if line.startswith(b"valid-after "):
+                return True, line[12:].strip()
+            if line.startswith(b"published "):
+                return False, line[10:].strip()
+            if line[:2] == b"r ":
+                # Список релеев consensus начался, а valid-after не встретился
+                return True, b""
+    return False, b""
+
+
+class ConsensusLoader:
+    """
+    Загрузчик документов consensus/дескрипторов из локальной директории.
+
+    Индекс строится только по самому свежему consensus (по valid-after):
+    флаги релеев из consensus разных часов не смешиваются, а устаревшие
+    файлы в директории не влияют на результат. Файлы дескрипторов
+    используются, только если consensus в директории нет (берётся самый
+    свежий по published).
+
+    Время документа читается из его заголовка и кэшируется по файлу
+    (mtime, размер), так что проверка директории не разбирает списки релеев;
+    индекс перестраивается, только когда сменился выбранный документ.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._times: dict[str, tuple[tuple[int, int], tuple[bool, bytes]]] = {}
+        self._current: tuple[str, tuple[int, int]] | None = None
+        self.valid_after: str | None = None
+        self.index = RelayIndex()
+
+    def refresh(self) -> bool:
+        """
+        Проверяет директорию и перестраивает индекс, если появился более
+        свежий документ (или изменился текущий).
+
+        Returns:
+            bool: True, если индекс был перестроен.
+        """
+        seen = {}
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    seen[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+        for path, version in seen.items():
+            cached = self._times.get(path)
+            if cached is None or cached[0] != version:
+                self._times[path] = (version, read_document_time(path))
+        for path in list(self._times):
+            if path not in seen:
+                del self._times[path]
+
+        # consensus предпочтительнее дескрипторов, среди них — самый свежий
+        newest = max(
+            self._times.items(),
+            key=lambda item: (item[1][1], item[0]),
+            default=None,
+        )
+        if newest is None:
+            current = None
+        else:
+            path, (version, _) = newest
+            current = (path, version)
+        if current == self._current:
+            return False
+
+        self._current = current
+        if current is None:
+            self.valid_after = None
+            self.index = RelayIndex()
+        else:
+            is_consensus, valid_after = self._times[current[0]][1]
+            self.valid_after = valid_after.decode() if is_consensus else None
+            self.index = RelayIndex(parse_relay_document(current[0]))
+        return True
+
+
+_loader: ConsensusLoader | None = None
+
+
+def get_consensus_loader() -> ConsensusLoader:
+    """
+    Возвращает загрузчик документов из settings.TOR_CONSENSUS_DIR
+    (при первом обращении разбирает директорию).
+    """
+    global _loader
+    if _loader is None:
+        _loader = ConsensusLoader(settings.TOR_CONSENSUS_DIR)
+        _loader.refresh()
+    return _loader
+
+
+def get_relay_index() -> RelayIndex:
+    """
+    Возвращает текущий индекс релеев Tor без обращения к диску.
+    """
+    return get_consensus_loader().index
+
+
+async def run_consensus_watcher(interval: float | None = None) -> None:
+    """
+    Фоновая задача: периодически проверяет директорию consensus
+    и перестраивает индекс релеев, когда появляется новый consensus.
+
+    Args:
+        interval (float | None): Период проверки в секундах
+            (по умолчанию settings.TOR_CONSENSUS_CHECK_SECONDS).
+    """
+    interval = interval or settings.TOR_CONSENSUS_CHECK_SECONDS
+    while True:
+        try:
+            loader = await asyncio.to_thread(get_consensus_loader)
+            if await asyncio.to_thread(loader.refresh):
+                print(f"[Tor] Индекс релеев обновлён: {len(loader.index)}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Tor] Не удалось обновить индекс релеев: {e}")
+        await asyncio.sleep(interval)
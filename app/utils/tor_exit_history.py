@@ -0,0 +1,325 @@
+import os
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Iterable
+
+from app.core.config import settings
+from app.utils.ip_index import IpSet, ip_to_int
+
+# Формат имени архивного снапшота: 20261019T120000Z.txt (время загрузки, UTC)
+SNAPSHOT_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+# Конец интервала для адресов, присутствующих в последнем снапшоте
+OPEN_END = 2**63 - 1
+
+
+def snapshot_name(moment: datetime) -> str:
+    """
+    Формирует имя файла архивного снапшота по времени загрузки.
+
+    Args:
+        moment (datetime): Время загрузки списка.
+
+    Returns:
+        str: Имя файла вида 20261019T120000Z.txt.
+    """
+    return moment.astimezone(timezone.utc).strftime(SNAPSHOT_TIME_FORMAT) + ".txt"
+
+
+def _parse_snapshot_time(filename: str) -> int | None:
+    stem, ext = os.path.splitext(filename)
+    if ext != ".txt":
+        return None
+    try:
+        moment = datetime.strptime(stem, SNAPSHOT_TIME_FORMAT)
+    except ValueError:
+        return None
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+
+def to_timestamp(moment: datetime | int | float) -> int:
+    """
+    Приводит момент времени к Unix-времени в секундах.
+    Наивные datetime считаются заданными в UTC.
+    """
+    if isinstance(moment, datetime):
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp())
+    return int(moment)
+
+
+class TorExitHistory:
+    """
+    Интервальная история присутствия IP в списках exit-нод Tor.
+
+    Для каждого адреса хранится отсортированный список непересекающихся
+    полуинтервалов [start, end) в Unix-времени. Адреса лежат в IpSet,
+    интервалы — в общих массивах array('q'), адресуемых через offsets
+    (интервалы адреса с номером i занимают позиции offsets[i]..offsets[i+1]).
+    Запросы на момент времени и на диапазон выполняются за O(log n + log k).
+    """
+
+    __slots__ = ("_ips", "_offsets", "_starts", "_ends", "first_seen", "last_seen")
+
+    def __init__(self, intervals: dict[tuple[int, int], list[tuple[int, int]]]):
+        """
+        Args:
+            intervals: {(версия, адрес): [(start, end), ...]} — интервалы
+                по возрастанию start.
+        """
+        self._ips = IpSet.from_ints(
+            (value for version, value in intervals if version == 4),
+            (value for version, value in intervals if version == 6),
+        )
+        self._offsets = array("I", [0])
+        self._starts = array("q")
+        self._ends = array("q")
+        for key in self._ips:
+            for start, end in intervals[key]:
+                self._starts.append(start)
+                self._ends.append(end)
+            self._offsets.append(len(self._starts))
+        self.first_seen: int | None = None
+        self.last_seen: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._ips)
+
+    def _bounds(self, ip: str) -> tuple[int, int] | None:
+        try:
+            version, value = ip_to_int(ip)
+        except ValueError:
+            return None
+        pos = self._ips.position(version, value)
+        if pos is None:
+            return None
+        return self._offsets[pos], self._offsets[pos + 1]
+
+    def was_exit(self, ip: str, moment: datetime | int | float) -> bool:
+        """
+        Был ли IP exit-нодой Tor в указанный момент времени.
+
+        Args:
+            ip (str): Проверяемый IP-адрес.
+            moment (datetime | int | float): Момент времени (datetime или Unix-время).
+
+        Returns:
+            bool: True, если момент попадает в один из интервалов присутствия.
+        """
+        bounds = self._bounds(ip)
+        if bounds is None:
+            return False
+        lo, hi = bounds
+        ts = to_timestamp(moment)
+        i = bisect_right(self._starts, ts, lo, hi) - 1
+        return i >= lo and ts < self._ends[i]
+
+    def periods(
+        self, ip: str, since: datetime | int | float, until: datetime | int | float
+    ) -> list[tuple[int, int]]:
+        """
+        Возвращает интервалы присутствия IP, пересекающиеся с [since, until].
+
+        Args:
+            ip (str): Проверяемый IP-адрес.
+            since (datetime | int | float): Начало диапазона.
+            until (datetime | int | float): Конец диапазона (включительно).
+
+        Returns:
+            list[tuple[int, int]]: Интервалы (start, end) в Unix-времени;
+            end == OPEN_END, если адрес есть в последнем снапшоте.
+        """
+        bounds = self._bounds(ip)
+        if bounds is None:
+            return []
+        lo, hi = bounds
+        since_ts, until_ts = to_timestamp(since), to_timestamp(until)
+        # Интервалы не пересекаются, поэтому и start, и end возрастают
+        last = bisect_right(self._starts, until_ts, lo, hi)
+        first = bisect_right(self._ends, since_ts, lo, last)
+        return [(self._starts[i], self._ends[i]) for i in range(first, last)]
+
+    def advance(
+        self, ts: int, current: Iterable[tuple[int, int]], since: int | None = None
+    ) -> "TorExitHistory":
+        """
+        Строит историю, дополненную новым снапшотом, из текущей без перечитывания
+        архива: адреса, пропавшие из снапшота, закрывают открытый интервал
+        моментом ts, новые адреса открывают интервал [ts, OPEN_END).
+
+        Args:
+            ts (int): Время нового снапшота (Unix-время).
+            current: Адреса (версия, значение) из нового снапшота.
+            since (int | None): Начало окна хранения: интервалы, закончившиеся
+                до него, отбрасываются, более ранние начала обрезаются.
+
+        Returns:
+            TorExitHistory: Новая история (текущая не изменяется).
+        """
+        current = set(current)
+        intervals: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        for pos, key in enumerate(self._ips):
+            periods = []
+            for i in range(self._offsets[pos], self._offsets[pos + 1]):
+                start, end = self._starts[i], self._ends[i]
+                if end == OPEN_END and key not in current:
+                    end = ts
+                if since is not None:
+                    if end <= since:
+                        continue
+                    start = max(start, since)
+                periods.append((start, end))
+            if periods:
+                intervals[key] = periods
+        for key in current:
+            periods = intervals.setdefault(key, [])
+            if not periods or periods[-1][1] != OPEN_END:
+                periods.append((ts, OPEN_END))
+
+        history = TorExitHistory(intervals)
+        first_seen = self.first_seen if self.first_seen is not None else ts
+        history.first_seen = max(first_seen, since) if since is not None else first_seen
+        history.last_seen = ts
+        return history
+
+    def query_many(
+        self, queries: Iterable[tuple[str, datetime | int | float]]
+    ) -> list[bool]:
+        """
+        Пакетная проверка пар (IP, момент времени).
+
+        Args:
+            queries: Последовательность пар (ip, момент).
+
+        Returns:
+            list[bool]: Результаты was_exit в том же порядке.
+        """
+        return [self.was_exit(ip, moment) for ip, moment in queries]
+
+
+def _list_snapshots(directory: str) -> list[tuple[int, str]]:
+    snapshots = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            ts = _parse_snapshot_time(name)
+            if ts is not None:
+                snapshots.append((ts, os.path.join(directory, name)))
+    snapshots.sort()
+    return snapshots
+
+
+def _retention_start(snapshots: list[tuple[int, str]], now: int) -> int | None:
+    """
+    Время самого раннего снапшота, который нужно хранить: последнего
+    снапшота не позже начала окна TOR_EXIT_HISTORY_RETENTION_DAYS (он задаёт
+    состояние списка на начало окна). None — хранить всё.
+    """
+    if settings.TOR_EXIT_HISTORY_RETENTION_DAYS <= 0 or not snapshots:
+        return None
+    cutoff = now - settings.TOR_EXIT_HISTORY_RETENTION_DAYS * 86400
+    i = bisect_right([ts for ts, _ in snapshots], cutoff) - 1
+    return snapshots[i][0] if i > 0 else None
+
+
+def prune_snapshots(directory: str, now: int) -> list[tuple[int, str]]:
+    """
+    Удаляет снапшоты старше окна хранения TOR_EXIT_HISTORY_RETENTION_DAYS.
+
+    Args:
+        directory (str): Директория со снапшотами.
+        now (int): Текущее Unix-время.
+
+    Returns:
+        list[tuple[int, str]]: Оставшиеся снапшоты (время, путь) по возрастанию.
+    """
+    snapshots = _list_snapshots(directory)
+    start = _retention_start(snapshots, now)
+    if start is None:
+        return snapshots
+    kept = []
+    for ts, path in snapshots:
+        if ts >= start:
+            kept.append((ts, path))
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"[Tor] Не удалось удалить снапшот {path}: {e}")
+    return kept
+
+
+def build_history(directory: str) -> TorExitHistory:
+    """
+    Строит историю из архивных снапшотов списка exit-нод в директории.
+    Каждый файл <YYYYMMDDTHHMMSSZ>.txt — полный список на момент загрузки.
+    Адрес считается exit-нодой с первого снапшота, где он появился,
+    до первого снапшота, где он пропал. Снапшоты старше окна хранения
+    предварительно удаляются.
+
+    Args:
+        directory (str): Директория со снапшотами.
+
+    Returns:
+        TorExitHistory: Построенный индекс (пустой, если снапшотов нет).
+    """
+    snapshots = prune_snapshots(directory, int(time.time()))
+
+    intervals: dict[tuple[int, int], list[tuple[int, int]]] = {}
+    active: dict[tuple[int, int], int] = {}
+    for ts, path in snapshots:
+        with open(path, "r", encoding="utf-8") as f:
+            current = set(IpSet.from_lines(f))
+        for key in [key for key in active if key not in current]:
+            intervals.setdefault(key, []).append((active.pop(key), ts))
+        for key in current:
+            if key not in active:
+                active[key] = ts
+    for key, start in active.items():
+        intervals.setdefault(key, []).append((start, OPEN_END))
+
+    history = TorExitHistory(intervals)
+    if snapshots:
+        history.first_seen, history.last_seen = snapshots[0][0], snapshots[-1][0]
+    return history
+
+
+_history: TorExitHistory | None = None
+
+
+def get_exit_history() -> TorExitHistory:
+    """
+    Возвращает индекс истории exit-нод, при первом обращении строит его
+    из settings.TOR_EXIT_HISTORY_DIR.
+    """
+    global _history
+    if _history is None:
+        _history = build_history(settings.TOR_EXIT_HISTORY_DIR)
+    return _history
+
+
+def update_exit_history(
+    moment: datetime | int | float, current: Iterable[tuple[int, int]]
+) -> TorExitHistory:
+    """
+    Учитывает только что архивированный снапшот: удаляет снапшоты старше окна
+    хранения и дополняет текущий индекс новым снапшотом (без перечитывания
+    архива), затем атомарно подменяет его.
+
+    Args:
+        moment (datetime | int | float): Время снапшота.
+        current: Адреса (версия, значение) из снапшота.
+
+    Returns:
+        TorExitHistory: Обновлённый индекс.
+    """
+    global _history
+    ts = to_timestamp(moment)
+    if _history is None:
+        _history = build_history(settings.TOR_EXIT_HISTORY_DIR)
+        return _history
+    snapshots = prune_snapshots(settings.TOR_EXIT_HISTORY_DIR, ts)
+    since = snapshots[0][0] if snapshots else None
+    _history = _history.advance(ts, current, since)
+    return _history
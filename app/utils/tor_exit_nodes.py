@@ -1,52 +1,175 @@
 import asyncio
+import json
 import os
+import tempfile
+from datetime import datetime, timezone
 
 from app.core.config import settings
-from app.utils.cache import Cache
-from app.utils.http_client import HttpClient
+from app.utils.http_client import http_pool
+from app.utils.ip_index import IpSet
+from app.utils.tor_exit_history import snapshot_name, update_exit_history
+from app.utils.upstream import get_upstream
 
-_tor_cache = Cache()
 _LOCAL_EXIT_PATH = os.path.join(os.path.dirname(__file__), "../utils/tor_exits.txt")
 
+# Текущий индекс exit-нод. Обновляется целиком заменой ссылки,
+# поэтому читатели никогда не блокируются и не видят частичного состояния.
+_exit_index: IpSet | None = None
+# Валидаторы последнего успешного ответа (ETag / Last-Modified) для условного GET
+_validators: dict[str, str] = {}
 
-def _load_exits_from_file() -> set[str]:
+
+def _meta_path() -> str:
+    return settings.TOR_EXIT_SNAPSHOT_PATH + ".meta"
+
+
+def _load_exits_from_file(path: str = _LOCAL_EXIT_PATH) -> IpSet:
     """
     Подгружает exit-ноды из локального файла.
     """
     try:
-        with open(_LOCAL_EXIT_PATH, "r", encoding="utf-8") as f:
-            ips = {ln.strip() for ln in f if ln and not ln.startswith("#")}
-        return ips
+        with open(path, "r", encoding="utf-8") as f:
+            return IpSet.from_lines(f)
     except Exception as e:
-        print(f"[Tor] Ошибка чтения файла exit-нод: {e}")
-        return set()
+        print(f"[Tor] Ошибка чтения файла exit-нод {path}: {e}")
+        return IpSet()
 
 
-async def load_exit_nodes() -> set[str]:
+def _load_initial_index() -> IpSet:
     """
-    Загрузить и закэшировать список Tor выходных узлов.
-    Если не удаётся скачать онлайн за 0.5 сек — подгружает из файла.
+    Загружает индекс при старте: сначала из снапшота последней успешной загрузки,
+    при его отсутствии — из поставляемого с приложением tor_exits.txt.
+    Заодно восстанавливает валидаторы для условного GET.
     """
-    if cached := _tor_cache.get("tor_exits"):
-        return cached
+    if os.path.exists(settings.TOR_EXIT_SNAPSHOT_PATH):
+        index = _load_exits_from_file(settings.TOR_EXIT_SNAPSHOT_PATH)
+        if len(index):
+            try:
+                with open(_meta_path(), "r", encoding="utf-8") as f:
+                    _validators.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+            return index
+    return _load_exits_from_file()
 
-    # Пытаемся скачать онлайн-версию с таймаутом
-    async def download():
-        async with HttpClient() as session:
-            resp = await session.get(settings.TOR_EXIT_LIST_URL)
-            text = await resp.text()
-            return {
-                ln.strip() for ln in text.splitlines() if ln and not ln.startswith("#")
-            }
 
+def _atomic_write(path: str, data: str) -> None:
+    """
+    Атомарно записывает файл: пишет во временный файл в той же директории
+    и переименовывает его поверх целевого.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
     try:
-        ips = await asyncio.wait_for(download(), timeout=0.5)
-        _tor_cache.set("tor_exits", ips, ttl=settings.CACHE_TTL_SECONDS)
-        return ips
-    except Exception as e:
-        print(f"[Tor] Не удалось скачать exit-ноды онлайн: {e}")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _save_snapshot(text: str, validators: dict[str, str], index: IpSet) -> None:
+    _atomic_write(settings.TOR_EXIT_SNAPSHOT_PATH, text)
+    _atomic_write(_meta_path(), json.dumps(validators))
+    # Архивная копия с временем загрузки — источник для истории exit-нод
+    if settings.TOR_EXIT_HISTORY_DIR:
+        moment = datetime.now(timezone.utc)
+        archive_name = snapshot_name(moment)
+        _atomic_write(os.path.join(settings.TOR_EXIT_HISTORY_DIR, archive_name), text)
+        update_exit_history(moment, index)
+
+
+def get_exit_index() -> IpSet:
+    """
+    Возвращает текущий индекс exit-нод без сетевых обращений.
+
+    Returns:
+        IpSet: Компактный индекс exit-нод (IPv4 и IPv6) с проверкой за O(log n).
+    """
+    global _exit_index
+    if _exit_index is None:
+        _exit_index = _load_initial_index()
+    return _exit_index
+
+
+async def load_exit_nodes() -> IpSet:
+    """
+    Возвращает текущий список Tor выходных узлов.
+    Никогда не ходит в сеть: свежесть списка поддерживает фоновая задача
+    run_exit_list_refresher.
 
-    # Фолбэк: грузим из файла
-    file_ips = _load_exits_from_file()
-    _tor_cache.set("tor_exits", file_ips, ttl=settings.CACHE_TTL_SECONDS)
-    return file_ips
+    Returns:
+        IpSet: Компактный индекс exit-нод (IPv4 и IPv6) с проверкой за O(log n).
+    """
+    return get_exit_index()
+
+
+async def refresh_exit_nodes() -> bool:
+    """
+    Скачивает свежий список exit-нод условным GET (If-None-Match / If-Modified-Since).
+    При изменении списка атомарно сохраняет снапшот на диск и подменяет индекс.
+
+    Returns:
+        bool: True, если индекс был обновлён; False, если список не изменился.
+    """
+    global _exit_index
+
+    headers = {}
+    if etag := _validators.get("etag"):
+        headers["If-None-Match"] = etag
+    if last_modified := _validators.get("last_modified"):
+        headers["If-Modified-Since"] = last_modified
+
+    async def fetch() -> tuple[int, str, dict[str, str]]:
+        session = await http_pool.get_session()
+        async with session.get(settings.TOR_EXIT_LIST_URL, headers=headers) as resp:
+            if resp.status == 304:
+                return resp.status, "", {}
+            resp.raise_for_status()
+            validators = {}
+            if etag := resp.headers.get("ETag"):
+                validators["etag"] = etag
+            if last_modified := resp.headers.get("Last-Modified"):
+                validators["last_modified"] = last_modified
+            return resp.status, await resp.text(), validators
+
+    status, text, validators = await get_upstream("torproject").call(fetch)
+    if status == 304:
+        return False
+
+    index = await asyncio.to_thread(IpSet.from_lines, text.splitlines())
+    if not len(index):
+        raise ValueError("Получен пустой список exit-нод")
+
+    await asyncio.to_thread(_save_snapshot, text, validators, index)
+    _validators.clear()
+    _validators.update(validators)
+    _exit_index = index
+    return True
+
+
+async def run_exit_list_refresher(interval: float | None = None) -> None:
+    """
+    Фоновая задача: периодически обновляет список exit-нод.
+    Запускается в lifespan приложения; ошибки логируются и не прерывают цикл.
+
+    Args:
+        interval (float | None): Период обновления в секундах
+            (по умолчанию settings.TOR_EXIT_REFRESH_SECONDS).
+    """
+    interval = interval or settings.TOR_EXIT_REFRESH_SECONDS
+    get_exit_index()
+    while True:
+        try:
+            if await refresh_exit_nodes():
+                print(f"[Tor] Список exit-нод обновлён: {len(get_exit_index())}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Tor] Не удалось обновить exit-ноды онлайн: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,308 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from aiohttp import ClientError, ClientResponseError
+
+from app.core.config import settings
+from app.exceptions import UpstreamUnavailableError
+
+T = TypeVar("T")
+
+# Ошибки, при которых имеет смысл повторить запрос
+RETRYABLE_ERRORS = (asyncio.TimeoutError, ClientError, OSError)
+
+
+def _is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Считается ли ошибка сбоем upstream: ответы 4xx (кроме 429) означают,
+    что сервис жив, и на состояние circuit breaker не влияют.
+    """
+    if isinstance(exc, ClientResponseError):
+        return exc.status >= 500 or exc.status == 429
+    return isinstance(exc, RETRYABLE_ERRORS)
+
+
+class RetryBudget:
+    """
+    Глобальный бюджет повторных запросов.
+
+    Каждый исходный запрос пополняет бюджет на ratio токенов, каждый повтор
+    тратит один токен. Дополнительно бюджет пополняется на min_per_second
+    токенов в секунду, чтобы повторы были возможны и при малом трафике.
+    Так повторы не могут умножить нагрузку на упавший upstream.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self.exhausted = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second
+        )
+        self._updated = now
+
+    def deposit(self) -> None:
+        """Учитывает исходный (не повторный) запрос."""
+        self._refill()
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """
+        Пытается взять токен на повтор.
+
+        Returns:
+            bool: True, если повтор разрешён бюджетом.
+        """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker с состояниями closed / open / half_open.
+
+    - closed: запросы идут, считаются подряд идущие сбои;
+    - open: после failure_threshold сбоев запросы сразу отклоняются
+      в течение reset_timeout секунд;
+    - half_open: пропускается один пробный запрос; успех закрывает цепь,
+      сбой снова открывает её.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> str | None:
+        """
+        Разрешает ли цепь очередной запрос.
+
+        Returns:
+            str | None: Состояние, в котором запрос пропущен (CLOSED или
+            HALF_OPEN — тогда он занял пробу и обязан завершиться
+            record_success, record_failure или release_probe), либо None,
+            если запрос отклонён.
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return state
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return state
+        return None
+
+    def release_probe(self) -> None:
+        """
+        Освобождает пробный запрос, не изменяя состояние цепи
+        (пробный вызов отменён и ничего не сообщил о состоянии upstream).
+        """
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._probe_in_flight or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+
+class Upstream:
+    """
+    Обёртка вызовов внешнего сервиса: дедлайн на весь вызов (с повторами),
+    повторы с экспоненциальной задержкой в рамках общего бюджета
+    и circuit breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deadline: float,
+        max_retries: int,
+        budget: RetryBudget,
+        breaker: CircuitBreaker,
+    ):
+        self.name = name
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.budget = budget
+        self.breaker = breaker
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет вызов upstream с дедлайном, повторами и circuit breaker.
+
+        Args:
+            func: Фабрика корутины, выполняющей один полный запрос
+                (включая чтение тела ответа).
+
+        Returns:
+            T: Результат func.
+
+        Raises:
+            UpstreamUnavailableError: Цепь разомкнута, истёк дедлайн
+                или исчерпаны повторы.
+            Exception: Ошибки, не являющиеся сбоями upstream (например, 404),
+                пробрасываются как есть.
+        """
+        self.calls += 1
+        admitted = self.breaker.allow()
+        if admitted is None:
+            self.rejected += 1
+            raise UpstreamUnavailableError(f"{self.name}: circuit open")
+        # Занята ли этим вызовом проба half_open (с первой попытки или с повтора)
+        probe = admitted == CircuitBreaker.HALF_OPEN
+
+        self.budget.deposit()
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+        attempt = 0
+        try:
+            while True:
+                remaining = deadline_at - loop.time()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    result = await asyncio.wait_for(func(), timeout=remaining)
+                except Exception as e:
+                    if not _is_upstream_failure(e):
+                        probe = False
+                        self.breaker.record_success()
+                        raise
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.timeouts += 1
+                    self.failures += 1
+                    probe = False
+                    self.breaker.record_failure()
+
+                    delay = settings.UPSTREAM_RETRY_BACKOFF * (2**attempt)
+                    delay *= random.uniform(0.5, 1.0)
+                    if (
+                        attempt < self.max_retries
+                        and deadline_at - loop.time() > delay
+                        and (admitted := self.breaker.allow()) is not None
+                    ):
+                        probe = admitted == CircuitBreaker.HALF_OPEN
+                        can_retry = self.budget.try_withdraw()
+                    else:
+                        can_retry = False
+                    if not can_retry:
+                        raise UpstreamUnavailableError(f"{self.name}: {e!r}") from e
+                    attempt += 1
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+                else:
+                    self.successes += 1
+                    probe = False
+                    self.breaker.record_success()
+                    return result
+        except BaseException:
+            # Проба, не завершённая record_success/record_failure (отмена вызова,
+            # в т.ч. во время паузы перед повтором, или повтор без бюджета),
+            # освобождается: иначе цепь навсегда осталась бы в half_open
+            if probe:
+                self.breaker.release_probe()
+            raise
+
+    def stats(self) -> dict:
+        """
+        Возвращает текущее состояние и счётчики upstream.
+        """
+        return {
+            "name": self.name,
+            "state": self.breaker.state,
+            "deadline": self.deadline,
+            "max_retries": self.max_retries,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
+
+
+retry_budget = RetryBudget(
+    ratio=settings.RETRY_BUDGET_RATIO,
+    min_per_second=settings.RETRY_BUDGET_MIN_PER_SECOND,
+    max_tokens=settings.RETRY_BUDGET_MAX_TOKENS,
+)
+_upstreams: dict[str, Upstream] = {}
+
+
+def get_upstream(name: str) -> Upstream:
+    """
+    Возвращает (создаёт при первом обращении) обёртку upstream по имени.
+    Дедлайн берётся из settings.UPSTREAM_DEADLINES, иначе
+    settings.UPSTREAM_DEFAULT_DEADLINE.
+
+    Args:
+        name (str): Имя upstream (например, "iphub", "ipinfo", "crtsh").
+
+    Returns:
+        Upstream: Обёртка для вызовов.
+    """
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        upstream = Upstream(
+            name=name,
+            deadline=settings.UPSTREAM_DEADLINES.get(
+                name, settings.UPSTREAM_DEFAULT_DEADLINE
+            ),
+            max_retries=settings.UPSTREAM_MAX_RETRIES,
+            budget=retry_budget,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_RESET_SECONDS,
+            ),
+        )
+        _upstreams[name] = upstream
+    return upstream
+
+
+def upstreams_stats() -> list[dict]:
+    """
+    Возвращает состояние всех известных upstream.
+    """
+    return [upstream.stats() for upstream in _upstreams.values()]
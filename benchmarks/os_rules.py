@@ -0,0 +1,70 @@
+"""
+Сравнение способов сопоставления User-Agent с правилами os_service.
+
+- per_rule: каждое правило — отдельный скомпилированный шаблон (текущий способ);
+- lookahead: одно выражение из необязательных lookahead на каждое правило,
+  все совпадения за один вызов match;
+- alternation: одно выражение-альтернация с именованными группами, finditer.
+
+Для каждого способа проверяется совпадение результатов с per_rule
+и измеряется время на один User-Agent из корпуса user_agents.txt.
+
+Запуск: python -m benchmarks.os_rules
+"""
+
+import os
+import re
+import timeit
+
+from app.services.os_service import USER_AGENT_PATTERNS
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "user_agents.txt")
+NUMBER = 2000
+REPEAT = 5
+
+
+def main() -> None:
+    rules = [
+        pattern for patterns in USER_AGENT_PATTERNS.values() for pattern, _ in patterns
+    ]
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        corpus = [line.strip() for line in f if line.strip()]
+
+    compiled = [re.compile(pattern, re.IGNORECASE) for pattern in rules]
+    lookahead = re.compile(
+        "".join(f"(?:(?=.*?(?P<r{i}>{p})))?" for i, p in enumerate(rules)),
+        re.IGNORECASE | re.DOTALL,
+    )
+    alternation = re.compile(
+        "|".join(f"(?P<r{i}>{p})" for i, p in enumerate(rules)), re.IGNORECASE
+    )
+    groups = [f"r{i}" for i in range(len(rules))]
+
+    def per_rule(ua: str) -> list[int]:
+        return [i for i, regex in enumerate(compiled) if regex.search(ua)]
+
+    def single_lookahead(ua: str) -> list[int]:
+        match = lookahead.match(ua)
+        return [i for i, name in enumerate(groups) if match.group(name) is not None]
+
+    def single_alternation(ua: str) -> list[int]:
+        return sorted({int(m.lastgroup[1:]) for m in alternation.finditer(ua)})
+
+    print(f"Правил: {len(rules)}, User-Agent в корпусе: {len(corpus)}")
+    for name, func in (
+        ("per_rule", per_rule),
+        ("lookahead", single_lookahead),
+        ("alternation", single_alternation),
+    ):
+        mismatches = sum(func(ua) != per_rule(ua) for ua in corpus)
+        best = min(
+            timeit.repeat(
+                lambda: [func(ua) for ua in corpus], number=NUMBER, repeat=REPEAT
+            )
+        )
+        per_ua = best / NUMBER / len(corpus) * 1e6
+        print(f"{name:12} {per_ua:8.2f} мкс/UA, расхождений с per_rule: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
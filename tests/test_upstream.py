@@ -0,0 +1,92 @@
+import asyncio
+
+from app.exceptions import UpstreamUnavailableError
+from app.utils.upstream import CircuitBreaker, RetryBudget, Upstream
+
+
+def _upstream(max_retries: int = 0, max_tokens: float = 10.0) -> Upstream:
+    return Upstream(
+        name="test",
+        deadline=5.0,
+        max_retries=max_retries,
+        budget=RetryBudget(ratio=0.0, min_per_second=0.0, max_tokens=max_tokens),
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.0),
+    )
+
+
+async def ok():
+    return "ok"
+
+
+def test_cancelled_half_open_probe_is_released():
+    async def scenario():
+        upstream = _upstream()
+        upstream.breaker.record_failure()
+        assert upstream.breaker.state == CircuitBreaker.HALF_OPEN
+
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        probe = asyncio.ensure_future(upstream.call(hang))
+        await started.wait()
+        probe.cancel()
+        try:
+            await probe
+        except asyncio.CancelledError:
+            pass
+
+        assert await upstream.call(ok) == "ok"
+        assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_retry_releases_probe_taken_on_retry():
+    async def scenario():
+        # Первая попытка в closed размыкает цепь; с reset_timeout=0 повтор
+        # сразу занимает пробу half_open
+        upstream = _upstream(max_retries=1)
+        attempts = 0
+        retrying = asyncio.Event()
+
+        async def flaky():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise ConnectionError("down")
+            retrying.set()
+            await asyncio.sleep(3600)
+
+        call = asyncio.ensure_future(upstream.call(flaky))
+        await retrying.wait()
+        call.cancel()
+        try:
+            await call
+        except asyncio.CancelledError:
+            pass
+
+        assert await upstream.call(ok) == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_retry_without_budget_releases_probe():
+    async def scenario():
+        upstream = _upstream(max_retries=1, max_tokens=0.0)
+
+        async def down():
+            raise ConnectionError("down")
+
+        try:
+            await upstream.call(down)
+        except UpstreamUnavailableError:
+            pass
+        else:
+            raise AssertionError("ожидалась UpstreamUnavailableError")
+
+        assert await upstream.call(ok) == "ok"
+
+    asyncio.run(scenario())